@@ -5,6 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.models import Base
+from app.database import url_com_driver
 import os
 import sys
 from dotenv import load_dotenv
@@ -18,7 +19,8 @@ config = context.config
 
 db_url = os.getenv("DATABASE_URL")
 if db_url:
-    config.set_main_option("sqlalchemy.url", db_url)
+    # a API usa asyncpg; as migrações rodam síncronas com psycopg2
+    config.set_main_option("sqlalchemy.url", url_com_driver(db_url, "psycopg2").render_as_string(hide_password=False).replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
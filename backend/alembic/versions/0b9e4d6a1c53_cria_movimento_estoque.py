@@ -0,0 +1,54 @@
+"""Cria movimento_estoque
+
+Revision ID: 0b9e4d6a1c53
+Revises: f1c8d93a2e67
+Create Date: 2026-10-18 17:40:05.118632
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b9e4d6a1c53'
+down_revision: Union[str, Sequence[str], None] = 'f1c8d93a2e67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movimento_estoque',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('peca_id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=10), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('ordem_servico_id', sa.Integer(), nullable=True),
+    sa.Column('observacao', sa.String(length=200), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('compactado', sa.Boolean(), server_default=sa.false(), nullable=False),
+    sa.ForeignKeyConstraint(['peca_id'], ['peca.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['ordem_servico_id'], ['ordem_servico.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_movimento_estoque_peca_id_id', 'movimento_estoque', ['peca_id', 'id'], unique=False)
+    op.create_index('ix_movimento_estoque_pendente', 'movimento_estoque', ['peca_id', 'quantidade'], unique=False,
+                    postgresql_where=sa.text('NOT compactado'))
+
+    # O estoque atual vira o primeiro movimento de cada peça, já compactado
+    # (snapshot = soma dos movimentos compactados)
+    op.execute("""
+        INSERT INTO movimento_estoque (peca_id, tipo, quantidade, observacao, compactado)
+        SELECT id, 'AJUSTE', estoque_atual, 'Saldo inicial', true
+        FROM peca
+        WHERE estoque_atual <> 0
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_movimento_estoque_pendente', table_name='movimento_estoque')
+    op.drop_index('ix_movimento_estoque_peca_id_id', table_name='movimento_estoque')
+    op.drop_table('movimento_estoque')
@@ -0,0 +1,43 @@
+"""Cria fila de tarefas
+
+Revision ID: 3e6a9c1f5b28
+Revises: 7b2d4e9f1a36
+Create Date: 2026-10-18 21:40:12.318547
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e6a9c1f5b28'
+down_revision: Union[str, Sequence[str], None] = '7b2d4e9f1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tarefa',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('dados', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=10), server_default='PENDENTE', nullable=False),
+    sa.Column('tentativas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('max_tentativas', sa.Integer(), nullable=False),
+    sa.Column('executar_em', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('criado_em', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('erro', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # tabela nova e vazia: não precisa de CONCURRENTLY
+    op.create_index('ix_tarefa_pendente', 'tarefa', ['executar_em', 'id'], unique=False,
+                    postgresql_where=sa.text("status = 'PENDENTE'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tarefa_pendente', table_name='tarefa', postgresql_where=sa.text("status = 'PENDENTE'"))
+    op.drop_table('tarefa')
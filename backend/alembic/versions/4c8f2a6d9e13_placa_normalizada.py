@@ -0,0 +1,78 @@
+"""Placa normalizada
+
+Revision ID: 4c8f2a6d9e13
+Revises: 9a3e5c7b1f24
+Create Date: 2026-10-18 20:52:41.093118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8f2a6d9e13'
+down_revision: Union[str, Sequence[str], None] = '9a3e5c7b1f24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, tabela, colunas, extras)
+INDICES = [
+    ('ix_veiculo_placa_normalizada', 'veiculo', ['placa_normalizada'], {'unique': True}),
+    ('ix_veiculo_placa_normalizada_trgm', 'veiculo', ['placa_normalizada'],
+     {'postgresql_using': 'gin', 'postgresql_ops': {'placa_normalizada': 'gin_trgm_ops'}}),
+]
+
+# Substituído pelo índice de trigramas sobre a coluna
+INDICE_ANTIGO = ('ix_veiculo_placa_trgm', 'veiculo',
+                 [sa.text("upper(regexp_replace(placa, '[^0-9A-Za-z]', '', 'g')) gin_trgm_ops")],
+                 {'postgresql_using': 'gin'})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('veiculo', sa.Column('placa_normalizada', sa.String(length=10), nullable=True))
+
+    # Mesma regra de app/normalizacao.py: sem separadores, maiúsculas e o
+    # padrão antigo convertido para Mercosul (5º caractere: 0->A ... 9->J)
+    op.execute("""
+        UPDATE veiculo v SET placa_normalizada = CASE
+            WHEN n.p ~ '^[A-Z]{3}[0-9]{2,4}$' THEN overlay(n.p PLACING chr(65 + substr(n.p, 5, 1)::int) FROM 5 FOR 1)
+            ELSE n.p
+        END
+        FROM (SELECT id, upper(regexp_replace(placa, '[^0-9A-Za-z]', '', 'g')) AS p FROM veiculo) n
+        WHERE v.id = n.id
+    """)
+
+    # 'ABC-1234' e 'ABC1C34' cadastradas como veículos distintos barrariam o
+    # índice único; melhor parar aqui com a lista (no modo --sql não há banco)
+    if not op.get_context().as_sql:
+        repetidas = op.get_bind().execute(sa.text("""
+            SELECT placa_normalizada, string_agg(placa || ' (id ' || id || ')', ', ' ORDER BY id)
+            FROM veiculo GROUP BY placa_normalizada HAVING count(*) > 1 LIMIT 20
+        """)).all()
+        if repetidas:
+            lista = "; ".join(f"{placa}: {veiculos}" for placa, veiculos in repetidas)
+            raise RuntimeError(f"Veículos com a mesma placa normalizada, unifique antes de migrar: {lista}")
+
+    op.alter_column('veiculo', 'placa_normalizada', nullable=False)
+
+    with op.get_context().autocommit_block():
+        nome, tabela, _, _ = INDICE_ANTIGO
+        op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
+        for nome, tabela, colunas, extras in INDICES:
+            extras = {'unique': False, **extras}
+            op.create_index(nome, tabela, colunas, postgresql_concurrently=True, if_not_exists=True, **extras)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nome, tabela, _, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
+        nome, tabela, colunas, extras = INDICE_ANTIGO
+        op.create_index(nome, tabela, colunas, unique=False,
+                        postgresql_concurrently=True, if_not_exists=True, **extras)
+
+    op.drop_column('veiculo', 'placa_normalizada')
@@ -0,0 +1,32 @@
+"""Cria versao_tabela
+
+Revision ID: 5d27a0f4b8e1
+Revises: 0b9e4d6a1c53
+Create Date: 2026-10-18 19:05:33.640271
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d27a0f4b8e1'
+down_revision: Union[str, Sequence[str], None] = '0b9e4d6a1c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('versao_tabela',
+    sa.Column('tabela', sa.String(length=50), nullable=False),
+    sa.Column('versao', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('tabela')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('versao_tabela')
@@ -0,0 +1,38 @@
+"""Movimentos de estoque barram a remoção da peça
+
+Revision ID: 6f1b3d8a2c47
+Revises: 3e6a9c1f5b28
+Create Date: 2026-10-18 22:31:05.412290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f1b3d8a2c47'
+down_revision: Union[str, Sequence[str], None] = '3e6a9c1f5b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Nome padrão do Postgres para a FK criada sem nome em 0b9e4d6a1c53
+FK = 'movimento_estoque_peca_id_fkey'
+
+
+def _trocar_fk(ondelete: str) -> None:
+    # Na mesma transação da migração: não há janela sem a FK
+    op.drop_constraint(FK, 'movimento_estoque', type_='foreignkey')
+    op.create_foreign_key(FK, 'movimento_estoque', 'peca', ['peca_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # O histórico de estoque é o livro-razão da peça: apagar a peça não pode
+    # levar os movimentos junto (antes era CASCADE)
+    _trocar_fk('RESTRICT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _trocar_fk('CASCADE')
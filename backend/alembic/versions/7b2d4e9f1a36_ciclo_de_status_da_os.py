@@ -0,0 +1,76 @@
+"""Ciclo de status da OS
+
+Revision ID: 7b2d4e9f1a36
+Revises: 4c8f2a6d9e13
+Create Date: 2026-10-18 22:14:09.517302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2d4e9f1a36'
+down_revision: Union[str, Sequence[str], None] = '4c8f2a6d9e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Cópia de app/status_os.py na data da migração
+TODOS = ('ORCAMENTO', 'APROVADO', 'EM_ANDAMENTO', 'FINALIZADO', 'CANCELADO')
+ABERTA = "status IN ('ORCAMENTO', 'APROVADO', 'EM_ANDAMENTO')"
+CHECK = "status IN (" + ", ".join(f"'{s}'" for s in TODOS) + ")"
+
+# (nome, tabela, colunas, extras)
+INDICES = [
+    ('ix_ordem_servico_quadro', 'ordem_servico', ['status', 'data_abertura', 'id'],
+     {'postgresql_where': sa.text(ABERTA)}),
+    ('ix_ordem_servico_aberta_mecanico', 'ordem_servico', ['mecanico_id'],
+     {'postgresql_where': sa.text(ABERTA)}),
+]
+
+# Predicado antigo (status <> 'FINALIZADO') contaria CANCELADO como aberta
+INDICE_ANTIGO = ('ix_ordem_servico_aberta_status', 'ordem_servico', ['status'],
+                 {'postgresql_where': sa.text("status <> 'FINALIZADO'")})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # status era texto livre: padroniza e troca o nome antigo de EM_ANDAMENTO
+    op.execute("UPDATE ordem_servico SET status = upper(btrim(status)) WHERE status <> upper(btrim(status))")
+    op.execute("UPDATE ordem_servico SET status = 'EM_ANDAMENTO' WHERE status = 'EXECUCAO'")
+
+    # Outros valores não têm equivalente certo: melhor parar com a lista (no modo --sql não há banco)
+    if not op.get_context().as_sql:
+        desconhecidos = op.get_bind().execute(sa.text(
+            f"SELECT status, count(*) FROM ordem_servico WHERE NOT ({CHECK}) GROUP BY status ORDER BY 2 DESC LIMIT 20"
+        )).all()
+        if desconhecidos:
+            lista = ", ".join(f"{status!r} ({n} OS)" for status, n in desconhecidos)
+            raise RuntimeError(f"OS com status fora do ciclo {TODOS}, corrija antes de migrar: {lista}")
+
+    # NOT VALID + VALIDATE fora da transação: a varredura de validação não bloqueia escritas
+    op.execute(f"ALTER TABLE ordem_servico ADD CONSTRAINT ck_ordem_servico_status CHECK ({CHECK}) NOT VALID")
+
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE ordem_servico VALIDATE CONSTRAINT ck_ordem_servico_status")
+        for nome, tabela, colunas, extras in INDICES:
+            op.create_index(nome, tabela, colunas, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True, **extras)
+        nome, tabela, _, _ = INDICE_ANTIGO
+        op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        nome, tabela, colunas, extras = INDICE_ANTIGO
+        op.create_index(nome, tabela, colunas, unique=False,
+                        postgresql_concurrently=True, if_not_exists=True, **extras)
+        for nome, tabela, _, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
+
+    op.drop_constraint('ck_ordem_servico_status', 'ordem_servico', type_='check')
+    # APROVADO e CANCELADO não existiam, mas status era texto livre e continuam válidos
+    op.execute("UPDATE ordem_servico SET status = 'EXECUCAO' WHERE status = 'EM_ANDAMENTO'")
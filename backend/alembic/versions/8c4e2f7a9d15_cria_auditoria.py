@@ -0,0 +1,36 @@
+"""Cria auditoria
+
+Revision ID: 8c4e2f7a9d15
+Revises: 6f1b3d8a2c47
+Create Date: 2026-10-18 23:05:48.730214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e2f7a9d15'
+down_revision: Union[str, Sequence[str], None] = '6f1b3d8a2c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('auditoria',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('acao', sa.String(length=50), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('usuario', sa.String(length=50), nullable=False),
+    sa.Column('dados', sa.JSON(), nullable=False),
+    sa.Column('criado_em', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('auditoria')
@@ -0,0 +1,61 @@
+"""Busca de clientes e veículos
+
+Revision ID: 9a3e5c7b1f24
+Revises: 5d27a0f4b8e1
+Create Date: 2026-10-18 20:14:08.517392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3e5c7b1f24'
+down_revision: Union[str, Sequence[str], None] = '5d27a0f4b8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, tabela, colunas, extras) — todos GIN com gin_trgm_ops
+INDICES = [
+    ('ix_cliente_nome_trgm', 'cliente', ['nome'],
+     {'postgresql_ops': {'nome': 'gin_trgm_ops'}}),
+    ('ix_cliente_cpf_cnpj_digitos_trgm', 'cliente', ['cpf_cnpj_digitos'],
+     {'postgresql_ops': {'cpf_cnpj_digitos': 'gin_trgm_ops'}}),
+    ('ix_cliente_telefone_digitos_trgm', 'cliente', ['telefone_digitos'],
+     {'postgresql_ops': {'telefone_digitos': 'gin_trgm_ops'}}),
+    ('ix_veiculo_placa_trgm', 'veiculo',
+     [sa.text("upper(regexp_replace(placa, '[^0-9A-Za-z]', '', 'g')) gin_trgm_ops")], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Exige permissão de criar extensão (ou que o DBA já a tenha criado)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('cliente', sa.Column('cpf_cnpj_digitos', sa.String(length=20), nullable=True))
+    op.add_column('cliente', sa.Column('telefone_digitos', sa.String(length=20), nullable=True))
+
+    # Carga inicial; daqui em diante o modelo preenche (Cliente._normalizar)
+    op.execute(r"""
+        UPDATE cliente SET
+            cpf_cnpj_digitos = NULLIF(regexp_replace(cpf_cnpj, '\D', '', 'g'), ''),
+            telefone_digitos = NULLIF(regexp_replace(telefone, '\D', '', 'g'), '')
+    """)
+
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, extras in INDICES:
+            op.create_index(nome, tabela, colunas, unique=False, postgresql_using='gin',
+                            postgresql_concurrently=True, if_not_exists=True, **extras)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nome, tabela, _, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
+
+    op.drop_column('cliente', 'telefone_digitos')
+    op.drop_column('cliente', 'cpf_cnpj_digitos')
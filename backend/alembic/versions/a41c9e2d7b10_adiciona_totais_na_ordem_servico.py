@@ -0,0 +1,47 @@
+"""Adiciona totais na ordem_servico
+
+Revision ID: a41c9e2d7b10
+Revises: 37786c972a64
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c9e2d7b10'
+down_revision: Union[str, Sequence[str], None] = '37786c972a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for coluna in ('total_pecas', 'total_servicos', 'total_pago', 'saldo_devedor'):
+        op.add_column('ordem_servico', sa.Column(coluna, sa.Numeric(precision=12, scale=2), server_default='0', nullable=False))
+
+    # Carga inicial a partir dos itens e pagamentos já existentes
+    op.execute("""
+        UPDATE ordem_servico os SET
+            total_pecas = t.pecas,
+            total_servicos = t.servicos,
+            total_pago = t.pago,
+            saldo_devedor = t.pecas + t.servicos - t.pago
+        FROM (
+            SELECT o.id,
+                COALESCE((SELECT SUM(p.quantidade * p.valor_unitario) FROM os_peca p WHERE p.ordem_servico_id = o.id), 0) AS pecas,
+                COALESCE((SELECT SUM(s.quantidade * s.valor_unitario) FROM os_servico s WHERE s.ordem_servico_id = o.id), 0) AS servicos,
+                COALESCE((SELECT SUM(g.valor) FROM pagamento g WHERE g.ordem_servico_id = o.id), 0) AS pago
+            FROM ordem_servico o
+        ) t
+        WHERE os.id = t.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for coluna in ('saldo_devedor', 'total_pago', 'total_servicos', 'total_pecas'):
+        op.drop_column('ordem_servico', coluna)
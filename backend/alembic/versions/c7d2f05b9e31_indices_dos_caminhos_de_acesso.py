@@ -0,0 +1,58 @@
+"""Indices dos caminhos de acesso das rotas
+
+Revision ID: c7d2f05b9e31
+Revises: a41c9e2d7b10
+Create Date: 2026-10-18 10:03:17.552890
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2f05b9e31'
+down_revision: Union[str, Sequence[str], None] = 'a41c9e2d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, tabela, colunas, extras)
+INDICES = [
+    # chaves estrangeiras
+    ('ix_veiculo_cliente_id', 'veiculo', ['cliente_id'], {}),
+    ('ix_ordem_servico_cliente_id', 'ordem_servico', ['cliente_id'], {}),
+    ('ix_ordem_servico_veiculo_id', 'ordem_servico', ['veiculo_id'], {}),
+    ('ix_ordem_servico_mecanico_id', 'ordem_servico', ['mecanico_id'], {}),
+    ('ix_pagamento_ordem_servico_id', 'pagamento', ['ordem_servico_id'], {}),
+    ('ix_os_peca_peca_id', 'os_peca', ['peca_id'], {}),
+    ('ix_os_servico_servico_id', 'os_servico', ['servico_id'], {}),
+    # ordenação/keyset das listagens
+    ('ix_ordem_servico_data_abertura_id', 'ordem_servico', ['data_abertura', 'id'], {}),
+    ('ix_ordem_servico_status_data_abertura_id', 'ordem_servico', ['status', 'data_abertura', 'id'], {}),
+    ('ix_cliente_nome_id', 'cliente', ['nome', 'id'], {}),
+    ('ix_cliente_nome_lower', 'cliente', [sa.text('lower(nome) text_pattern_ops')], {}),
+    ('ix_pagamento_data_pagamento_id', 'pagamento', ['data_pagamento', 'id'], {}),
+    ('ix_despesa_data_vencimento_id', 'despesa', ['data_vencimento', 'id'], {}),
+    ('ix_despesa_categoria_data_vencimento', 'despesa', ['categoria', 'data_vencimento'], {}),
+    # parcial: só as contas ainda não pagas
+    ('ix_despesa_pendente_vencimento', 'despesa', ['data_vencimento'],
+     {'postgresql_where': sa.text("status = 'PENDENTE'")}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY não bloqueia escrita nas tabelas grandes, mas não roda
+    # dentro de transação
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, extras in INDICES:
+            op.create_index(nome, tabela, colunas, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True, **extras)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nome, tabela, _, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
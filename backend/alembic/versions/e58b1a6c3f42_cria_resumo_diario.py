@@ -0,0 +1,49 @@
+"""Cria resumo_diario
+
+Revision ID: e58b1a6c3f42
+Revises: c7d2f05b9e31
+Create Date: 2026-10-18 15:02:11.503817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e58b1a6c3f42'
+down_revision: Union[str, Sequence[str], None] = 'c7d2f05b9e31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('resumo_diario',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('tipo', sa.String(length=10), nullable=False),
+    sa.Column('chave', sa.String(length=50), nullable=False),
+    sa.Column('quantidade', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('valor', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('dia', 'tipo', 'chave')
+    )
+
+    # Carga inicial (o mesmo que `python -m app.cli resumo --reconstruir`)
+    op.execute("""
+        INSERT INTO resumo_diario (dia, tipo, chave, quantidade, valor)
+        SELECT data_pagamento, 'RECEITA', COALESCE(forma_pagamento, ''), COUNT(*), SUM(valor)
+        FROM pagamento
+        GROUP BY data_pagamento, COALESCE(forma_pagamento, '')
+    """)
+    op.execute("""
+        INSERT INTO resumo_diario (dia, tipo, chave, quantidade, valor)
+        SELECT data_vencimento, 'DESPESA', COALESCE(categoria, ''), COUNT(*), SUM(valor)
+        FROM despesa
+        GROUP BY data_vencimento, COALESCE(categoria, '')
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('resumo_diario')
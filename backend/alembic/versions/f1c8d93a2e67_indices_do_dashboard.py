@@ -0,0 +1,41 @@
+"""Índices do dashboard
+
+Revision ID: f1c8d93a2e67
+Revises: e58b1a6c3f42
+Create Date: 2026-10-18 16:21:47.290114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c8d93a2e67'
+down_revision: Union[str, Sequence[str], None] = 'e58b1a6c3f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, tabela, colunas, extras)
+INDICES = [
+    ('ix_ordem_servico_aberta_status', 'ordem_servico', ['status'],
+     {'postgresql_where': sa.text("status <> 'FINALIZADO'")}),
+    ('ix_ordem_servico_data_fechamento', 'ordem_servico', ['data_fechamento'],
+     {'postgresql_where': sa.text("data_fechamento IS NOT NULL")}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, extras in INDICES:
+            op.create_index(nome, tabela, colunas, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True, **extras)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nome, tabela, _, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,128 @@
+"""Busca de clientes e veículos por nome, CPF/CNPJ, telefone ou placa.
+
+Os candidatos vêm de consultas que usam índice, unidas por UNION ALL:
+- termo com 3+ caracteres: trigramas (pg_trgm, índices GIN) para trecho em
+  qualquer posição do nome, dos dígitos do CPF/CNPJ e do telefone e da placa,
+  e semelhança (operador %) no nome, que tolera erro de digitação;
+- termo curto: só prefixo de lower(nome) (ix_cliente_nome_lower), já que o
+  trigrama não filtra nada com menos de 3 caracteres.
+Cada ramo traz no máximo `busca_candidatos` linhas; só elas são pontuadas.
+
+Pontuação: nível do melhor campo (3 igual, 2 começa com, 1 contém, 0 só
+parecido) + similarity() do nome/placa como desempate dentro do nível.
+"""
+from typing import List, NamedTuple, Optional
+from sqlalchemy import Float, case, func, literal, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+from .config import settings
+from .normalizacao import placa_busca, placa_normalizada, so_digitos
+
+MINIMO_TRGM = 3
+TAMANHO_PLACA = 7
+
+C = models.Cliente
+V = models.Veiculo
+
+PLACA = V.placa_normalizada
+
+class Termos(NamedTuple):
+    texto: str
+    digitos: Optional[str]
+    placa: str           # na forma canônica (Mercosul), como a coluna
+    placa_bruta: str     # só sem separadores: acha trecho que a conversão alterou
+
+def termos(q: str) -> Termos:
+    """Dígitos só contam para documento/telefone quando o termo não tem letras;
+    placa só quando cabe numa placa."""
+    q = q.strip()
+    digitos = None if any(c.isalpha() for c in q) else so_digitos(q)
+    bruta = placa_busca(q)
+    if len(bruta) > TAMANHO_PLACA:
+        bruta = ""
+    return Termos(q, digitos, placa_normalizada(bruta), bruta)
+
+def escapar_like(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _nivel(coluna, termo: Optional[str]):
+    if not termo:
+        return literal(0)
+    e = escapar_like(termo)
+    return case((coluna == termo, 3), (coluna.like(f"{e}%"), 2), (coluna.like(f"%{e}%"), 1), else_=0)
+
+def _ramos_cliente(t: Termos) -> list:
+    """Selects de Cliente.id, cada um servido por um índice."""
+    limite = settings.busca_candidatos
+    nome = func.lower(C.nome)
+    if len(t.texto) < MINIMO_TRGM:
+        return [select(C.id).where(nome.like(f"{escapar_like(t.texto.lower())}%")).order_by(nome).limit(limite)]
+
+    ramos = [select(C.id).where(or_(C.nome.ilike(f"%{escapar_like(t.texto)}%"), C.nome.op('%')(t.texto))).limit(limite)]
+    if t.digitos and len(t.digitos) >= MINIMO_TRGM:
+        padrao = f"%{t.digitos}%"
+        ramos.append(select(C.id).where(C.cpf_cnpj_digitos.like(padrao)).limit(limite))
+        ramos.append(select(C.id).where(C.telefone_digitos.like(padrao)).limit(limite))
+    return ramos
+
+def _ramo_placa(t: Termos, coluna):
+    if len(t.placa) < MINIMO_TRGM:
+        return None
+    condicoes = [PLACA.like(f"%{t.placa}%"), PLACA.op('%')(t.placa)]
+    if t.placa_bruta != t.placa:
+        condicoes.append(PLACA.like(f"%{t.placa_bruta}%"))
+    return select(coluna).where(or_(*condicoes)).limit(settings.busca_candidatos)
+
+def _nivel_cliente(t: Termos):
+    return [
+        _nivel(func.lower(C.nome), t.texto.lower()),
+        _nivel(C.cpf_cnpj_digitos, t.digitos),
+        _nivel(C.telefone_digitos, t.digitos),
+    ]
+
+async def buscar_clientes(db: AsyncSession, q: str, limite: int) -> List[models.Cliente]:
+    t = termos(q)
+    if not t.texto:
+        return []
+    ramos = _ramos_cliente(t)
+    niveis = _nivel_cliente(t)
+
+    placa = _ramo_placa(t, V.cliente_id)
+    if placa is not None:
+        ramos.append(placa)
+        # melhor placa entre os veículos do cliente
+        niveis.append(
+            select(func.max(_nivel(PLACA, t.placa))).where(V.cliente_id == C.id).scalar_subquery()
+        )
+
+    pontuacao = func.greatest(*niveis) + func.similarity(C.nome, t.texto).cast(Float)
+    stmt = (
+        select(C)
+        .where(C.id.in_(union_all(*ramos)))
+        .order_by(pontuacao.desc(), C.nome, C.id)
+        .limit(limite)
+    )
+    return list((await db.scalars(stmt)).all())
+
+async def buscar_veiculos(db: AsyncSession, q: str, limite: int) -> List[models.Veiculo]:
+    """Veículos pela placa ou pelo dono (nome, CPF/CNPJ, telefone)."""
+    t = termos(q)
+    if not t.texto:
+        return []
+    ramos = [select(V.id).where(V.cliente_id.in_(union_all(*_ramos_cliente(t))))]
+    placa = _ramo_placa(t, V.id)
+    if placa is not None:
+        ramos.append(placa)
+
+    pontuacao = (
+        func.greatest(_nivel(PLACA, t.placa), *_nivel_cliente(t))
+        + func.greatest(func.similarity(PLACA, t.placa), func.similarity(C.nome, t.texto)).cast(Float)
+    )
+    stmt = (
+        select(V)
+        .join(C, C.id == V.cliente_id)
+        .where(V.id.in_(union_all(*ramos)))
+        .order_by(pontuacao.desc(), V.placa, V.id)
+        .limit(limite)
+    )
+    return list((await db.scalars(stmt)).all())
@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_AUSENTE = object()
+
+class CacheTTL:
+    """Cache em memória do processo, com validade (TTL) e limite de itens.
+
+    Ao passar do limite, descarta os itens menos usados recentemente (LRU).
+    Cada worker do uvicorn tem o seu, então o TTL é o que limita o tempo
+    máximo que um valor pode ficar desatualizado entre workers."""
+
+    def __init__(self, ttl: float, max_itens: int = 1024):
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self._itens: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chave: Hashable, padrao: Any = None) -> Any:
+        with self._lock:
+            item = self._itens.get(chave, _AUSENTE)
+            if item is _AUSENTE:
+                self.misses += 1
+                return padrao
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                self.misses += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def set(self, chave: Hashable, valor: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + (self.ttl if ttl is None else ttl), valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, chave: Hashable):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def invalidar_se(self, condicao: Callable[[Hashable], bool]) -> int:
+        """Remove as chaves que satisfazem `condicao`. Percorre o cache todo:
+        serve para invalidações raras, não para o caminho quente."""
+        with self._lock:
+            remover = [k for k in self._itens if condicao(k)]
+            for k in remover:
+                del self._itens[k]
+            return len(remover)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def estatisticas(self) -> dict:
+        return {"itens": len(self._itens), "max_itens": self.max_itens, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,134 @@
+"""Comandos de manutenção da API.
+
+Uso (a partir da pasta backend):
+    python -m app.cli totais --verificar
+    python -m app.cli totais --corrigir
+    python -m app.cli resumo --reconstruir [--de 2024-01-01] [--ate 2024-12-31]
+    python -m app.cli estoque --compactar
+    python -m app.cli estoque --verificar
+    python -m app.cli importar pecas tabela_fornecedor.csv
+    python -m app.cli tarefas [--executar | --reprocessar [--tipo fechar_os_quitada]]
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+from .database import SessionLocal
+from . import fila, importacao, movimentos, resumo, totais
+from .routers import financeiro  # noqa: F401 (registra as tarefas)
+
+async def cmd_totais(args) -> int:
+    async with SessionLocal() as db:
+        if args.corrigir:
+            atualizadas = await totais.recalcular_totais(db, os_ids=args.os or None, lote=args.lote)
+            print(f"Totais recalculados em {atualizadas} OS")
+            return 0
+
+        divergentes = await totais.verificar_totais(db, limite=args.limite)
+        for d in divergentes:
+            print(
+                f"OS {d['id']}: pecas {d['total_pecas']} != {d['total_pecas_calculado']} | "
+                f"servicos {d['total_servicos']} != {d['total_servicos_calculado']} | "
+                f"pago {d['total_pago']} != {d['total_pago_calculado']} | "
+                f"saldo {d['saldo_devedor']} != {d['saldo_devedor_calculado']}"
+            )
+        print(f"{len(divergentes)} OS com totais divergentes")
+        return 1 if divergentes else 0
+
+async def cmd_resumo(args) -> int:
+    async with SessionLocal() as db:
+        linhas = await resumo.reconstruir(db, data_inicio=args.de, data_fim=args.ate)
+    print(f"resumo_diario reconstruído ({linhas} linhas)")
+    return 0
+
+async def cmd_estoque(args) -> int:
+    async with SessionLocal() as db:
+        if args.compactar:
+            pecas = await movimentos.compactar(db)
+            print(f"Movimentos compactados em {pecas} peças")
+            return 0
+
+        divergentes = await movimentos.verificar(db, limite=args.limite)
+        for d in divergentes:
+            print(f"Peça {d['id']}: snapshot {d['estoque_atual']} != movimentos compactados {d['calculado']}")
+        print(f"{len(divergentes)} peças com snapshot divergente")
+        return 1 if divergentes else 0
+
+async def _ler_em_blocos(caminho: str, tamanho: int = 1 << 16):
+    with open(caminho, "rb") as arquivo:
+        while bloco := arquivo.read(tamanho):
+            yield bloco
+
+async def cmd_importar(args) -> int:
+    formato = args.formato or ("ndjson" if args.arquivo.endswith((".ndjson", ".jsonl")) else "csv")
+    async with SessionLocal() as db:
+        resultado = await importacao.importar(db, args.catalogo, _ler_em_blocos(args.arquivo), formato)
+    for erro in resultado["erros"]:
+        print(f"linha {erro['linha']}: {erro['erro']}")
+    if resultado["erros_omitidos"]:
+        print(f"... mais {resultado['erros_omitidos']} erros")
+    print(f"{resultado['linhas']} linhas: {resultado['inseridos']} inseridos, {resultado['atualizados']} atualizados, "
+          f"{len(resultado['erros']) + resultado['erros_omitidos']} erros")
+    return 1 if resultado["erros"] else 0
+
+async def cmd_tarefas(args) -> int:
+    if args.executar:
+        feitas = await fila.executar_pendentes(SessionLocal)
+        print(f"{feitas} tarefas executadas")
+        return 0
+    async with SessionLocal() as db:
+        if args.reprocessar:
+            n = await fila.reprocessar(db, tipo=args.tipo)
+            print(f"{n} tarefas devolvidas à fila")
+            return 0
+        situacao = await fila.situacao(db)
+    for f in situacao["filas"]:
+        print(f"{f['status']:<9} {f['tipo']:<30} {f['quantidade']:>7}  próxima {f['proxima']}")
+    for f in situacao["falhas"]:
+        print(f"Tarefa {f['id']} ({f['tipo']}, {f['tentativas']} tentativas): {f['erro']}")
+    return 1 if situacao["falhas"] else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_totais = sub.add_parser("totais", help="Verifica ou recalcula os totais persistidos das OS")
+    modo = p_totais.add_mutually_exclusive_group()
+    modo.add_argument("--verificar", action="store_true", help="Lista divergências (padrão)")
+    modo.add_argument("--corrigir", action="store_true", help="Recalcula os totais em lote")
+    p_totais.add_argument("--os", type=int, nargs="*", help="Restringe a estas OS (com --corrigir)")
+    p_totais.add_argument("--lote", type=int, default=5000)
+    p_totais.add_argument("--limite", type=int, default=100, help="Máximo de divergências listadas")
+    p_totais.set_defaults(func=cmd_totais)
+
+    p_resumo = sub.add_parser("resumo", help="Reconstrói o resumo financeiro diário")
+    p_resumo.add_argument("--reconstruir", action="store_true", required=True)
+    p_resumo.add_argument("--de", type=date.fromisoformat, help="Primeiro dia (AAAA-MM-DD)")
+    p_resumo.add_argument("--ate", type=date.fromisoformat, help="Último dia (AAAA-MM-DD)")
+    p_resumo.set_defaults(func=cmd_resumo)
+
+    p_estoque = sub.add_parser("estoque", help="Compacta ou confere os movimentos de estoque")
+    modo = p_estoque.add_mutually_exclusive_group()
+    modo.add_argument("--verificar", action="store_true", help="Confere snapshot x movimentos (padrão)")
+    modo.add_argument("--compactar", action="store_true", help="Soma os movimentos pendentes no snapshot")
+    p_estoque.add_argument("--limite", type=int, default=100, help="Máximo de divergências listadas")
+    p_estoque.set_defaults(func=cmd_estoque)
+
+    p_importar = sub.add_parser("importar", help="Importa peças ou serviços de um CSV/NDJSON")
+    p_importar.add_argument("catalogo", choices=sorted(importacao.CATALOGOS))
+    p_importar.add_argument("arquivo")
+    p_importar.add_argument("--formato", choices=["csv", "ndjson"], help="Padrão: pela extensão do arquivo")
+    p_importar.set_defaults(func=cmd_importar)
+
+    p_tarefas = sub.add_parser("tarefas", help="Situação da fila de tarefas pós-commit")
+    modo = p_tarefas.add_mutually_exclusive_group()
+    modo.add_argument("--executar", action="store_true", help="Executa as pendentes vencidas neste processo")
+    modo.add_argument("--reprocessar", action="store_true", help="Devolve à fila as que esgotaram as tentativas")
+    p_tarefas.add_argument("--tipo", help="Restringe a este tipo (com --reprocessar)")
+    p_tarefas.set_defaults(func=cmd_tarefas)
+
+    args = parser.parse_args(argv)
+    return asyncio.run(args.func(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
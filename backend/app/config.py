@@ -0,0 +1,75 @@
+from pathlib import Path
+from typing import Literal, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    """Configurações lidas das variáveis de ambiente (ou do .env).
+    Os nomes das variáveis são os campos em maiúsculas, ex.: DB_POOL_SIZE=20."""
+    model_config = SettingsConfigDict(env_file=Path(__file__).resolve().parent.parent / ".env", extra="ignore")
+
+    database_url: Optional[str] = None
+
+    # Chave que assina os tokens JWT; sem ela a API não sobe
+    secret_key: Optional[str] = None
+
+    # Pool de conexões
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 10.0        # segundos esperando uma conexão livre
+    db_pool_recycle: int = 1800          # recicla conexões mais velhas que isso (s)
+    db_pool_pre_ping: bool = True        # testa a conexão antes de entregar (failover/restart)
+    db_statement_timeout_ms: int = 30000 # 0 desativa
+
+    # Cache de principais autenticados (get_current_user); alterar/remover um usuário
+    # limpa em todos os workers (canal de referências), o TTL cobre a escuta caída
+    principal_cache_ttl: float = 60.0
+    principal_cache_max: int = 10000
+
+    # Cache do /dashboard (invalidado por escrita em OS, pagamentos e despesas)
+    dashboard_cache_ttl: float = 30.0
+
+    # Cache de referências: serviço, mecânico, nome/preço da peça (ver app/referencias.py)
+    referencias_cache_ttl: float = 300.0
+    referencias_cache_max: int = 5000
+
+    # Compactação dos movimentos de estoque no snapshot da peça (s); 0 desativa
+    estoque_compactar_intervalo: float = 60.0
+
+    # Importação do catálogo (ver app/importacao.py)
+    importacao_lote: int = 5000          # linhas por COPY/upsert/commit
+    importacao_max_erros: int = 1000     # erros detalhados no resultado; o resto só conta
+
+    # Listagens paginadas (X-Total-Count): o count para de contar aqui e o
+    # cabeçalho vem com o limite e X-Total-Capped; 0 = contagem exata
+    listagem_contagem_max: int = 10000
+
+    # Exportações em streaming: linhas buscadas por vez no cursor do servidor
+    exportacao_lote: int = 2000
+
+    # Consulta por placa (/veiculos/placa/{placa}); limpo em escrita de veículo, cliente ou OS
+    placa_cache_ttl: float = 30.0
+    placa_cache_max: int = 2000
+
+    # Busca de clientes/veículos: linhas trazidas por ramo do UNION antes de pontuar
+    busca_candidatos: int = 1000
+
+    # Orçamento de consultas e detector de N+1 (app/rastreio.py): desligado | log | erro
+    consultas_modo: Literal["desligado", "log", "erro"] = "desligado"
+    consultas_orcamento_padrao: int = 0  # comandos SQL por requisição sem @orcamento; 0 = sem limite
+    consultas_repeticoes_max: int = 5    # vezes que o mesmo SELECT pode se repetir na requisição
+
+    # Fila de tarefas pós-commit (ver app/fila.py); 0 workers = este processo só enfileira
+    tarefas_workers: int = 2
+    tarefas_intervalo: float = 1.0       # espera máxima entre buscas na fila (s)
+    tarefas_tentativas: int = 5          # padrão por tarefa, antes de ficar como FALHOU
+    tarefas_backoff: float = 2.0         # atraso da 1ª nova tentativa, dobra a cada falha (s)
+    tarefas_backoff_max: float = 600.0
+    tarefas_timeout: float = 60.0        # duração máxima de uma execução (s)
+
+    # Hash de senhas (bcrypt) — ver app/hashing.py
+    bcrypt_rounds: int = 12              # mudar o custo regrava o hash no próximo login
+    senha_workers: int = 2               # processos dedicados ao bcrypt
+    senha_concorrencia: int = 8          # operações em andamento + na fila do pool
+    senha_fila_timeout: float = 5.0      # espera máxima por vaga antes do 503 (s)
+
+settings = Settings()
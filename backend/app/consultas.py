@@ -0,0 +1,98 @@
+from typing import Optional
+from sqlalchemy import select, func, literal, Numeric
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+
+ZERO = literal(0, Numeric(12, 2))
+
+# Subconsultas correlacionadas: os totais saem do banco já em Numeric,
+# sem passar por float no Python.
+def total_pecas_sql():
+    return (
+        select(func.coalesce(func.sum(models.OSPeca.quantidade * models.OSPeca.valor_unitario), ZERO))
+        .where(models.OSPeca.ordem_servico_id == models.OrdemServico.id)
+        .scalar_subquery()
+    )
+
+def total_servicos_sql():
+    return (
+        select(func.coalesce(func.sum(models.OSServico.quantidade * models.OSServico.valor_unitario), ZERO))
+        .where(models.OSServico.ordem_servico_id == models.OrdemServico.id)
+        .scalar_subquery()
+    )
+
+def total_pago_sql():
+    return (
+        select(func.coalesce(func.sum(models.Pagamento.valor), ZERO))
+        .where(models.Pagamento.ordem_servico_id == models.OrdemServico.id)
+        .scalar_subquery()
+    )
+
+async def carregar_os_detalhada(db: AsyncSession, os_id: int) -> Optional[dict]:
+    """Monta a OS completa em 4 consultas fixas (OS + totais, peças, serviços, pagamentos),
+    independente da quantidade de itens."""
+    linha = (await db.execute(
+        select(
+            models.OrdemServico,
+            total_pecas_sql().label("total_pecas"),
+            total_servicos_sql().label("total_servicos"),
+            total_pago_sql().label("total_pago"),
+        ).where(models.OrdemServico.id == os_id)
+    )).first()
+    if linha is None:
+        return None
+
+    os, total_pecas, total_servicos, total_pago = linha
+    total_geral = total_pecas + total_servicos
+
+    pecas = (await db.execute(
+        select(
+            models.OSPeca.peca_id,
+            models.OSPeca.quantidade,
+            models.OSPeca.valor_unitario,
+            models.Peca.nome.label("nome_peca"),
+            (models.OSPeca.quantidade * models.OSPeca.valor_unitario).label("subtotal"),
+        )
+        .join(models.Peca, models.Peca.id == models.OSPeca.peca_id)
+        .where(models.OSPeca.ordem_servico_id == os_id)
+        .order_by(models.OSPeca.peca_id)
+    )).mappings().all()
+
+    servicos = (await db.execute(
+        select(
+            models.OSServico.servico_id,
+            models.OSServico.quantidade,
+            models.OSServico.valor_unitario,
+            models.Servico.descricao.label("descricao_servico"),
+            (models.OSServico.quantidade * models.OSServico.valor_unitario).label("subtotal"),
+        )
+        .join(models.Servico, models.Servico.id == models.OSServico.servico_id)
+        .where(models.OSServico.ordem_servico_id == os_id)
+        .order_by(models.OSServico.servico_id)
+    )).mappings().all()
+
+    pagamentos = (await db.execute(
+        select(models.Pagamento)
+        .where(models.Pagamento.ordem_servico_id == os_id)
+        .order_by(models.Pagamento.data_pagamento, models.Pagamento.id)
+    )).scalars().all()
+
+    return {
+        "id": os.id,
+        "km_atual": os.km_atual,
+        "defeito_reclamado": os.defeito_reclamado,
+        "data_abertura": os.data_abertura,
+        "status": os.status,
+        "veiculo_id": os.veiculo_id,
+        "mecanico_id": os.mecanico_id,
+
+        "pecas": [dict(p) for p in pecas],
+        "servicos": [dict(s) for s in servicos],
+        "pagamentos": pagamentos,
+
+        "total_pecas": total_pecas,
+        "total_servicos": total_servicos,
+        "total_geral": total_geral,
+        "total_pago": total_pago,
+        "saldo_devedor": total_geral - total_pago,
+    }
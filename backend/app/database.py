@@ -1,25 +1,101 @@
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .config import settings
 
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = settings.database_url
 
 if not DATABASE_URL:
     raise ValueError("A variável DATABASE_URL não foi encontrada no arquivo .env")
 
-engine = create_engine(DATABASE_URL)
+def url_com_driver(url: str, driver: str):
+    """Troca o driver de uma URL postgresql:// (ex.: asyncpg para a API, psycopg2 para o Alembic)."""
+    u = make_url(url)
+    if u.get_backend_name() == "postgresql":
+        u = u.set(drivername=f"postgresql+{driver}")
+    return u
+
+def dsn_asyncpg() -> str:
+    """DSN no formato do asyncpg puro (sem o +driver do SQLAlchemy), para conexões fora do pool."""
+    return url_com_driver(DATABASE_URL, "asyncpg").set(drivername="postgresql").render_as_string(hide_password=False)
+
+class EstatisticasPool:
+    """Contadores acumulados de checkout do pool (expostos em /admin/pool)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def registrar(self, espera: float, timeout: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total += espera
+            if espera > self.espera_max:
+                self.espera_max = espera
+            if timeout:
+                self.timeouts += 1
+
+estatisticas_pool = EstatisticasPool()
+
+class PoolMonitorado(AsyncAdaptedQueuePool):
+    """Pool padrão do engine async, medindo quanto cada checkout esperou por uma conexão."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except exc.TimeoutError:
+            estatisticas_pool.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        estatisticas_pool.registrar(time.perf_counter() - inicio)
+        return conexao
+
+_url = url_com_driver(DATABASE_URL, "asyncpg")
+_connect_args = {}
+if _url.get_backend_name() == "postgresql" and settings.db_statement_timeout_ms:
+    _connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+
+# As rotas são async def: o engine usa asyncpg e as requisições esperam
+# pelo banco no event loop, não numa fila do threadpool.
+engine = create_async_engine(
+    _url,
+    poolclass=PoolMonitorado,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    connect_args=_connect_args,
+)
 
 # SessionLocal será usada para criar uma sessão de banco para cada requisição da API.
-# autocommit=False: Garante que só salvamos se dermos 'commit' explícito (segurança).
 # autoflush=False: Evita que o SQLAlchemy mande dados pro banco antes da hora.
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: os objetos continuam legíveis depois do commit
+# (em async não existe lazy load implícito para recarregá-los).
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+def status_pool() -> dict:
+    pool = engine.pool
+    est = estatisticas_pool
+    return {
+        "tamanho": pool.size(),
+        "max_overflow": settings.db_max_overflow,
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        "overflow_em_uso": max(pool.overflow(), 0),
+        "timeout_s": settings.db_pool_timeout,
+        "checkouts": est.checkouts,
+        "timeouts": est.timeouts,
+        "espera_media_ms": round(est.espera_total / est.checkouts * 1000, 3) if est.checkouts else 0.0,
+        "espera_max_ms": round(est.espera_max * 1000, 3),
+    }
@@ -0,0 +1,64 @@
+"""Exportação em streaming (CSV ou NDJSON) para as rotas /exportar.
+
+A consulta roda num cursor do servidor (stream + yield_per) e cada bloco de
+linhas é convertido e enviado antes do próximo ser lido: a memória não
+cresce com o tamanho do período exportado.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Literal
+from fastapi.responses import StreamingResponse
+from .config import settings
+from .database import SessionLocal
+
+Formato = Literal["csv", "ndjson"]
+
+_MIDIA = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+def _json_padrao(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+def _csv(linhas) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(linhas)
+    return buffer.getvalue()
+
+async def _gerar(stmt, formato: Formato) -> AsyncIterator[bytes]:
+    # Sessão própria: a do Depends(get_db) pode ser fechada antes do fim do streaming
+    async with SessionLocal() as db:
+        resultado = await db.stream(stmt.execution_options(yield_per=settings.exportacao_lote))
+        colunas = list(resultado.keys())
+        if formato == "csv":
+            yield ("﻿" + _csv([colunas])).encode()  # BOM: o Excel abre o UTF-8 certo
+
+        async for bloco in resultado.partitions():
+            if formato == "csv":
+                yield _csv(bloco).encode()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(colunas, linha)), default=_json_padrao, ensure_ascii=False) + "\n"
+                    for linha in bloco
+                ).encode()
+
+def resposta(stmt, formato: Formato, nome: str) -> StreamingResponse:
+    """StreamingResponse com o resultado de `stmt` (um select de colunas, não de entidades)."""
+    return StreamingResponse(
+        _gerar(stmt, formato),
+        media_type=_MIDIA[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}.{formato}"'},
+    )
+
+def nome_arquivo(base: str, data_inicio=None, data_fim=None) -> str:
+    partes = [base]
+    if data_inicio:
+        partes.append(str(data_inicio))
+    if data_fim:
+        partes.append(str(data_fim))
+    return "_".join(partes)
@@ -0,0 +1,211 @@
+"""Fila durável de tarefas pós-commit, na tabela `tarefa`.
+
+- enfileirar(db, tipo, **dados) só adiciona a linha à sessão da rota: a
+  tarefa existe se, e somente se, a transação da rota fizer commit. Depois
+  do commit os workers deste processo são acordados (os dos outros
+  processos a encontram na próxima busca, a cada TAREFAS_INTERVALO).
+- Workers: tasks asyncio iniciadas no lifespan (iniciar()). Cada um
+  reserva a próxima pendente (FOR UPDATE SKIP LOCKED) numa transação curta
+  que já grava a tentativa e adia a tarefa pelo atraso exponencial. Depois
+  executa numa transação própria, com a linha travada: deu certo, a linha é
+  apagada no mesmo commit do trabalho da tarefa. Falhou: o trabalho é
+  desfeito e o erro é gravado numa terceira transação; ao esgotar as
+  tentativas fica como FALHOU (python -m app.cli tarefas --reprocessar).
+- Como a tentativa é gravada antes de executar, nem um rollback que falha
+  (timeout no meio de um comando) nem o processo caindo fazem a tarefa
+  voltar na hora: ela roda de novo depois do atraso.
+
+As funções de tarefa (@tarefa("tipo")) recebem a sessão e os dados,
+não fazem commit e devem poder rodar de novo (conferem o estado atual no
+banco em vez de confiar no que valia ao enfileirar). Os dados vão em JSON:
+ids e textos, não objetos.
+"""
+import asyncio
+import random
+import time
+import traceback
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from . import models
+from .config import settings
+from .metricas import Contador, Histograma
+
+PENDENTE = "PENDENTE"
+FALHOU = "FALHOU"
+
+T = models.Tarefa
+
+executadas = Contador("tarefas_executadas_total", "Tarefas executadas pelos workers", ["tipo", "resultado"])
+duracao = Histograma("tarefa_duracao_segundos", "Duração de cada execução de tarefa", ["tipo"])
+
+_tipos: Dict[str, Callable[..., Awaitable]] = {}
+_acordar = asyncio.Event()
+
+def tarefa(tipo: str):
+    """Registra a função que executa as tarefas de `tipo`."""
+    def registrar(funcao):
+        if tipo in _tipos:
+            raise ValueError(f"Tarefa já registrada: {tipo}")
+        _tipos[tipo] = funcao
+        return funcao
+    return registrar
+
+def enfileirar(db: AsyncSession, tipo: str, *, atraso: float = 0, tentativas: int = 0, **dados) -> models.Tarefa:
+    if tipo not in _tipos:
+        raise ValueError(f"Tarefa desconhecida: {tipo}")
+    nova = T(tipo=tipo, dados=dados, max_tentativas=tentativas or settings.tarefas_tentativas)
+    if atraso:
+        nova.executar_em = func.now() + timedelta(seconds=atraso)
+    db.add(nova)
+    return nova
+
+@event.listens_for(Session, "after_flush")
+def _marcar_nova(sessao, contexto):
+    if any(isinstance(obj, T) for obj in sessao.new):
+        sessao.info["tarefas_novas"] = True
+
+@event.listens_for(Session, "after_commit")
+def _acordar_apos_commit(sessao):
+    if sessao.info.pop("tarefas_novas", False):
+        _acordar.set()
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_marca(sessao):
+    sessao.info.pop("tarefas_novas", None)
+
+def atraso_nova_tentativa(tentativa: int) -> float:
+    """TAREFAS_BACKOFF * 2^(tentativa-1), limitado, com ±20% para espalhar as repetições."""
+    atraso = min(settings.tarefas_backoff * 2 ** (tentativa - 1), settings.tarefas_backoff_max)
+    return atraso * random.uniform(0.8, 1.2)
+
+async def _reservar(sessoes):
+    """Pega a próxima tarefa vencida e grava a tentativa e o atraso da próxima.
+    Devolve (id, tipo, dados, tentativa, max_tentativas) ou None com a fila vazia."""
+    async with sessoes() as db:
+        atual = await db.scalar(
+            select(T)
+            .where(T.status == PENDENTE, T.executar_em <= func.now())
+            .order_by(T.executar_em, T.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if atual is None:
+            await db.rollback()
+            return None
+        reserva = (atual.id, atual.tipo, atual.dados, atual.tentativas + 1, atual.max_tentativas)
+        if reserva[3] > atual.max_tentativas:
+            # a falha da última tentativa não chegou a ser gravada
+            atual.status = FALHOU
+        else:
+            atual.tentativas = reserva[3]
+            atual.executar_em = func.now() + timedelta(seconds=atraso_nova_tentativa(reserva[3]))
+        await db.commit()
+        return reserva
+
+async def executar_uma(sessoes) -> bool:
+    """Executa a próxima tarefa vencida, se houver. Devolve False com a fila vazia."""
+    reserva = await _reservar(sessoes)
+    if reserva is None:
+        return False
+    tarefa_id, tipo, dados, tentativa, max_tentativas = reserva
+    if tentativa > max_tentativas:
+        executadas.inc(tipo=tipo, resultado="falhou")
+        return True
+
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        async with sessoes() as db:
+            try:
+                # SKIP LOCKED e a tentativa na condição: se o atraso venceu e
+                # outro worker já reservou de novo, a execução é dele
+                atual = await db.scalar(
+                    select(T).where(T.id == tarefa_id, T.tentativas == tentativa)
+                    .with_for_update(skip_locked=True)
+                )
+                if atual is None:
+                    await db.rollback()
+                    return True
+                funcao = _tipos.get(tipo)
+                if funcao is None:
+                    raise LookupError(f"Tarefa sem função registrada: {tipo}")
+                await asyncio.wait_for(funcao(db, **dados), settings.tarefas_timeout)
+                await db.delete(atual)
+                await db.commit()
+            except Exception as e:
+                erro = e
+                await db.rollback()
+    except Exception as e:
+        # rollback/fechamento falhou (ex.: timeout no meio de um comando): a
+        # conexão é descartada; a tentativa e o atraso já estão gravados
+        erro = erro or e
+
+    if erro is None:
+        resultado = "ok"
+    else:
+        esgotou = tentativa >= max_tentativas
+        resultado = "falhou" if esgotou else "repetir"
+        print(f"Tarefa {tarefa_id} ({tipo}) falhou na tentativa {tentativa}/{max_tentativas}: {erro}")
+        valores = {"erro": "".join(traceback.format_exception_only(erro)).strip()[:2000]}
+        if esgotou:
+            valores["status"] = FALHOU
+        async with sessoes() as db:
+            await db.execute(update(T).where(T.id == tarefa_id, T.tentativas == tentativa).values(**valores))
+            await db.commit()
+
+    duracao.observar(time.perf_counter() - inicio, tipo=tipo)
+    executadas.inc(tipo=tipo, resultado=resultado)
+    return True
+
+async def executar_pendentes(sessoes, limite: int = 0) -> int:
+    """Esvazia a fila (as vencidas) no processo atual; usado pelo CLI."""
+    feitas = 0
+    while (not limite or feitas < limite) and await executar_uma(sessoes):
+        feitas += 1
+    return feitas
+
+async def _trabalhador(sessoes):
+    while True:
+        try:
+            await executar_pendentes(sessoes)
+        except Exception as e:
+            # banco fora do ar etc.: tenta de novo no próximo ciclo
+            print(f"Falha no worker de tarefas: {e}")
+        try:
+            await asyncio.wait_for(_acordar.wait(), settings.tarefas_intervalo)
+        except asyncio.TimeoutError:
+            pass
+        _acordar.clear()
+
+def iniciar(sessoes, workers: int) -> List[asyncio.Task]:
+    """Tasks dos workers, para o lifespan cancelar no desligamento: a tarefa
+    em execução é desfeita com a transação e volta depois do atraso."""
+    return [asyncio.create_task(_trabalhador(sessoes)) for _ in range(workers)]
+
+async def situacao(db: AsyncSession, falhas: int = 20) -> dict:
+    por_tipo = (await db.execute(
+        select(T.status, T.tipo, func.count(), func.min(T.executar_em)).group_by(T.status, T.tipo)
+    )).all()
+    ultimas = (await db.execute(
+        select(T.id, T.tipo, T.dados, T.tentativas, T.erro, T.criado_em)
+        .where(T.status == FALHOU).order_by(T.id.desc()).limit(falhas)
+    )).mappings().all()
+    return {
+        "filas": [
+            {"status": status, "tipo": tipo, "quantidade": n, "proxima": proxima}
+            for status, tipo, n, proxima in por_tipo
+        ],
+        "falhas": [dict(f) for f in ultimas],
+    }
+
+async def reprocessar(db: AsyncSession, tipo: str = None) -> int:
+    """Devolve à fila as tarefas que esgotaram as tentativas."""
+    stmt = update(T).where(T.status == FALHOU).values(status=PENDENTE, tentativas=0, executar_em=func.now())
+    if tipo:
+        stmt = stmt.where(T.tipo == tipo)
+    resultado = await db.execute(stmt)
+    await db.commit()
+    return resultado.rowcount
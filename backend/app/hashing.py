@@ -0,0 +1,95 @@
+"""Hash e verificação de senhas (bcrypt) num pool de processos dedicado.
+
+O bcrypt é CPU pesado de propósito. Rodando no threadpool/event loop da API,
+uma leva de logins na troca de turno atrasa todas as outras requisições.
+Aqui ele roda em processos próprios, com limite de concorrência e tempo
+máximo de fila: passando disso o login recebe 503 em vez de empilhar.
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+from .config import settings
+from .metricas import Contador, Histograma
+
+class HashingSobrecarregado(Exception):
+    """A fila de hashing passou do tempo máximo de espera."""
+
+@lru_cache(maxsize=4)
+def contexto(rounds: int) -> CryptContext:
+    # min = max = rounds: hashes com qualquer outro custo precisam de rehash
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+# Executadas dentro dos processos do pool (precisam ser funções de módulo)
+def _verificar(senha: str, hash_atual: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return contexto(rounds).verify_and_update(senha, hash_atual)
+
+def _gerar(senha: str, rounds: int) -> str:
+    return contexto(rounds).hash(senha)
+
+espera_fila = Histograma("hashing_espera_fila_segundos", "Tempo aguardando vaga no pool de hashing", ["operacao"])
+duracao_hash = Histograma("hashing_duracao_segundos", "Tempo de execução do bcrypt no pool", ["operacao"])
+rejeicoes = Contador("hashing_rejeicoes_total", "Operações recusadas por fila cheia", ["operacao"])
+
+_executor: Optional[ProcessPoolExecutor] = None
+_semaforo: Optional[asyncio.Semaphore] = None
+_semaforo_loop = None
+
+def _limite() -> asyncio.Semaphore:
+    # Um semáforo por event loop (o loop do uvicorn; em testes pode haver outros)
+    global _semaforo, _semaforo_loop
+    loop = asyncio.get_running_loop()
+    if _semaforo is None or _semaforo_loop is not loop:
+        _semaforo, _semaforo_loop = asyncio.Semaphore(settings.senha_concorrencia), loop
+    return _semaforo
+
+def iniciar():
+    global _executor
+    if _executor is None:
+        # spawn: não herda threads/conexões do processo da API
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.senha_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+def encerrar():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _executar(operacao: str, funcao, *args):
+    semaforo = _limite()
+    inicio = time.perf_counter()
+    try:
+        await asyncio.wait_for(semaforo.acquire(), timeout=settings.senha_fila_timeout)
+    except asyncio.TimeoutError:
+        rejeicoes.inc(operacao=operacao)
+        raise HashingSobrecarregado()
+    espera_fila.observar(time.perf_counter() - inicio, operacao=operacao)
+
+    try:
+        iniciar()
+        inicio = time.perf_counter()
+        resultado = await asyncio.get_running_loop().run_in_executor(_executor, funcao, *args)
+        duracao_hash.observar(time.perf_counter() - inicio, operacao=operacao)
+        return resultado
+    finally:
+        semaforo.release()
+
+async def verificar_senha(senha: str, hash_atual: str) -> Tuple[bool, Optional[str]]:
+    """Retorna (senha_ok, novo_hash). novo_hash vem preenchido quando o hash
+    salvo usa um custo diferente de BCRYPT_ROUNDS e deve ser regravado."""
+    return await _executar("verificar", _verificar, senha, hash_atual, settings.bcrypt_rounds)
+
+async def gerar_hash(senha: str) -> str:
+    return await _executar("gerar", _gerar, senha, settings.bcrypt_rounds)
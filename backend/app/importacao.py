@@ -0,0 +1,259 @@
+"""Importação em massa do catálogo (peças e serviços) a partir de CSV ou NDJSON.
+
+O arquivo é lido em streaming, linha a linha, e validado com os mesmos
+schemas das rotas de cadastro (PecaCreate/ServicoCreate). As linhas válidas
+vão em lotes para uma tabela temporária via COPY (asyncpg) e de lá para a
+tabela final num único INSERT ... SELECT com upsert, um commit por lote.
+Linhas inválidas viram erros no resultado, sem interromper a carga.
+
+Limitação do CSV: um registro por linha (campos com quebra de linha não são
+suportados). O separador (',' ou ';') é detectado pelo cabeçalho; com ';'
+os números podem vir com vírgula decimal.
+"""
+import codecs
+import csv
+import json
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Numeric, String, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, schemas, referencias, versoes
+from .config import settings
+
+@dataclass(frozen=True)
+class Catalogo:
+    schema: Type[BaseModel]
+    modelo: type
+    chave: str           # coluna que identifica a linha no upsert
+    colunas: Tuple[str, ...]
+    tipos_sql: Tuple[str, ...]
+    sql_upsert: str      # lê de _importacao e devolve (inseridos, atualizados)
+
+# Peças: upsert pelo código (único). Estoque só vale para peças novas, como
+# movimento inicial já compactado; numa peça existente a lista só atualiza
+# nome e preço (o estoque dela segue o livro de movimentos).
+_PECAS = Catalogo(
+    schema=schemas.PecaCreate,
+    modelo=models.Peca,
+    chave="codigo",
+    colunas=("codigo", "nome", "valor_venda", "estoque_atual"),
+    tipos_sql=("text", "text", "numeric", "integer"),
+    sql_upsert="""
+        WITH gravadas AS (
+            INSERT INTO peca (codigo, nome, valor_venda, estoque_atual)
+            SELECT codigo, nome, valor_venda, estoque_atual FROM _importacao
+            ON CONFLICT (codigo) DO UPDATE
+                SET nome = EXCLUDED.nome, valor_venda = EXCLUDED.valor_venda
+            RETURNING id, estoque_atual, (xmax = 0) AS inserida
+        ), iniciais AS (
+            INSERT INTO movimento_estoque (peca_id, tipo, quantidade, observacao, compactado)
+            SELECT id, 'ENTRADA', estoque_atual, 'Estoque inicial (importação)', true
+            FROM gravadas
+            WHERE inserida AND estoque_atual <> 0
+        )
+        SELECT count(*) FILTER (WHERE inserida), count(*) FILTER (WHERE NOT inserida) FROM gravadas
+    """,
+)
+
+# Serviços não têm chave única: casa pela descrição (UPDATE + INSERT dos que faltam)
+_SERVICOS = Catalogo(
+    schema=schemas.ServicoCreate,
+    modelo=models.Servico,
+    chave="descricao",
+    colunas=("descricao", "valor_mao_obra", "tempo_estimado_minutos"),
+    tipos_sql=("text", "numeric", "integer"),
+    sql_upsert="""
+        WITH atualizados AS (
+            UPDATE servico s
+            SET valor_mao_obra = i.valor_mao_obra, tempo_estimado_minutos = i.tempo_estimado_minutos
+            FROM _importacao i
+            WHERE s.descricao = i.descricao
+            RETURNING s.descricao
+        ), inseridos AS (
+            INSERT INTO servico (descricao, valor_mao_obra, tempo_estimado_minutos)
+            SELECT descricao, valor_mao_obra, tempo_estimado_minutos FROM _importacao i
+            WHERE NOT EXISTS (SELECT 1 FROM servico s WHERE s.descricao = i.descricao)
+            RETURNING id
+        )
+        SELECT (SELECT count(*) FROM inseridos), (SELECT count(DISTINCT descricao) FROM atualizados)
+    """,
+)
+
+CATALOGOS: Dict[str, Catalogo] = {"pecas": _PECAS, "servicos": _SERVICOS}
+
+class ResultadoImportacao:
+    def __init__(self, max_erros: int):
+        self.max_erros = max_erros
+        self.linhas = 0
+        self.inseridos = 0
+        self.atualizados = 0
+        self.erros: List[dict] = []
+        self.erros_omitidos = 0
+
+    def erro(self, linha, mensagem: str):
+        if len(self.erros) < self.max_erros:
+            self.erros.append({"linha": linha, "erro": mensagem})
+        else:
+            self.erros_omitidos += 1
+
+    def como_dict(self) -> dict:
+        return {
+            "linhas": self.linhas,
+            "inseridos": self.inseridos,
+            "atualizados": self.atualizados,
+            "erros": self.erros,
+            "erros_omitidos": self.erros_omitidos,
+        }
+
+def formato_do_content_type(content_type: Optional[str]) -> str:
+    if content_type and ("ndjson" in content_type or "jsonl" in content_type or "json" in content_type):
+        return "ndjson"
+    return "csv"
+
+async def _linhas(blocos: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Bytes em streaming -> linhas de texto (UTF-8, com ou sem BOM)."""
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    resto = ""
+    async for bloco in blocos:
+        partes = (resto + decodificador.decode(bloco)).split("\n")
+        resto = partes.pop()
+        for parte in partes:
+            yield parte.rstrip("\r")
+    resto += decodificador.decode(b"", final=True)
+    if resto:
+        yield resto.rstrip("\r")
+
+def _campos_decimais(schema: Type[BaseModel]) -> set:
+    return {nome for nome, campo in schema.model_fields.items() if campo.annotation is float}
+
+async def registros(blocos: AsyncIterator[bytes], formato: str, schema: Type[BaseModel]) -> AsyncIterator[Tuple[int, object]]:
+    """Gera (número da linha, dict) ou (número da linha, mensagem de erro de leitura)."""
+    numero = 0
+    if formato == "ndjson":
+        async for linha in _linhas(blocos):
+            numero += 1
+            if not linha.strip():
+                continue
+            try:
+                dado = json.loads(linha)
+            except ValueError as e:
+                yield numero, f"JSON inválido: {e}"
+                continue
+            yield numero, dado if isinstance(dado, dict) else "Cada linha deve ser um objeto JSON"
+        return
+
+    cabecalho, separador = None, ","
+    decimais = _campos_decimais(schema)
+    async for linha in _linhas(blocos):
+        numero += 1
+        if not linha.strip():
+            continue
+        if cabecalho is None:
+            separador = ";" if linha.count(";") > linha.count(",") else ","
+            cabecalho = [c.strip() for c in next(csv.reader([linha], delimiter=separador))]
+            continue
+        valores = next(csv.reader([linha], delimiter=separador))
+        if len(valores) != len(cabecalho):
+            yield numero, f"Esperadas {len(cabecalho)} colunas, encontradas {len(valores)}"
+            continue
+        dado = {c: v.strip() for c, v in zip(cabecalho, valores) if c}
+        if separador == ";":
+            for campo in decimais & dado.keys():
+                if "," in dado[campo]:
+                    dado[campo] = dado[campo].replace(".", "").replace(",", ".")
+        yield numero, dado
+
+def _limites(catalogo: Catalogo) -> Dict[str, object]:
+    """Tamanho máximo dos textos e dos números, tirados das colunas do modelo:
+    um valor fora disso derrubaria o lote todo no banco."""
+    limites = {}
+    for nome in catalogo.colunas:
+        tipo = catalogo.modelo.__table__.c[nome].type
+        if isinstance(tipo, String) and tipo.length:
+            limites[nome] = tipo.length
+        elif isinstance(tipo, Numeric) and tipo.precision:
+            limites[nome] = Decimal(10) ** (tipo.precision - (tipo.scale or 0))
+    return limites
+
+def _validar(catalogo: Catalogo, dado: dict, limites: Dict[str, object]) -> tuple:
+    item = catalogo.schema.model_validate(dado)
+    valores = []
+    for nome in catalogo.colunas:
+        valor = getattr(item, nome)
+        limite = limites.get(nome)
+        if isinstance(valor, str):
+            if not valor.strip():
+                raise ValueError(f"{nome}: obrigatório")
+            if limite and len(valor) > limite:
+                raise ValueError(f"{nome}: máximo de {limite} caracteres")
+        elif isinstance(valor, float):
+            valor = Decimal(str(valor)).quantize(Decimal("0.01"))
+            if limite and abs(valor) >= limite:
+                raise ValueError(f"{nome}: valor fora do limite")
+        valores.append(valor)
+    return tuple(valores)
+
+async def _gravar_lote(db: AsyncSession, catalogo: Catalogo, lote: Dict[str, tuple]):
+    conexao = await db.connection()
+    bruta = await conexao.get_raw_connection()
+    colunas_sql = ", ".join(f"{c} {t}" for c, t in zip(catalogo.colunas, catalogo.tipos_sql))
+    await conexao.execute(text(f"CREATE TEMP TABLE _importacao ({colunas_sql}) ON COMMIT DROP"))
+    await bruta.driver_connection.copy_records_to_table(
+        "_importacao", records=list(lote.values()), columns=list(catalogo.colunas)
+    )
+    inseridos, atualizados = (await conexao.execute(text(catalogo.sql_upsert))).one()
+    await versoes.incrementar(db, catalogo.modelo.__tablename__)
+    await referencias.notificar(db, catalogo.modelo.__tablename__)
+    await db.commit()
+    return inseridos, atualizados
+
+async def importar(db: AsyncSession, tipo: str, blocos: AsyncIterator[bytes], formato: str) -> dict:
+    catalogo = CATALOGOS[tipo]
+    limites = _limites(catalogo)
+    posicao_chave = catalogo.colunas.index(catalogo.chave)
+    resultado = ResultadoImportacao(settings.importacao_max_erros)
+
+    # chave -> valores; a mesma chave repetida no lote fica com a última linha
+    lote: Dict[str, tuple] = {}
+    linhas_lote: Dict[str, int] = {}
+
+    async def descarregar():
+        if not lote:
+            return
+        primeira, ultima = min(linhas_lote.values()), max(linhas_lote.values())
+        try:
+            inseridos, atualizados = await _gravar_lote(db, catalogo, lote)
+            resultado.inseridos += inseridos
+            resultado.atualizados += atualizados
+        except Exception as e:
+            await db.rollback()
+            resultado.erro(f"{primeira}-{ultima}", f"Lote não gravado: {e}")
+        lote.clear()
+        linhas_lote.clear()
+
+    async for numero, dado in registros(blocos, formato, catalogo.schema):
+        resultado.linhas += 1
+        if isinstance(dado, str):
+            resultado.erro(numero, dado)
+            continue
+        try:
+            valores = _validar(catalogo, dado, limites)
+        except ValidationError as e:
+            resultado.erro(numero, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        except ValueError as e:
+            resultado.erro(numero, str(e))
+            continue
+
+        chave = valores[posicao_chave]
+        if chave in linhas_lote:
+            resultado.erro(linhas_lote[chave], f"{catalogo.chave} repetido na linha {numero} (vale a última)")
+        lote[chave] = valores
+        linhas_lote[chave] = numero
+        if len(lote) >= settings.importacao_lote:
+            await descarregar()
+
+    await descarregar()
+    return resultado.como_dict()
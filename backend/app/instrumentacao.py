@@ -0,0 +1,102 @@
+"""Instrumentação das requisições HTTP e das consultas SQL (ver app/metricas.py).
+
+- MiddlewareMetricas: middleware ASGI puro (sem BaseHTTPMiddleware, que
+  custa uma task por requisição). Mede latência por rota, status e
+  requisições em andamento. A rota é o template (/os/{os_id}), não a URL,
+  para não explodir a cardinalidade das séries.
+- Eventos do engine (before/after_cursor_execute): contam e cronometram
+  cada comando SQL. A requisição corrente fica num ContextVar, e o
+  SQLAlchemy repassa o contexto para o greenlet que executa a consulta,
+  então cada comando é somado à requisição que o emitiu.
+"""
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from .database import engine, estatisticas_pool
+from .metricas import Contador, Histograma, Medidor
+
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+requisicoes = Contador("http_requisicoes_total", "Requisições atendidas", ["metodo", "rota", "status"])
+latencia = Histograma("http_requisicao_duracao_segundos", "Latência das requisições", ["metodo", "rota"])
+em_andamento = Medidor("http_requisicoes_em_andamento", "Requisições em andamento neste worker")
+consultas_requisicao = Histograma(
+    "http_sql_consultas_por_requisicao", "Comandos SQL emitidos por requisição", ["rota"], buckets=BUCKETS_CONSULTAS
+)
+tempo_sql_requisicao = Histograma("http_sql_duracao_segundos", "Tempo total em SQL por requisição", ["rota"])
+
+sql_duracao = Histograma("sql_duracao_segundos", "Duração de cada comando SQL", ["operacao"])
+sql_erros = Contador("sql_erros_total", "Comandos SQL que falharam", ["operacao"])
+
+Medidor("db_pool_em_uso", "Conexões do pool em uso", funcao=lambda: engine.pool.checkedout())
+Contador("db_pool_checkouts_total", "Checkouts do pool", funcao=lambda: estatisticas_pool.checkouts)
+Contador("db_pool_timeouts_total", "Checkouts que estouraram o timeout", funcao=lambda: estatisticas_pool.timeouts)
+
+SEM_ROTA = "<sem rota>"
+
+class MedicaoRequisicao:
+    __slots__ = ("consultas", "tempo_sql")
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_sql = 0.0
+
+medicao_atual: ContextVar[Optional[MedicaoRequisicao]] = ContextVar("medicao_atual", default=None)
+
+def _operacao(sql: str) -> str:
+    palavra = sql.lstrip()[:6].upper()
+    return palavra if palavra in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OUTRO"
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    context._inicio_metricas = time.perf_counter()
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _depois(conn, cursor, statement, parameters, context, executemany):
+    duracao = time.perf_counter() - context._inicio_metricas
+    sql_duracao.observar(duracao, operacao=_operacao(statement))
+    medicao = medicao_atual.get()
+    if medicao is not None:
+        medicao.consultas += 1
+        medicao.tempo_sql += duracao
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _erro(contexto):
+    if contexto.statement:
+        sql_erros.inc(operacao=_operacao(contexto.statement))
+
+class MiddlewareMetricas:
+    def __init__(self, app, ignorar=("/metrics",)):
+        self.app = app
+        self.ignorar = set(ignorar)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.ignorar:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        medicao = MedicaoRequisicao()
+        token = medicao_atual.set(medicao)
+        em_andamento.inc()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            em_andamento.dec()
+            medicao_atual.reset(token)
+            # o roteador grava a rota encontrada no próprio scope
+            rota = getattr(scope.get("route"), "path", SEM_ROTA)
+            metodo = scope["method"]
+            requisicoes.inc(metodo=metodo, rota=rota, status=str(status))
+            latencia.observar(duracao, metodo=metodo, rota=rota)
+            consultas_requisicao.observar(medicao.consultas, rota=rota)
+            tempo_sql_requisicao.observar(medicao.tempo_sql, rota=rota)
@@ -1,8 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import clientes, veiculos, mecanicos, os, estoque, financeiro, auth
+from fastapi.responses import PlainTextResponse
+from .routers import clientes, veiculos, mecanicos, os, estoque, financeiro, auth, admin, dashboard
+from .paginacao import HEADER_PROXIMO_CURSOR, HEADER_TOTAL, HEADER_TOTAL_LIMITADO
+from . import fila, hashing, metricas, movimentos, rastreio, referencias
+from .config import settings
+from .database import SessionLocal, engine, dsn_asyncpg
+from .instrumentacao import MiddlewareMetricas
 
-app = FastAPI(title="Gestão de Oficina API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    hashing.iniciar()
+    tarefas = []
+    if engine.dialect.name == "postgresql":
+        # invalidação do cache de referências entre workers (LISTEN/NOTIFY)
+        tarefas.append(asyncio.create_task(referencias.escutar(dsn_asyncpg())))
+    if settings.estoque_compactar_intervalo > 0:
+        tarefas.append(asyncio.create_task(
+            movimentos.compactar_periodicamente(SessionLocal, settings.estoque_compactar_intervalo)
+        ))
+    if settings.tarefas_workers > 0:
+        tarefas.extend(fila.iniciar(SessionLocal, settings.tarefas_workers))
+    yield
+    for tarefa in tarefas:
+        tarefa.cancel()
+    # espera os cancelamentos: a transação em curso é desfeita antes de o loop fechar
+    await asyncio.gather(*tarefas, return_exceptions=True)
+    hashing.encerrar()
+
+app = FastAPI(title="Gestão de Oficina API", lifespan=lifespan)
 
 origins = ["http://localhost:5173", "http://localhost:3000"]
 
@@ -12,7 +40,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[HEADER_PROXIMO_CURSOR, HEADER_TOTAL, HEADER_TOTAL_LIMITADO, "ETag"],
 )
+if settings.consultas_modo != "desligado":
+    # dev/testes: orçamento de consultas por rota e detector de N+1
+    app.add_middleware(rastreio.MiddlewareConsultas)
+# Por último = mais externo: mede também o tempo dos outros middlewares
+app.add_middleware(MiddlewareMetricas)
 
 # Registra as rotas
 app.include_router(clientes.router)
@@ -22,7 +56,14 @@ app.include_router(os.router)
 app.include_router(estoque.router)
 app.include_router(financeiro.router)
 app.include_router(auth.router)
+app.include_router(admin.router)
+app.include_router(dashboard.router)
 
 @app.get("/")
 def root():
-    return {"status": "Sistema Operacional", "version": "1.0.0"}
\ No newline at end of file
+    return {"status": "Sistema Operacional", "version": "1.0.0"}
+
+@app.get("/metrics", include_in_schema=False)
+def exportar_metricas():
+    # Formato texto do Prometheus; sem autenticação, deixar acessível só na rede interna
+    return PlainTextResponse(metricas.texto_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
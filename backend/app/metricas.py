@@ -0,0 +1,140 @@
+"""Métricas em memória do processo (contadores, medidores e histogramas) e a
+saída no formato texto do Prometheus, servida em /metrics.
+
+Toda métrica criada entra no registro do módulo. Cada worker do uvicorn tem
+as suas: o Prometheus deve coletar cada worker (ou somar por instância).
+"""
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Buckets padrão de latência, em segundos
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registro: List[object] = []
+
+def _registrar(metrica):
+    _registro.append(metrica)
+    return metrica
+
+class Contador:
+    """Contador monotônico, opcionalmente separado por labels. Com `funcao`,
+    o valor é lido dela na hora da coleta (ex.: contadores do pool)."""
+
+    def __init__(self, nome: str, ajuda: str, labels: Sequence[str] = (), funcao: Optional[Callable[[], float]] = None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.labels = tuple(labels)
+        self.funcao = funcao
+        self._valores: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        _registrar(self)
+
+    tipo = "counter"
+
+    def inc(self, valor: float = 1, **labels):
+        chave = tuple(labels[l] for l in self.labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valores(self) -> Dict[Tuple, float]:
+        if self.funcao is not None:
+            return {(): self.funcao()}
+        with self._lock:
+            return dict(self._valores)
+
+class Medidor(Contador):
+    """Valor que sobe e desce (ex.: requisições em andamento)."""
+
+    tipo = "gauge"
+
+    def dec(self, valor: float = 1, **labels):
+        self.inc(-valor, **labels)
+
+    def set(self, valor: float, **labels):
+        chave = tuple(labels[l] for l in self.labels)
+        with self._lock:
+            self._valores[chave] = valor
+
+class Histograma:
+    """Histograma de buckets fixos (contagem por faixa, soma e total)."""
+
+    def __init__(self, nome: str, ajuda: str, labels: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_LATENCIA):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # chave de labels -> [contagens por bucket (+Inf no fim), soma, total]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+        _registrar(self)
+
+    tipo = "histogram"
+
+    def observar(self, valor: float, **labels):
+        chave = tuple(labels[l] for l in self.labels)
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def series(self) -> Dict[Tuple, list]:
+        with self._lock:
+            return {k: [list(v[0]), v[1], v[2]] for k, v in self._series.items()}
+
+    def resumo(self) -> dict:
+        """Contagem, média e percentis aproximados (pelo limite do bucket) por série."""
+        saida = {}
+        for chave, (contagens, soma, total) in self.series().items():
+            percentis = {}
+            for p in (50, 95, 99):
+                alvo = total * p / 100
+                acumulado = 0
+                for limite, n in zip(self.buckets + (float("inf"),), contagens):
+                    acumulado += n
+                    if acumulado >= alvo:
+                        percentis[f"p{p}_ms"] = None if limite == float("inf") else limite * 1000
+                        break
+            saida["/".join(map(str, chave)) or "total"] = {
+                "contagem": total,
+                "media_ms": round(soma / total * 1000, 3) if total else 0.0,
+                **percentis,
+            }
+        return saida
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(nomes: Tuple[str, ...], valores: Tuple, extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if valor != float("inf") else "+Inf"
+
+def texto_prometheus() -> str:
+    """Todas as métricas registradas no formato de exposição texto (0.0.4)."""
+    linhas = []
+    for metrica in _registro:
+        linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+        linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+        if isinstance(metrica, Histograma):
+            limites = metrica.buckets + (float("inf"),)
+            for chave, (contagens, soma, total) in metrica.series().items():
+                acumulado = 0
+                for limite, n in zip(limites, contagens):
+                    acumulado += n
+                    le = 'le="' + _numero(limite) + '"'
+                    linhas.append(f"{metrica.nome}_bucket{_labels(metrica.labels, chave, le)} {acumulado}")
+                linhas.append(f"{metrica.nome}_sum{_labels(metrica.labels, chave)} {_numero(soma)}")
+                linhas.append(f"{metrica.nome}_count{_labels(metrica.labels, chave)} {total}")
+        else:
+            for chave, valor in metrica.valores().items():
+                linhas.append(f"{metrica.nome}{_labels(metrica.labels, chave)} {_numero(valor)}")
+    return "\n".join(linhas) + "\n"
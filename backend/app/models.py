@@ -1,8 +1,10 @@
 from datetime import date, datetime
 from typing import List, Optional
-from sqlalchemy import String, Integer, ForeignKey, Numeric, Date, Boolean, DateTime
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import String, Integer, BigInteger, ForeignKey, Numeric, Date, Boolean, DateTime, Index, CheckConstraint, JSON, Text, select, text, false
+from sqlalchemy.orm import DeclarativeBase, Mapped, column_property, mapped_column, relationship, validates
 from sqlalchemy.sql import func
+from .normalizacao import placa_normalizada, so_digitos
+from . import status_os
 
 # Classe Base do SQLAlchemy 2.0
 class Base(DeclarativeBase):
@@ -14,7 +16,7 @@ class OSPeca(Base):
     __tablename__ = 'os_peca'
 
     ordem_servico_id: Mapped[int] = mapped_column(ForeignKey('ordem_servico.id'), primary_key=True)
-    peca_id: Mapped[int] = mapped_column(ForeignKey('peca.id'), primary_key=True)
+    peca_id: Mapped[int] = mapped_column(ForeignKey('peca.id'), primary_key=True, index=True)
     
     quantidade: Mapped[int] = mapped_column(Integer, default=1)
     valor_unitario: Mapped[float] = mapped_column(Numeric(10, 2))
@@ -27,7 +29,7 @@ class OSServico(Base):
     __tablename__ = 'os_servico'
 
     ordem_servico_id: Mapped[int] = mapped_column(ForeignKey('ordem_servico.id'), primary_key=True)
-    servico_id: Mapped[int] = mapped_column(ForeignKey('servico.id'), primary_key=True)
+    servico_id: Mapped[int] = mapped_column(ForeignKey('servico.id'), primary_key=True, index=True)
     
     quantidade: Mapped[int] = mapped_column(Integer, default=1)
     valor_unitario: Mapped[float] = mapped_column(Numeric(10, 2))
@@ -39,6 +41,17 @@ class OSServico(Base):
 
 class Cliente(Base):
     __tablename__ = 'cliente'
+    __table_args__ = (
+        # listagem por nome (keyset) e filtro por prefixo: lower(nome) LIKE 'x%'
+        Index('ix_cliente_nome_id', 'nome', 'id'),
+        Index('ix_cliente_nome_lower', text('lower(nome) text_pattern_ops')),
+        # busca (app/busca.py): trigramas para trecho/semelhança em qualquer posição
+        Index('ix_cliente_nome_trgm', 'nome', postgresql_using='gin', postgresql_ops={'nome': 'gin_trgm_ops'}),
+        Index('ix_cliente_cpf_cnpj_digitos_trgm', 'cpf_cnpj_digitos', postgresql_using='gin',
+              postgresql_ops={'cpf_cnpj_digitos': 'gin_trgm_ops'}),
+        Index('ix_cliente_telefone_digitos_trgm', 'telefone_digitos', postgresql_using='gin',
+              postgresql_ops={'telefone_digitos': 'gin_trgm_ops'}),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     nome: Mapped[str] = mapped_column(String(100))
@@ -46,25 +59,46 @@ class Cliente(Base):
     email: Mapped[Optional[str]] = mapped_column(String(100))
     cpf_cnpj: Mapped[str] = mapped_column(String(20), unique=True)
     endereco: Mapped[str] = mapped_column(String(255))
+
+    # Só os dígitos, para buscar sem depender da máscara digitada
+    cpf_cnpj_digitos: Mapped[Optional[str]] = mapped_column(String(20))
+    telefone_digitos: Mapped[Optional[str]] = mapped_column(String(20))
     
     # Relacionamento 1:N
     veiculos: Mapped[List["Veiculo"]] = relationship(back_populates="cliente")
 
+    @validates('cpf_cnpj', 'telefone')
+    def _normalizar(self, chave, valor):
+        setattr(self, f'{chave}_digitos', so_digitos(valor))
+        return valor
+
 class Veiculo(Base):
     __tablename__ = 'veiculo'
+    __table_args__ = (
+        # consulta exata (balcão) e busca por trecho, sobre a placa canônica
+        Index('ix_veiculo_placa_normalizada', 'placa_normalizada', unique=True),
+        Index('ix_veiculo_placa_normalizada_trgm', 'placa_normalizada', postgresql_using='gin',
+              postgresql_ops={'placa_normalizada': 'gin_trgm_ops'}),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     placa: Mapped[str] = mapped_column(String(10), unique=True, index=True)
+    placa_normalizada: Mapped[str] = mapped_column(String(10))
     modelo: Mapped[str] = mapped_column(String(50))
     marca: Mapped[str] = mapped_column(String(50))
     ano: Mapped[int] = mapped_column(Integer)
     cor: Mapped[str] = mapped_column(String(30))
     
-    cliente_id: Mapped[int] = mapped_column(ForeignKey('cliente.id'))
+    cliente_id: Mapped[int] = mapped_column(ForeignKey('cliente.id'), index=True)
     
     cliente: Mapped["Cliente"] = relationship(back_populates="veiculos")
     ordens_servico: Mapped[List["OrdemServico"]] = relationship(back_populates="veiculo")
 
+    @validates('placa')
+    def _normalizar(self, chave, valor):
+        self.placa_normalizada = placa_normalizada(valor)
+        return valor
+
 class Mecanico(Base):
     __tablename__ = 'mecanico'
 
@@ -79,10 +113,45 @@ class Peca(Base):
     codigo: Mapped[str] = mapped_column(String(50), unique=True)
     nome: Mapped[str] = mapped_column(String(100))
     valor_venda: Mapped[float] = mapped_column(Numeric(10, 2))
+    # Saldo dos movimentos já compactados; o disponível é estoque_disponivel
     estoque_atual: Mapped[int] = mapped_column(Integer)
 
     os_associadas: Mapped[List["OSPeca"]] = relationship(back_populates="peca")
 
+class MovimentoEstoque(Base):
+    """Livro de movimentos de estoque, só recebe INSERT (ver app/movimentos.py).
+
+    quantidade tem sinal: ENTRADA/DEVOLUCAO positivas, VENDA negativa, AJUSTE
+    qualquer. A compactação soma os pendentes em Peca.estoque_atual e marca
+    compactado=True."""
+    __tablename__ = 'movimento_estoque'
+    __table_args__ = (
+        # histórico por peça
+        Index('ix_movimento_estoque_peca_id_id', 'peca_id', 'id'),
+        # soma dos pendentes por peça (index-only, parcial)
+        Index('ix_movimento_estoque_pendente', 'peca_id', 'quantidade', postgresql_where=text("NOT compactado")),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    peca_id: Mapped[int] = mapped_column(ForeignKey('peca.id', ondelete='RESTRICT'))
+    tipo: Mapped[str] = mapped_column(String(10)) # ENTRADA, VENDA, DEVOLUCAO, AJUSTE
+    quantidade: Mapped[int] = mapped_column(Integer)
+    ordem_servico_id: Mapped[Optional[int]] = mapped_column(ForeignKey('ordem_servico.id'))
+    observacao: Mapped[Optional[str]] = mapped_column(String(200))
+    criado_em: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    compactado: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
+
+# Disponível = saldo compactado + movimentos pendentes
+Peca.estoque_disponivel = column_property(
+    Peca.estoque_atual + func.coalesce(
+        select(func.sum(MovimentoEstoque.quantidade))
+        .where(MovimentoEstoque.peca_id == Peca.id, ~MovimentoEstoque.compactado)
+        .correlate_except(MovimentoEstoque)
+        .scalar_subquery(),
+        0,
+    )
+)
+
 class Servico(Base):
     __tablename__ = 'servico'
 
@@ -95,18 +164,36 @@ class Servico(Base):
 
 class OrdemServico(Base):
     __tablename__ = 'ordem_servico'
+    __table_args__ = (
+        # keyset da listagem (mais recentes primeiro) com e sem filtro de status
+        Index('ix_ordem_servico_data_abertura_id', 'data_abertura', 'id'),
+        Index('ix_ordem_servico_status_data_abertura_id', 'status', 'data_abertura', 'id'),
+        # quadro e dashboard: só as OS em aberto, o custo acompanha a fila e não o histórico
+        Index('ix_ordem_servico_quadro', 'status', 'data_abertura', 'id',
+              postgresql_where=text(status_os.SQL_ABERTA)),
+        Index('ix_ordem_servico_aberta_mecanico', 'mecanico_id', postgresql_where=text(status_os.SQL_ABERTA)),
+        CheckConstraint("status IN (" + ", ".join(f"'{s}'" for s in status_os.TODOS) + ")", name='ck_ordem_servico_status'),
+        # dashboard: fechamentos por período
+        Index('ix_ordem_servico_data_fechamento', 'data_fechamento', postgresql_where=text("data_fechamento IS NOT NULL")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     data_abertura: Mapped[date] = mapped_column(Date, default=func.now())
     data_fechamento: Mapped[Optional[date]] = mapped_column(Date)
-    status: Mapped[str] = mapped_column(String(20), default="ORCAMENTO") # Idealmente usar Enum
+    status: Mapped[str] = mapped_column(String(20), default=status_os.ORCAMENTO) # ciclo em app/status_os.py
     km_atual: Mapped[int] = mapped_column(Integer)
     defeito_reclamado: Mapped[str] = mapped_column(String(255))
 
     # Chaves Estrangeiras
-    cliente_id: Mapped[int] = mapped_column(ForeignKey('cliente.id'))
-    veiculo_id: Mapped[int] = mapped_column(ForeignKey('veiculo.id'))
-    mecanico_id: Mapped[int] = mapped_column(ForeignKey('mecanico.id'))
+    cliente_id: Mapped[int] = mapped_column(ForeignKey('cliente.id'), index=True)
+    veiculo_id: Mapped[int] = mapped_column(ForeignKey('veiculo.id'), index=True)
+    mecanico_id: Mapped[int] = mapped_column(ForeignKey('mecanico.id'), index=True)
+
+    # Totais mantidos incrementalmente pelas rotas (ver app/totais.py)
+    total_pecas: Mapped[float] = mapped_column(Numeric(12, 2), default=0, server_default="0")
+    total_servicos: Mapped[float] = mapped_column(Numeric(12, 2), default=0, server_default="0")
+    total_pago: Mapped[float] = mapped_column(Numeric(12, 2), default=0, server_default="0")
+    saldo_devedor: Mapped[float] = mapped_column(Numeric(12, 2), default=0, server_default="0")
 
     # Relacionamentos
     veiculo: Mapped["Veiculo"] = relationship(back_populates="ordens_servico") # Correcao da linha acima
@@ -120,9 +207,12 @@ class OrdemServico(Base):
 
 class Pagamento(Base):
     __tablename__ = 'pagamento'
+    __table_args__ = (
+        Index('ix_pagamento_data_pagamento_id', 'data_pagamento', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    ordem_servico_id: Mapped[int] = mapped_column(ForeignKey('ordem_servico.id'))
+    ordem_servico_id: Mapped[int] = mapped_column(ForeignKey('ordem_servico.id'), index=True)
     
     data_pagamento: Mapped[date] = mapped_column(Date, default=func.now())
     valor: Mapped[float] = mapped_column(Numeric(10, 2))
@@ -134,6 +224,12 @@ class Pagamento(Base):
 
 class Despesa(Base):
     __tablename__ = 'despesa'
+    __table_args__ = (
+        Index('ix_despesa_data_vencimento_id', 'data_vencimento', 'id'),
+        Index('ix_despesa_categoria_data_vencimento', 'categoria', 'data_vencimento'),
+        # contas em aberto são poucas perto do histórico pago
+        Index('ix_despesa_pendente_vencimento', 'data_vencimento', postgresql_where=text("status = 'PENDENTE'")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     descricao: Mapped[str] = mapped_column(String(200))
@@ -150,4 +246,53 @@ class Usuario(Base):
     username: Mapped[str] = mapped_column(String(50), unique=True, index=True)
     password_hash: Mapped[str] = mapped_column(String(255))
     role: Mapped[str] = mapped_column(String(20), default="ATENDENTE") # ADMIN, MECANICO, ATENDENTE
-    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
\ No newline at end of file
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+
+class ResumoDiario(Base):
+    """Totais financeiros por dia, mantidos junto com cada pagamento/despesa (ver app/resumo.py)."""
+    __tablename__ = 'resumo_diario'
+
+    dia: Mapped[date] = mapped_column(Date, primary_key=True)
+    tipo: Mapped[str] = mapped_column(String(10), primary_key=True) # RECEITA, DESPESA
+    chave: Mapped[str] = mapped_column(String(50), primary_key=True) # forma_pagamento ou categoria
+    quantidade: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    valor: Mapped[float] = mapped_column(Numeric(14, 2), default=0, server_default="0")
+
+class VersaoTabela(Base):
+    """Contador de versão por tabela do catálogo, usado nos ETags (ver app/versoes.py)."""
+    __tablename__ = 'versao_tabela'
+
+    tabela: Mapped[str] = mapped_column(String(50), primary_key=True)
+    versao: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+
+class Tarefa(Base):
+    """Fila durável de efeitos pós-commit (ver app/fila.py). Tarefa concluída
+    é apagada: ficam só as pendentes e as que esgotaram as tentativas."""
+    __tablename__ = 'tarefa'
+    __table_args__ = (
+        # próxima vencida: só as pendentes entram no índice
+        Index('ix_tarefa_pendente', 'executar_em', 'id', postgresql_where=text("status = 'PENDENTE'")),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tipo: Mapped[str] = mapped_column(String(50))
+    dados: Mapped[dict] = mapped_column(JSON, default=dict)
+    status: Mapped[str] = mapped_column(String(10), default="PENDENTE", server_default="PENDENTE") # PENDENTE, FALHOU
+    tentativas: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    max_tentativas: Mapped[int] = mapped_column(Integer)
+    executar_em: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    criado_em: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    erro: Mapped[Optional[str]] = mapped_column(Text)
+
+
+class Auditoria(Base):
+    """Ações sensíveis já confirmadas (gravadas pela fila depois do commit da ação)."""
+    __tablename__ = 'auditoria'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    acao: Mapped[str] = mapped_column(String(50)) # ex.: REMOVER_DESPESA
+    usuario_id: Mapped[Optional[int]] = mapped_column(Integer) # sem FK: o registro sobrevive ao usuário
+    usuario: Mapped[str] = mapped_column(String(50))
+    dados: Mapped[dict] = mapped_column(JSON, default=dict)
+    criado_em: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -0,0 +1,125 @@
+"""Movimentos de estoque (tabela movimento_estoque).
+
+Vendas e devoluções não atualizam mais a linha da peça: cada uma é um
+INSERT no livro de movimentos. Peca.estoque_atual é um saldo consolidado
+(snapshot), e o disponível é snapshot + movimentos ainda não compactados,
+que são poucos por peça. A compactação periódica soma os pendentes no
+snapshot num único UPDATE.
+
+Para não vender a mesma unidade duas vezes, a venda trava a peça com um
+advisory lock da transação (pg_advisory_xact_lock), sempre em ordem de id.
+A linha da peça fica livre para leitura, edição e compactação.
+
+É a mesma garantia do SELECT ... FOR UPDATE ordenado que o lote de itens da
+OS usava: um comando só trava todas as peças, em ordem de id (funções voláteis
+da lista do SELECT rodam depois do ORDER BY), e as travas duram até o fim da
+transação. Vale porque todo caminho que baixa estoque (itens da OS, movimento
+manual, ajuste na edição) passa por travar_pecas; o FOR UPDATE na linha da
+peça bloquearia também a edição e a compactação, que não mexem no disponível.
+"""
+import asyncio
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+
+ENTRADA = "ENTRADA"
+VENDA = "VENDA"
+DEVOLUCAO = "DEVOLUCAO"
+AJUSTE = "AJUSTE"
+
+# Primeira chave do pg_advisory_xact_lock(int, int): separa as travas de peça de outras
+_ESPACO_TRAVA = 7301
+
+M = models.MovimentoEstoque
+
+async def travar_pecas(db: AsyncSession, peca_ids: Iterable[int]) -> Dict[int, int]:
+    """Trava as peças até o fim da transação, em ordem de id (sem deadlock entre
+    chamadas concorrentes), e devolve o disponível de cada uma encontrada."""
+    ids = sorted(set(peca_ids))
+    if not ids:
+        return {}
+    # Um comando só: as travas saem na ordem do índice da PK. Id inexistente não
+    # trava nada (a rota devolve 404). A leitura do disponível fica num segundo
+    # comando, para enxergar o que foi gravado por quem segurava a trava.
+    await db.execute(
+        select(func.pg_advisory_xact_lock(_ESPACO_TRAVA, models.Peca.id))
+        .where(models.Peca.id.in_(ids))
+        .order_by(models.Peca.id)
+    )
+    linhas = await db.execute(
+        select(models.Peca.id, models.Peca.estoque_disponivel).where(models.Peca.id.in_(ids))
+    )
+    return dict(linhas.all())
+
+def movimento(peca_id: int, tipo: str, quantidade: int, ordem_servico_id: Optional[int] = None,
+              observacao: Optional[str] = None, compactado: bool = False) -> dict:
+    return {
+        "peca_id": peca_id,
+        "tipo": tipo,
+        "quantidade": quantidade,
+        "ordem_servico_id": ordem_servico_id,
+        "observacao": observacao,
+        "compactado": compactado,
+    }
+
+async def registrar(db: AsyncSession, movimentos: List[dict]):
+    if movimentos:
+        await db.execute(insert(M), movimentos)
+
+async def disponivel(db: AsyncSession, peca_id: int) -> Optional[int]:
+    return await db.scalar(select(models.Peca.estoque_disponivel).where(models.Peca.id == peca_id))
+
+async def compactar(db: AsyncSession) -> int:
+    """Soma os movimentos pendentes no snapshot das peças. Faz commit.
+
+    Um único statement (UPDATE ... RETURNING numa CTE + UPDATE da peça): quem
+    lê snapshot + pendentes vê o estado antes ou depois, nunca no meio."""
+    pendentes = (
+        update(M)
+        .where(~M.compactado)
+        .values(compactado=True)
+        .returning(M.peca_id, M.quantidade)
+        .cte("pendentes")
+    )
+    soma = (
+        select(pendentes.c.peca_id, func.sum(pendentes.c.quantidade).label("quantidade"))
+        .group_by(pendentes.c.peca_id)
+        .cte("soma")
+    )
+    P = models.Peca
+    resultado = await db.execute(
+        update(P)
+        .where(P.id == soma.c.peca_id)
+        .values(estoque_atual=P.estoque_atual + soma.c.quantidade)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return resultado.rowcount
+
+async def verificar(db: AsyncSession, limite: int = 100) -> List[dict]:
+    """Peças cujo snapshot difere da soma dos movimentos compactados."""
+    P = models.Peca
+    compactados = (
+        select(func.coalesce(func.sum(M.quantidade), 0))
+        .where(M.peca_id == P.id, M.compactado)
+        .scalar_subquery()
+    )
+    linhas = await db.execute(
+        select(P.id, P.estoque_atual, compactados.label("calculado"))
+        .where(P.estoque_atual != compactados)
+        .order_by(P.id)
+        .limit(limite)
+    )
+    return [dict(r._mapping) for r in linhas]
+
+async def compactar_periodicamente(sessoes, intervalo: float):
+    """Laço para o lifespan da API. Vários workers podem rodar ao mesmo tempo:
+    quem chegar depois não encontra pendentes (as linhas já estarão compactadas)."""
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            async with sessoes() as db:
+                await compactar(db)
+        except Exception as e:
+            print(f"Falha ao compactar movimentos de estoque: {e}")
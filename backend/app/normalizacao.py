@@ -0,0 +1,31 @@
+"""Formas normalizadas dos campos usados em busca, gravadas em colunas
+próprias para que os índices trabalhem sobre o valor já limpo."""
+import re
+from typing import Optional
+
+_NAO_DIGITO = re.compile(r"\D")
+_NAO_ALFANUMERICO = re.compile(r"[^0-9A-Za-z]")
+# Padrão antigo (AAA9999), inteiro ou início dele: o 5º caractere vira letra no Mercosul
+_PLACA_ANTIGA = re.compile(r"^([A-Z]{3}[0-9])([0-9])([0-9]{0,2})$")
+
+def so_digitos(valor: Optional[str]) -> Optional[str]:
+    """'123.456.789-00' -> '12345678900'; None/vazio -> None."""
+    if not valor:
+        return None
+    return _NAO_DIGITO.sub("", valor) or None
+
+def placa_busca(valor: str) -> str:
+    """Placa sem separadores e em maiúsculas ('abc-1234' -> 'ABC1234')."""
+    return _NAO_ALFANUMERICO.sub("", valor).upper()
+
+def placa_normalizada(valor: str) -> str:
+    """Forma canônica (Mercosul) gravada em Veiculo.placa_normalizada:
+    'ABC-1234', 'abc1234' e 'ABC1C34' -> 'ABC1C34' (0->A, 1->B, ..., 9->J).
+    Placas fora do padrão só perdem separadores e ficam em maiúsculas.
+    A migração 4c8f2a6d9e13 faz a mesma conversão em SQL."""
+    placa = placa_busca(valor)
+    antiga = _PLACA_ANTIGA.match(placa)
+    if antiga:
+        inicio, digito, fim = antiga.groups()
+        placa = inicio + chr(ord("A") + int(digito)) + fim
+    return placa
@@ -0,0 +1,140 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import List, Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import respostas
+from .config import settings
+
+# Cabeçalho com o cursor da próxima página. O corpo continua sendo a lista,
+# então quem usa skip/limit (ou ignora o cabeçalho) não percebe diferença.
+HEADER_PROXIMO_CURSOR = "X-Next-Cursor"
+HEADER_TOTAL = "X-Total-Count"
+HEADER_TOTAL_LIMITADO = "X-Total-Capped"
+
+def _serializar(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+def _desserializar(valor, coluna):
+    if valor is None:
+        return None
+    tipo = coluna.type.python_type
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    return tipo(valor)
+
+def codificar_cursor(ordem: str, valores: list) -> str:
+    bruto = json.dumps({"o": ordem, "v": [_serializar(v) for v in valores]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str, ordem: str, colunas: list) -> list:
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        if dados["o"] != ordem or len(dados["v"]) != len(colunas):
+            raise ValueError
+        return [_desserializar(v, c) for v, c in zip(dados["v"], colunas)]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido para esta listagem")
+
+async def paginar(
+    db: AsyncSession,
+    stmt: Select,
+    response: Response,
+    colunas: list,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    descendente: bool = False,
+    ordem: str = "id",
+    linhas: bool = False,
+) -> List:
+    """Executa a listagem ordenada por `colunas` (chave única, ex.: (data_abertura, id)).
+
+    Com `cursor`, filtra por comparação de tupla a partir da última linha da
+    página anterior, que o Postgres resolve direto no índice composto, sem
+    varrer as linhas puladas. `skip` continua aceito por compatibilidade
+    (OFFSET), agora com ORDER BY estável.
+
+    Com `linhas`, `stmt` seleciona colunas (respostas.colunas) e os itens são
+    dicts; as colunas de ordenação precisam estar entre elas."""
+    stmt = stmt.order_by(*(c.desc() if descendente else c.asc() for c in colunas))
+
+    if cursor:
+        valores = decodificar_cursor(cursor, ordem, colunas)
+        if descendente:
+            stmt = stmt.where(tuple_(*colunas) < tuple_(*valores))
+        else:
+            stmt = stmt.where(tuple_(*colunas) > tuple_(*valores))
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    resultado = await db.execute(stmt.limit(limit))
+    itens = respostas.dicts(resultado.keys(), resultado) if linhas else resultado.scalars().all()
+
+    if len(itens) == limit:
+        ultimo = itens[-1]
+        valores = [ultimo[c.key] for c in colunas] if linhas else [getattr(ultimo, c.key) for c in colunas]
+        response.headers[HEADER_PROXIMO_CURSOR] = codificar_cursor(ordem, valores)
+
+    return itens
+
+def resolver_ordenacao(ordenar: str, permitidas: dict, desempate) -> list:
+    """Converte `ordenar` ("campo" ou "-campo" para decrescente) em ORDER BY,
+    aceitando só os campos de `permitidas`. `desempate` (o id) garante ordem estável."""
+    descendente = ordenar.startswith("-")
+    nome = ordenar.lstrip("-")
+    if nome not in permitidas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ordenação inválida. Use: {', '.join(sorted(permitidas))} (prefixo '-' para decrescente)",
+        )
+    coluna = permitidas[nome]
+    if descendente:
+        return [coluna.desc(), desempate.desc()]
+    return [coluna.asc(), desempate.asc()]
+
+async def contar(db: AsyncSession, stmt: Select, response: Response) -> int:
+    """Total filtrado de `stmt` em X-Total-Count. Sem ORDER BY e com LIMIT
+    LISTAGEM_CONTAGEM_MAX + 1, o count para ali em vez de percorrer o histórico."""
+    maximo = settings.listagem_contagem_max
+    sub = stmt.order_by(None)
+    if maximo:
+        sub = sub.limit(maximo + 1)
+    total = await db.scalar(select(func.count()).select_from(sub.subquery()))
+    if maximo and total > maximo:
+        total = maximo
+        response.headers[HEADER_TOTAL_LIMITADO] = "true"
+    response.headers[HEADER_TOTAL] = str(total)
+    return total
+
+async def listar_pagina(
+    db: AsyncSession,
+    stmt: Select,
+    response: Response,
+    ordenacao: list,
+    skip: int = 0,
+    limit: int = 100,
+    linhas: bool = False,
+) -> List:
+    """Executa uma página limitada de `stmt` e devolve o total filtrado em X-Total-Count.
+
+    A página é só ORDER BY ... LIMIT, que o Postgres resolve parando cedo no
+    índice da ordenação. O total sai da própria página quando ela vem
+    incompleta (skip + linhas); com a página cheia, ou vazia depois do fim,
+    vem de contar(). Com `linhas`, os itens são dicts das colunas de `stmt`
+    (ver paginar)."""
+    resultado = await db.execute(stmt.order_by(*ordenacao).offset(skip).limit(limit))
+    pagina = respostas.dicts(resultado.keys(), resultado) if linhas else resultado.scalars().all()
+
+    if len(pagina) < limit and (pagina or not skip):
+        response.headers[HEADER_TOTAL] = str(skip + len(pagina))
+    else:
+        await contar(db, stmt, response)
+    return pagina
@@ -0,0 +1,144 @@
+"""Orçamento de consultas por rota e detector de N+1, para dev e testes.
+
+Ligado por CONSULTAS_MODO ("log" ou "erro"; em produção fica "desligado" e
+nada aqui é instalado). Em cada requisição conta os comandos SQL e quantas
+vezes cada SELECT parametrizado (o texto do comando, sem os valores) se
+repete. Um loop que carrega um item por vez aparece como o mesmo SELECT
+emitido N vezes.
+
+- rota acima do orçamento: o declarado com @orcamento(n) na função da rota,
+  ou CONSULTAS_ORCAMENTO_PADRAO (0 = sem limite). Conta tudo da requisição,
+  inclusive a leitura do usuário quando o token não está no cache de principais;
+- mesmo SELECT mais de CONSULTAS_REPETICOES_MAX vezes na requisição.
+
+Modo "erro": levanta ConsultasExcedidas no comando que passou do limite
+(a requisição vira 500 e o teste falha). Modo "log": imprime um resumo no
+fim da requisição. Nos dois, a resposta leva o header X-Consultas.
+
+Fora do HTTP (scripts, bench), `with rastrear(orcamento=n) as r:` aplica as
+mesmas regras a um trecho de código.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+from sqlalchemy import event
+from .config import settings
+from .database import engine
+
+HEADER_CONSULTAS = "X-Consultas"
+
+class ConsultasExcedidas(RuntimeError):
+    pass
+
+def orcamento(maximo: int) -> Callable:
+    """Declara o máximo de comandos SQL da rota. Vai abaixo do @router.*:
+
+        @router.get("/{os_id}/detalhes")
+        @rastreio.orcamento(4)
+        async def ver_detalhes_os(...)
+    """
+    def decorar(funcao):
+        funcao.orcamento_consultas = maximo
+        return funcao
+    return decorar
+
+class Rastreio:
+    __slots__ = ("nome", "orcamento", "repeticoes_max", "total", "formas", "problemas", "_scope")
+
+    def __init__(self, nome: str = "", orcamento: Optional[int] = None, scope: Optional[dict] = None):
+        self.nome = nome
+        self.orcamento = orcamento
+        self.repeticoes_max = settings.consultas_repeticoes_max
+        self.total = 0
+        self.formas: Counter = Counter()
+        self.problemas: List[str] = []
+        self._scope = scope
+
+    def _orcamento(self) -> int:
+        if self.orcamento is None and self._scope is not None:
+            # a rota só é conhecida depois do roteamento, antes do primeiro SQL
+            endpoint = self._scope.get("endpoint")
+            if endpoint is not None:
+                self.orcamento = getattr(endpoint, "orcamento_consultas", settings.consultas_orcamento_padrao)
+                rota = self._scope.get("route")
+                self.nome = f"{self._scope['method']} {getattr(rota, 'path', self._scope['path'])}"
+        return self.orcamento or 0
+
+    def registrar(self, statement: str):
+        self.total += 1
+        orcamento = self._orcamento()
+        if orcamento and self.total == orcamento + 1:
+            self._problema(f"{self.nome}: mais de {orcamento} comandos SQL (orçamento)")
+
+        if statement.lstrip()[:6].upper() == "SELECT":
+            self.formas[statement] += 1
+            if self.formas[statement] == self.repeticoes_max + 1:
+                self._problema(
+                    f"{self.nome}: mesmo SELECT mais de {self.repeticoes_max} vezes (N+1?): {_resumir(statement)}"
+                )
+
+    def _problema(self, mensagem: str):
+        self.problemas.append(mensagem)
+        if settings.consultas_modo == "erro":
+            raise ConsultasExcedidas(mensagem)
+
+    def relatorio(self) -> str:
+        repetidos = [f"  {n}x {_resumir(sql)}" for sql, n in self.formas.most_common(5) if n > 1]
+        return "\n".join([f"Consultas: {self.nome} emitiu {self.total} comandos SQL", *self.problemas, *repetidos])
+
+def _resumir(sql: str, tamanho: int = 160) -> str:
+    sql = " ".join(sql.split())
+    return sql if len(sql) <= tamanho else sql[:tamanho] + "..."
+
+rastreio_atual: ContextVar[Optional[Rastreio]] = ContextVar("rastreio_atual", default=None)
+
+def _depois(conn, cursor, statement, parameters, context, executemany):
+    rastreio = rastreio_atual.get()
+    if rastreio is not None:
+        rastreio.registrar(statement)
+
+def instalar():
+    if not event.contains(engine.sync_engine, "after_cursor_execute", _depois):
+        event.listen(engine.sync_engine, "after_cursor_execute", _depois)
+
+@contextmanager
+def rastrear(nome: str = "trecho", orcamento: Optional[int] = None):
+    instalar()
+    rastreio = Rastreio(nome, orcamento)
+    token = rastreio_atual.set(rastreio)
+    try:
+        yield rastreio
+    finally:
+        rastreio_atual.reset(token)
+    if rastreio.problemas and settings.consultas_modo != "erro":
+        print(rastreio.relatorio())
+
+class MiddlewareConsultas:
+    """Middleware ASGI que abre um Rastreio por requisição (ver main.py)."""
+
+    def __init__(self, app):
+        self.app = app
+        instalar()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rastreio = Rastreio(f"{scope['method']} {scope['path']}", scope=scope)
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                # os comandos até aqui; num streaming, os do corpo não entram
+                mensagem.setdefault("headers", [])
+                mensagem["headers"] = [*mensagem["headers"], (HEADER_CONSULTAS.lower().encode(), str(rastreio.total).encode())]
+            await send(mensagem)
+
+        token = rastreio_atual.set(rastreio)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            rastreio_atual.reset(token)
+            if rastreio.problemas and settings.consultas_modo == "log":
+                print(rastreio.relatorio())
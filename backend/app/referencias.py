@@ -0,0 +1,150 @@
+"""Cache em memória (read-through) dos dados de referência: serviço, mecânico
+e nome/preço da peça, lidos a cada OS aberta e a cada item lançado.
+
+Os registros são dataclasses com __slots__ e só os campos usados nas rotas.
+Cada tipo tem um CacheTTL próprio (LRU com limite de itens).
+
+Invalidação:
+- as rotas que gravam chamam notificar() antes do commit: limpa o item neste
+  worker e manda um NOTIFY no canal `referencias`, entregue só no commit;
+- cada worker escuta o canal (escutar(), no lifespan) e limpa o item ao
+  receber, inclusive o próprio worker, o que cobre uma leitura que tenha
+  recolocado o valor antigo entre a gravação e o commit;
+- o TTL é a rede de segurança caso a conexão de escuta caia (ao reconectar
+  o cache inteiro é limpo, pois mensagens podem ter se perdido).
+
+Outros caches do processo usam o mesmo canal com assinar() (ex.: os
+principais autenticados, em app/security.py).
+"""
+import asyncio
+import asyncpg
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+from .cache import CacheTTL
+from .config import settings
+
+CANAL = "referencias"
+
+@dataclass(frozen=True, slots=True)
+class ServicoRef:
+    id: int
+    descricao: str
+    valor_mao_obra: Decimal
+    tempo_estimado_minutos: int
+
+@dataclass(frozen=True, slots=True)
+class MecanicoRef:
+    id: int
+    nome: str
+    especialidade: str
+
+@dataclass(frozen=True, slots=True)
+class PecaRef:
+    id: int
+    codigo: str
+    nome: str
+    valor_venda: Decimal
+
+# tipo -> (modelo, classe do registro); os campos do registro são as colunas lidas
+_TIPOS = {
+    "servico": (models.Servico, ServicoRef),
+    "mecanico": (models.Mecanico, MecanicoRef),
+    "peca": (models.Peca, PecaRef),
+}
+
+caches: Dict[str, CacheTTL] = {
+    tipo: CacheTTL(ttl=settings.referencias_cache_ttl, max_itens=settings.referencias_cache_max)
+    for tipo in _TIPOS
+}
+
+# tipo -> (invalidar(chave), limpar()) dos caches de fora deste módulo
+_assinantes: Dict[str, Tuple[Callable[[str], None], Callable[[], None]]] = {}
+
+def assinar(tipo: str, invalidar_chave: Callable[[str], None], limpar: Callable[[], None]):
+    """Entrega ao cache de `tipo` os avisos "tipo:chave" recebidos no canal."""
+    _assinantes[tipo] = (invalidar_chave, limpar)
+
+async def buscar_varios(db: AsyncSession, tipo: str, ids: Iterable[int]) -> Dict[int, object]:
+    """Registros dos ids pedidos (os inexistentes ficam de fora). Os que não
+    estão no cache vêm numa única consulta."""
+    cache = caches[tipo]
+    encontrados, faltando = {}, []
+    for id_ in set(ids):
+        registro = cache.get(id_)
+        if registro is None:
+            faltando.append(id_)
+        else:
+            encontrados[id_] = registro
+
+    if faltando:
+        modelo, classe = _TIPOS[tipo]
+        colunas = [getattr(modelo, campo) for campo in classe.__slots__]
+        for linha in await db.execute(select(*colunas).where(modelo.id.in_(faltando))):
+            registro = classe(*linha)
+            cache.set(registro.id, registro)
+            encontrados[registro.id] = registro
+    return encontrados
+
+async def buscar(db: AsyncSession, tipo: str, id_: int):
+    return (await buscar_varios(db, tipo, [id_])).get(id_)
+
+async def servico(db: AsyncSession, id_: int) -> Optional[ServicoRef]:
+    return await buscar(db, "servico", id_)
+
+async def mecanico(db: AsyncSession, id_: int) -> Optional[MecanicoRef]:
+    return await buscar(db, "mecanico", id_)
+
+async def peca(db: AsyncSession, id_: int) -> Optional[PecaRef]:
+    return await buscar(db, "peca", id_)
+
+def invalidar(tipo: str, id_: Optional[int] = None):
+    if id_ is None:
+        caches[tipo].limpar()
+    else:
+        caches[tipo].invalidar(id_)
+
+async def notificar(db: AsyncSession, tipo: str, id_: Optional[int] = None):
+    """Invalida aqui e avisa os outros workers quando a transação fizer commit.
+    Sem id, invalida o tipo inteiro (ex.: importação em lote)."""
+    invalidar(tipo, id_)
+    await db.execute(select(func.pg_notify(CANAL, f"{tipo}:{'*' if id_ is None else id_}")))
+
+def _ao_notificar(conexao, pid, canal, mensagem: str):
+    tipo, _, id_ = mensagem.partition(":")
+    if tipo in caches:
+        invalidar(tipo, None if id_ == "*" else int(id_))
+    elif tipo in _assinantes:
+        _assinantes[tipo][0](id_)
+
+def limpar_tudo():
+    for cache in caches.values():
+        cache.limpar()
+    for _, limpar in _assinantes.values():
+        limpar()
+
+def estatisticas() -> dict:
+    return {tipo: cache.estatisticas() for tipo, cache in caches.items()}
+
+async def escutar(dsn: str, espera_reconexao: float = 5.0):
+    """Laço para o lifespan: mantém uma conexão asyncpg própria em LISTEN."""
+    while True:
+        conexao = None
+        try:
+            conexao = await asyncpg.connect(dsn)
+            encerrada = asyncio.Event()
+            conexao.add_termination_listener(lambda _: encerrada.set())
+            await conexao.add_listener(CANAL, _ao_notificar)
+            # Enquanto estava desconectado, avisos podem ter se perdido
+            limpar_tudo()
+            await encerrada.wait()
+        except asyncio.CancelledError:
+            if conexao is not None:
+                await conexao.close()
+            raise
+        except Exception as e:
+            print(f"Falha na escuta do canal {CANAL}: {e}")
+        await asyncio.sleep(espera_reconexao)
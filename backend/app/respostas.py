@@ -0,0 +1,54 @@
+"""Caminho rápido das listagens: linhas montadas direto das tuplas do SQL e
+codificadas com orjson.
+
+No caminho normal cada linha vira uma entidade ORM (identity map, estado por
+atributo), é validada no response_model e só então vai para JSON. Aqui a
+consulta seleciona apenas as colunas do schema de resposta, já com os nomes
+dos campos, e cada tupla vira um dict que o orjson codifica direto.
+
+A rota continua declarando response_model (OpenAPI), mas ele não é
+aplicado a uma Response pronta: é o próprio schema que define as colunas
+em colunas(), então o JSON sai com os mesmos campos e tipos.
+
+Não vale como default_response_class da app: com uma classe própria o
+FastAPI desliga o dump_json do pydantic nas demais rotas, que é mais rápido
+que jsonable_encoder + orjson. Medição em bench/serializacao.py.
+"""
+from typing import Iterable, List, Sequence
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import Float, Numeric, cast
+
+class RespostaJSON(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+def colunas(schema: type[BaseModel], entidade, **origem) -> list:
+    """Colunas de `entidade` rotuladas com os campos de `schema`, na ordem do
+    schema. `origem` troca a expressão de um campo (ex.: numero_os=OS.id).
+
+    Numeric declarado como float no schema sai do banco como float8: o valor
+    é o mesmo que float(Decimal) e o driver não monta um Decimal por célula."""
+    resultado = []
+    for nome, campo in schema.model_fields.items():
+        expr = origem[nome] if nome in origem else getattr(entidade, nome)
+        if campo.annotation is float and isinstance(expr.type, Numeric):
+            expr = cast(expr, Float)
+        resultado.append(expr.label(nome))
+    return resultado
+
+def dicts(chaves: Sequence[str], linhas: Iterable) -> List[dict]:
+    """Tuplas -> dicts. Colunas além de `chaves` (ex.: o total de
+    count(*) OVER ()) ficam de fora, porque o zip para na menor."""
+    return [dict(zip(chaves, linha)) for linha in linhas]
+
+def resposta(itens: list, response: Response) -> RespostaJSON:
+    """Devolvendo uma Response pronta, o FastAPI não copia os cabeçalhos que a
+    rota e as dependências puseram em `response` (X-Total-Count,
+    X-Next-Cursor, ETag); a cópia é feita aqui, como no caminho normal."""
+    pronta = RespostaJSON(itens)
+    pronta.headers.raw.extend(response.headers.raw)
+    return pronta
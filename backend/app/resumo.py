@@ -0,0 +1,101 @@
+"""Resumo financeiro diário (tabela resumo_diario).
+
+Uma linha por (dia, tipo, chave): RECEITA por forma de pagamento, no dia do
+pagamento; DESPESA por categoria, no dia do vencimento. As rotas somam cada
+lançamento na mesma transação, então /pagamentos/resumo lê no máximo algumas
+linhas por dia do período, em vez de varrer pagamentos e despesas.
+"""
+from datetime import date
+from typing import Optional
+from sqlalchemy import delete, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+
+RECEITA = "RECEITA"
+DESPESA = "DESPESA"
+
+R = models.ResumoDiario
+_COLUNAS = [R.dia, R.tipo, R.chave, R.quantidade, R.valor]
+
+def origem_pagamentos(sinal: int = 1):
+    P = models.Pagamento
+    chave = func.coalesce(P.forma_pagamento, "")
+    return (
+        select(P.data_pagamento, literal(RECEITA), chave, sinal * func.count(), sinal * func.sum(P.valor))
+        .group_by(P.data_pagamento, chave)
+    )
+
+def origem_despesas(sinal: int = 1):
+    D = models.Despesa
+    chave = func.coalesce(D.categoria, "")
+    return (
+        select(D.data_vencimento, literal(DESPESA), chave, sinal * func.count(), sinal * func.sum(D.valor))
+        .group_by(D.data_vencimento, chave)
+    )
+
+async def acumular(db: AsyncSession, origem):
+    """INSERT ... SELECT ... ON CONFLICT somando ao que já existe no dia."""
+    stmt = insert(R).from_select([c.key for c in _COLUNAS], origem)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[R.dia, R.tipo, R.chave],
+        set_={
+            "quantidade": R.quantidade + stmt.excluded.quantidade,
+            "valor": R.valor + stmt.excluded.valor,
+        },
+    )
+    await db.execute(stmt)
+
+async def somar_pagamento(db: AsyncSession, pagamento_id: int, sinal: int = 1):
+    # lê a própria linha: data_pagamento pode ter vindo do default do banco
+    await acumular(db, origem_pagamentos(sinal).where(models.Pagamento.id == pagamento_id))
+
+async def somar_despesa(db: AsyncSession, despesa_id: int, sinal: int = 1):
+    await acumular(db, origem_despesas(sinal).where(models.Despesa.id == despesa_id))
+
+async def reconstruir(db: AsyncSession, data_inicio: Optional[date] = None, data_fim: Optional[date] = None) -> int:
+    """Refaz o resumo do período (ou todo) a partir de pagamentos e despesas. Faz commit.
+    Lançamentos de pagamento/despesa esperam a reconstrução terminar."""
+    # Conflita com o upsert de somar_* (ROW EXCLUSIVE), não com leituras: sem
+    # isso, um pagamento gravado entre o DELETE e o INSERT entraria duas vezes
+    await db.execute(text(f"LOCK TABLE {R.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    limpar = delete(R)
+    pagamentos = origem_pagamentos()
+    despesas = origem_despesas()
+    if data_inicio:
+        limpar = limpar.where(R.dia >= data_inicio)
+        pagamentos = pagamentos.where(models.Pagamento.data_pagamento >= data_inicio)
+        despesas = despesas.where(models.Despesa.data_vencimento >= data_inicio)
+    if data_fim:
+        limpar = limpar.where(R.dia <= data_fim)
+        pagamentos = pagamentos.where(models.Pagamento.data_pagamento <= data_fim)
+        despesas = despesas.where(models.Despesa.data_vencimento <= data_fim)
+
+    await db.execute(limpar)
+    await acumular(db, pagamentos)
+    await acumular(db, despesas)
+    linhas = await db.scalar(select(func.count()).select_from(R))
+    await db.commit()
+    return linhas
+
+async def consultar(db: AsyncSession, data_inicio: Optional[date] = None, data_fim: Optional[date] = None) -> dict:
+    stmt = select(R.tipo, R.chave, func.sum(R.valor)).group_by(R.tipo, R.chave)
+    if data_inicio:
+        stmt = stmt.where(R.dia >= data_inicio)
+    if data_fim:
+        stmt = stmt.where(R.dia <= data_fim)
+
+    por_tipo = {RECEITA: {}, DESPESA: {}}
+    for tipo, chave, valor in (await db.execute(stmt)).all():
+        if valor:
+            por_tipo[tipo][chave] = float(valor)
+
+    receitas = sum(por_tipo[RECEITA].values())
+    despesas = sum(por_tipo[DESPESA].values())
+    return {
+        "total_receitas": receitas,
+        "total_despesas": despesas,
+        "saldo": receitas - despesas,
+        "receitas_por_forma": por_tipo[RECEITA],
+        "despesas_por_categoria": por_tipo[DESPESA],
+    }
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import fila, hashing, referencias, security
+from ..database import get_db, status_pool
+from .auth import latencia_login
+from .dashboard import cache_dashboard
+from .veiculos import cache_placas
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Administração"],
+    dependencies=[Depends(security.require_role(["ADMIN"]))]
+)
+
+@router.get("/pool")
+async def ver_pool():
+    # conexões em uso/ociosas/overflow agora + espera acumulada dos checkouts
+    return status_pool()
+
+
+@router.get("/login")
+async def ver_login():
+    # latência do /auth/token por resultado e uso do pool de bcrypt
+    return {
+        "login": latencia_login.resumo(),
+        "espera_fila": hashing.espera_fila.resumo(),
+        "bcrypt": hashing.duracao_hash.resumo(),
+        "rejeicoes": {op: n for (op,), n in hashing.rejeicoes.valores().items()},
+    }
+
+@router.get("/caches")
+async def ver_caches():
+    # itens, hits e misses de cada cache em memória deste worker
+    return {
+        "principais": security.cache_principais.estatisticas(),
+        "dashboard": cache_dashboard.estatisticas(),
+        "placas": cache_placas.estatisticas(),
+        "referencias": referencias.estatisticas(),
+    }
+
+@router.get("/tarefas")
+async def ver_tarefas(db: AsyncSession = Depends(get_db)):
+    # pendentes/falhas por tipo e os erros das últimas que esgotaram as tentativas
+    return await fila.situacao(db)
@@ -1,37 +1,67 @@
+import time
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from .. import models, schemas, security
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import hashing, models, schemas, security
 from ..database import get_db
+from ..metricas import Histograma
 
 router = APIRouter(prefix="/auth", tags=["Autenticação"])
 
+latencia_login = Histograma("login_duracao_segundos", "Latência de /auth/token", ["resultado"])
+
+def _fila_cheia():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Muitos logins simultâneos, tente novamente em instantes",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/token", response_model=schemas.Token)
-def login_para_acesso(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.Usuario).filter(models.Usuario.username == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.password_hash):
+async def login_para_acesso(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    inicio = time.perf_counter()
+    user = await db.scalar(select(models.Usuario).where(models.Usuario.username == form_data.username))
+    senha_ok, novo_hash = False, None
+    if user:
+        try:
+            senha_ok, novo_hash = await hashing.verificar_senha(form_data.password, user.password_hash)
+        except hashing.HashingSobrecarregado:
+            latencia_login.observar(time.perf_counter() - inicio, resultado="sobrecarga")
+            raise _fila_cheia()
+    if not senha_ok:
+        latencia_login.observar(time.perf_counter() - inicio, resultado="falha")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    # Hash com custo antigo (BCRYPT_ROUNDS mudou): regrava com o custo atual
+    if novo_hash:
+        user.password_hash = novo_hash
+        await db.commit()
+
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
         data={"sub": user.username, "role": user.role},
         expires_delta=access_token_expires
     )
+    latencia_login.observar(time.perf_counter() - inicio, resultado="sucesso")
     return {"access_token": access_token, "token_type": "bearer"}
 
 # Rota para criar o primeiro usuário (admin) - Em prod, deve ser protegida ou removida
 @router.post("/registrar", response_model=schemas.UsuarioResponse)
-def registrar_usuario(usuario: schemas.UsuarioCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.Usuario).filter(models.Usuario.username == usuario.username).first()
+async def registrar_usuario(usuario: schemas.UsuarioCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await db.scalar(select(models.Usuario).where(models.Usuario.username == usuario.username))
     if db_user:
         raise HTTPException(status_code=400, detail="Username já registrado")
     
-    hashed_password = security.get_password_hash(usuario.password)
+    try:
+        hashed_password = await hashing.gerar_hash(usuario.password)
+    except hashing.HashingSobrecarregado:
+        raise _fila_cheia()
     novo_usuario = models.Usuario(
         username=usuario.username,
         password_hash=hashed_password,
@@ -39,6 +69,7 @@ def registrar_usuario(usuario: schemas.UsuarioCreate, db: Session = Depends(get_
         is_active=usuario.is_active
     )
     db.add(novo_usuario)
-    db.commit()
-    db.refresh(novo_usuario)
+    await db.commit()
+    await db.refresh(novo_usuario)
+    security.invalidar_principal(novo_usuario.username)
     return novo_usuario
\ No newline at end of file
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas, security
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from .. import models, schemas, security, paginacao, busca, rastreio, respostas
 from ..database import get_db
 
 router = APIRouter(
@@ -11,34 +12,34 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.ClienteResponse)
-def criar_cliente(cliente: schemas.ClienteCreate, db: Session = Depends(get_db)):
-    if db.query(models.Cliente).filter(models.Cliente.cpf_cnpj == cliente.cpf_cnpj).first():
+async def criar_cliente(cliente: schemas.ClienteCreate, db: AsyncSession = Depends(get_db)):
+    if await db.scalar(select(models.Cliente).where(models.Cliente.cpf_cnpj == cliente.cpf_cnpj)):
         raise HTTPException(status_code=400, detail="CPF/CNPJ já cadastrado")
     
     try:
         db_cliente = models.Cliente(**cliente.model_dump())
         db.add(db_cliente)
-        db.commit()
-        db.refresh(db_cliente)
+        await db.commit()
+        await db.refresh(db_cliente)
         return db_cliente
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.delete("/{cliente_id}")
-def deletar_cliente(cliente_id: int, db: Session = Depends(get_db)):
-    cliente = db.query(models.Cliente).filter(models.Cliente.id == cliente_id).first()
+async def deletar_cliente(cliente_id: int, db: AsyncSession = Depends(get_db)):
+    cliente = await db.scalar(select(models.Cliente).where(models.Cliente.id == cliente_id))
     if not cliente: raise HTTPException(404, "Cliente não encontrado")
     
     # erro de chave estrangeira se tiver veiculo
     # isso ou deletar em cascata
-    db.delete(cliente)
-    db.commit()
+    await db.delete(cliente)
+    await db.commit()
     return {"message": "Cliente removido"}
 
 @router.put("/{cliente_id}")
-def atualizar_cliente(cliente_id: int, dados: schemas.ClienteCreate, db: Session = Depends(get_db)):
-    cliente = db.query(models.Cliente).filter(models.Cliente.id == cliente_id).first()
+async def atualizar_cliente(cliente_id: int, dados: schemas.ClienteCreate, db: AsyncSession = Depends(get_db)):
+    cliente = await db.scalar(select(models.Cliente).where(models.Cliente.id == cliente_id))
     if not cliente: raise HTTPException(404, "Cliente não encontrado")
     
     cliente.nome = dados.nome
@@ -46,24 +47,53 @@ def atualizar_cliente(cliente_id: int, dados: schemas.ClienteCreate, db: Session
     cliente.cpf_cnpj = dados.cpf_cnpj
     cliente.endereco = dados.endereco
     
-    db.commit()
+    await db.commit()
     return cliente
 
 @router.get("/", response_model=List[schemas.ClienteResponse])
-def listar_clientes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@rastreio.orcamento(3)
+async def listar_clientes(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    ordem: Literal["id", "nome"] = "id",
+    nome: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
     # deveria retornar apenas o objeto ClienteResponse, não uma List
-    return db.query(models.Cliente).offset(skip).limit(limit).all()
+    stmt = select(*respostas.colunas(schemas.ClienteResponse, models.Cliente))
+    if nome:
+        # prefixo sobre lower(nome): usa o índice ix_cliente_nome_lower; % e _ digitados valem literais
+        stmt = stmt.where(func.lower(models.Cliente.nome).like(f"{busca.escapar_like(nome.lower())}%", escape="\\"))
+
+    colunas = [models.Cliente.id] if ordem == "id" else [models.Cliente.nome, models.Cliente.id]
+    itens = await paginacao.paginar(
+        db, stmt, response, colunas,
+        cursor=cursor, skip=skip, limit=limit, ordem=ordem, linhas=True,
+    )
+    return respostas.resposta(itens, response)
+
+@router.get("/busca", response_model=List[schemas.ClienteResponse])
+@rastreio.orcamento(2)
+async def buscar_clientes(
+    q: str = Query(..., min_length=1, max_length=100),
+    limite: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    # nome, CPF/CNPJ ou telefone (com ou sem máscara) ou placa de um veículo; ordem = relevância
+    return await busca.buscar_clientes(db, q, limite)
 
 @router.get("/{cliente_id}", response_model=List[schemas.ClienteResponse])
-def listar_cliente(cliente_id: int, db: Session = Depends(get_db)):
-    clientes = db.query(models.Cliente).filter(models.Cliente.id == cliente_id).all()
+async def listar_cliente(cliente_id: int, db: AsyncSession = Depends(get_db)):
+    clientes = (await db.scalars(select(models.Cliente).where(models.Cliente.id == cliente_id))).all()
     if not clientes:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     return clientes
 
 @router.get("/{cliente_id}/veiculos", response_model=List[schemas.VeiculoResponse])
-def listar_veiculos_do_cliente(cliente_id: int, db: Session = Depends(get_db)):
-    if not db.query(models.Cliente).filter(models.Cliente.id == cliente_id).first():
+async def listar_veiculos_do_cliente(cliente_id: int, db: AsyncSession = Depends(get_db)):
+    if not await db.scalar(select(models.Cliente).where(models.Cliente.id == cliente_id)):
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
         
-    return db.query(models.Veiculo).filter(models.Veiculo.cliente_id == cliente_id).all()
\ No newline at end of file
+    return (await db.scalars(select(models.Veiculo).where(models.Veiculo.cliente_id == cliente_id))).all()
\ No newline at end of file
@@ -0,0 +1,105 @@
+from datetime import date
+from itertools import chain
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import models, schemas, security, resumo, rastreio, status_os
+from ..cache import CacheTTL
+from ..config import settings
+from ..database import get_db
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"],
+    dependencies=[Depends(security.get_current_user)]
+)
+
+# (data_inicio, data_fim) -> dict da resposta
+cache_dashboard = CacheTTL(ttl=settings.dashboard_cache_ttl, max_itens=64)
+
+# Escrita nestes modelos muda algum número do dashboard
+_MODELOS = (models.OrdemServico, models.Pagamento, models.Despesa, models.Cliente)
+
+@event.listens_for(Session, "after_flush")
+def _marcar_alteracao(sessao, contexto):
+    if any(isinstance(obj, _MODELOS) for obj in chain(sessao.new, sessao.dirty, sessao.deleted)):
+        sessao.info["dashboard_alterado"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(sessao):
+    if sessao.info.pop("dashboard_alterado", False):
+        cache_dashboard.limpar()
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_marca(sessao):
+    sessao.info.pop("dashboard_alterado", None)
+
+async def _calcular(db: AsyncSession, inicio: date, fim: date) -> dict:
+    OS = models.OrdemServico
+    # mesmo predicado dos índices parciais de OS em aberto
+    aberta = OS.status.in_(status_os.ABERTOS)
+
+    por_status = dict((await db.execute(
+        select(OS.status, func.count()).where(aberta).group_by(OS.status)
+    )).all())
+
+    # Contagens do período numa ida ao banco, cada uma pelo seu índice
+    contagens = (await db.execute(select(
+        select(func.count(OS.veiculo_id.distinct())).where(aberta).scalar_subquery(),
+        select(func.count()).select_from(OS).where(OS.data_abertura.between(inicio, fim)).scalar_subquery(),
+        select(func.count()).select_from(OS).where(OS.data_fechamento.between(inicio, fim)).scalar_subquery(),
+        select(func.count(OS.cliente_id.distinct())).where(OS.data_abertura.between(inicio, fim)).scalar_subquery(),
+        select(func.count()).select_from(models.Cliente).scalar_subquery(),
+    ))).one()
+
+    # Valores vêm do resumo diário (ver app/resumo.py)
+    R = models.ResumoDiario
+    receita_dia = (await db.execute(
+        select(R.dia, func.sum(R.valor))
+        .where(R.tipo == resumo.RECEITA, R.dia.between(inicio, fim))
+        .group_by(R.dia)
+        .order_by(R.dia)
+    )).all()
+    faturamento_total, despesas_periodo = (await db.execute(select(
+        select(func.sum(R.valor)).where(R.tipo == resumo.RECEITA).scalar_subquery(),
+        select(func.sum(R.valor)).where(R.tipo == resumo.DESPESA, R.dia.between(inicio, fim)).scalar_subquery(),
+    ))).one()
+
+    receita_por_dia = [{"dia": dia, "valor": float(valor)} for dia, valor in receita_dia if valor]
+    return {
+        "data_inicio": inicio,
+        "data_fim": fim,
+        "os_abertas": sum(por_status.values()),
+        "os_abertas_por_status": por_status,
+        "veiculos_na_oficina": contagens[0],
+        "os_abertas_periodo": contagens[1],
+        "os_fechadas_periodo": contagens[2],
+        "clientes_ativos": contagens[3],
+        "total_clientes": contagens[4],
+        "faturamento_total": float(faturamento_total or 0),
+        "faturamento_periodo": sum(r["valor"] for r in receita_por_dia),
+        "despesas_periodo": float(despesas_periodo or 0),
+        "receita_por_dia": receita_por_dia,
+    }
+
+@router.get("/", response_model=schemas.DashboardResponse)
+@rastreio.orcamento(5)
+async def obter_dashboard(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    # Padrão: mês corrente até hoje
+    fim = data_fim or date.today()
+    inicio = data_inicio or fim.replace(day=1)
+    if inicio > fim:
+        raise HTTPException(400, "data_inicio maior que data_fim")
+
+    chave = (inicio, fim)
+    dados = cache_dashboard.get(chave)
+    if dados is None:
+        dados = await _calcular(db, inicio, fim)
+        cache_dashboard.set(chave, dados)
+    return dados
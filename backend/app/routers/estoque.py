@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas, security
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from .. import models, schemas, security, paginacao, movimentos, importacao, versoes, referencias, rastreio, respostas, busca
 from ..database import get_db
 
 router = APIRouter(
@@ -14,103 +15,224 @@ router = APIRouter(
 # =======================
 
 @router.post("/pecas/", response_model=schemas.PecaResponse)
-def criar_peca(peca: schemas.PecaCreate, db: Session = Depends(get_db)):
-    if db.query(models.Peca).filter(models.Peca.codigo == peca.codigo).first():
+async def criar_peca(peca: schemas.PecaCreate, db: AsyncSession = Depends(get_db)):
+    if await db.scalar(select(models.Peca).where(models.Peca.codigo == peca.codigo)):
         raise HTTPException(400, "Código da peça já existe")
     
     try:
         db_peca = models.Peca(**peca.model_dump())
         db.add(db_peca)
-        db.commit()
-        db.refresh(db_peca)
+        await db.flush()
+        # Saldo inicial já entra no snapshot: o movimento nasce compactado
+        if db_peca.estoque_atual:
+            await movimentos.registrar(db, [movimentos.movimento(
+                db_peca.id, movimentos.ENTRADA, db_peca.estoque_atual,
+                observacao="Estoque inicial", compactado=True,
+            )])
+        await versoes.incrementar(db, versoes.PECA)
+        await db.commit()
+        await db.refresh(db_peca)
         return db_peca
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(500, str(e))
 
-@router.get("/pecas/", response_model=List[schemas.PecaResponse])
-def listar_pecas(db: Session = Depends(get_db)):
-    return db.query(models.Peca).all()
+@router.post("/pecas/importar", response_model=schemas.ResultadoImportacao,
+             dependencies=[Depends(security.require_role(["ADMIN"]))])
+async def importar_pecas(request: Request, formato: Optional[Literal["csv", "ndjson"]] = None, db: AsyncSession = Depends(get_db)):
+    """Corpo da requisição é o arquivo (CSV com cabeçalho ou NDJSON), lido em streaming."""
+    formato = formato or importacao.formato_do_content_type(request.headers.get("content-type"))
+    return await importacao.importar(db, "pecas", request.stream(), formato)
+
+@router.get("/pecas/", response_model=List[schemas.PecaResponse],
+            dependencies=[Depends(versoes.condicional(versoes.PECA))])
+@rastreio.orcamento(4)
+async def listar_pecas(
+    response: Response,
+    q: Optional[str] = None,
+    ordenar: str = "nome",
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt = select(*respostas.colunas(schemas.PecaResponse, models.Peca, estoque_atual=models.Peca.estoque_disponivel))
+    if q:
+        termo = busca.escapar_like(q)
+        stmt = stmt.where(or_(models.Peca.nome.ilike(f"%{termo}%", escape="\\"), models.Peca.codigo.ilike(f"{termo}%", escape="\\")))
+
+    ordenacao = paginacao.resolver_ordenacao(ordenar, {
+        "id": models.Peca.id,
+        "nome": models.Peca.nome,
+        "codigo": models.Peca.codigo,
+        "valor_venda": models.Peca.valor_venda,
+        "estoque_atual": models.Peca.estoque_disponivel,
+    }, models.Peca.id)
+    itens = await paginacao.listar_pagina(db, stmt, response, ordenacao, skip, limit, linhas=True)
+    return respostas.resposta(itens, response)
 
 @router.put("/pecas/{id}", response_model=schemas.PecaResponse)
-def atualizar_peca(id: int, peca: schemas.PecaCreate, db: Session = Depends(get_db)):
-    db_peca = db.query(models.Peca).filter(models.Peca.id == id).first()
+async def atualizar_peca(id: int, peca: schemas.PecaUpdate, db: AsyncSession = Depends(get_db)):
+    db_peca = await db.scalar(select(models.Peca).where(models.Peca.id == id))
     if not db_peca:
         raise HTTPException(404, "Peça não encontrada")
     
     # Verifica se código duplicado (se mudou o código)
     if peca.codigo != db_peca.codigo:
-        if db.query(models.Peca).filter(models.Peca.codigo == peca.codigo).first():
+        if await db.scalar(select(models.Peca).where(models.Peca.codigo == peca.codigo)):
             raise HTTPException(400, "Novo código já está em uso por outra peça")
 
     db_peca.nome = peca.nome
     db_peca.codigo = peca.codigo
     db_peca.valor_venda = peca.valor_venda
-    db_peca.estoque_atual = peca.estoque_atual
-    
-    db.commit()
-    db.refresh(db_peca)
+
+    # Quantidade alterada na tela vira um AJUSTE (o snapshot só muda na
+    # compactação), desde que o estoque ainda seja o que o formulário mostrou:
+    # uma venda ou devolução no meio do caminho não é desfeita, vira 409
+    if peca.estoque_atual is not None and peca.estoque_atual != peca.estoque_anterior:
+        if peca.estoque_anterior is None:
+            raise HTTPException(400, "Informe estoque_anterior (o estoque exibido no formulário)")
+        disponivel = (await movimentos.travar_pecas(db, [id]))[id]
+        if disponivel != peca.estoque_anterior:
+            raise HTTPException(409, f"O estoque mudou desde que o formulário foi aberto. Disponível agora: {disponivel}")
+        await movimentos.registrar(db, [movimentos.movimento(
+            id, movimentos.AJUSTE, peca.estoque_atual - disponivel, observacao="Ajuste manual",
+        )])
+
+    await versoes.incrementar(db, versoes.PECA)
+    await referencias.notificar(db, "peca", id)
+    await db.commit()
+    await db.refresh(db_peca)
     return db_peca
 
 @router.delete("/pecas/{id}")
-def remover_peca(id: int, db: Session = Depends(get_db)):
-    db_peca = db.query(models.Peca).filter(models.Peca.id == id).first()
+async def remover_peca(id: int, db: AsyncSession = Depends(get_db)):
+    db_peca = await db.scalar(select(models.Peca).where(models.Peca.id == id))
     if not db_peca:
         raise HTTPException(404, "Peça não encontrada")
     
     try:
-        db.delete(db_peca)
-        db.commit()
+        await db.delete(db_peca)
+        await versoes.incrementar(db, versoes.PECA)
+        await referencias.notificar(db, "peca", id)
+        await db.commit()
         return {"message": "Peça removida com sucesso"}
     except Exception as e:
-        db.rollback()
-        # O banco vai bloquear se a peça estiver sendo usada em alguma OS
-        raise HTTPException(400, "Não é possível excluir: Peça utilizada em Ordens de Serviço.")
+        await db.rollback()
+        # O banco bloqueia se a peça estiver em alguma OS ou tiver movimentos
+        # de estoque (o histórico não é apagado junto)
+        raise HTTPException(400, "Não é possível excluir: Peça utilizada em Ordens de Serviço ou com movimentos de estoque.")
+
+@router.post("/pecas/{id}/movimentos", response_model=schemas.MovimentoEstoqueResponse)
+async def registrar_movimento(id: int, payload: schemas.MovimentoEstoqueCreate, db: AsyncSession = Depends(get_db)):
+    if payload.quantidade == 0 or (payload.tipo == movimentos.ENTRADA and payload.quantidade < 0):
+        raise HTTPException(400, "Quantidade inválida para este tipo de movimento")
+
+    if payload.quantidade < 0:
+        disponivel = (await movimentos.travar_pecas(db, [id])).get(id)
+    else:
+        disponivel = await movimentos.disponivel(db, id)
+    if disponivel is None:
+        raise HTTPException(404, "Peça não encontrada")
+    if disponivel + payload.quantidade < 0:
+        raise HTTPException(400, f"Estoque insuficiente. Disponível: {disponivel}")
+
+    mov = models.MovimentoEstoque(**movimentos.movimento(id, payload.tipo, payload.quantidade, observacao=payload.observacao))
+    db.add(mov)
+    await db.commit()
+    await db.refresh(mov)
+    return mov
+
+@router.get("/pecas/{id}/movimentos", response_model=List[schemas.MovimentoEstoqueResponse])
+async def listar_movimentos(
+    id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    # Histórico da peça, mais recentes primeiro
+    M = models.MovimentoEstoque
+    stmt = select(M).where(M.peca_id == id)
+    return await paginacao.paginar(
+        db, stmt, response, [M.id],
+        cursor=cursor, skip=skip, limit=limit, descendente=True, ordem="id",
+    )
 
 # =======================
 # --- SERVIÇOS ---
 # =======================
 
 @router.post("/servicos/", response_model=schemas.ServicoResponse)
-def criar_servico(servico: schemas.ServicoCreate, db: Session = Depends(get_db)):
+async def criar_servico(servico: schemas.ServicoCreate, db: AsyncSession = Depends(get_db)):
     try:
         db_servico = models.Servico(**servico.model_dump())
         db.add(db_servico)
-        db.commit()
-        db.refresh(db_servico)
+        await versoes.incrementar(db, versoes.SERVICO)
+        await db.commit()
+        await db.refresh(db_servico)
         return db_servico
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(500, str(e))
 
-@router.get("/servicos/", response_model=List[schemas.ServicoResponse])
-def listar_servicos(db: Session = Depends(get_db)):
-    return db.query(models.Servico).all()
+@router.post("/servicos/importar", response_model=schemas.ResultadoImportacao,
+             dependencies=[Depends(security.require_role(["ADMIN"]))])
+async def importar_servicos(request: Request, formato: Optional[Literal["csv", "ndjson"]] = None, db: AsyncSession = Depends(get_db)):
+    formato = formato or importacao.formato_do_content_type(request.headers.get("content-type"))
+    return await importacao.importar(db, "servicos", request.stream(), formato)
+
+@router.get("/servicos/", response_model=List[schemas.ServicoResponse],
+            dependencies=[Depends(versoes.condicional(versoes.SERVICO))])
+async def listar_servicos(
+    response: Response,
+    q: Optional[str] = None,
+    ordenar: str = "descricao",
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt = select(*respostas.colunas(schemas.ServicoResponse, models.Servico))
+    if q:
+        stmt = stmt.where(models.Servico.descricao.ilike(f"%{busca.escapar_like(q)}%", escape="\\"))
+
+    ordenacao = paginacao.resolver_ordenacao(ordenar, {
+        "id": models.Servico.id,
+        "descricao": models.Servico.descricao,
+        "valor_mao_obra": models.Servico.valor_mao_obra,
+        "tempo_estimado_minutos": models.Servico.tempo_estimado_minutos,
+    }, models.Servico.id)
+    itens = await paginacao.listar_pagina(db, stmt, response, ordenacao, skip, limit, linhas=True)
+    return respostas.resposta(itens, response)
 
 @router.put("/servicos/{id}", response_model=schemas.ServicoResponse)
-def atualizar_servico(id: int, servico: schemas.ServicoCreate, db: Session = Depends(get_db)):
-    db_servico = db.query(models.Servico).filter(models.Servico.id == id).first()
+async def atualizar_servico(id: int, servico: schemas.ServicoCreate, db: AsyncSession = Depends(get_db)):
+    db_servico = await db.scalar(select(models.Servico).where(models.Servico.id == id))
     if not db_servico:
         raise HTTPException(404, "Serviço não encontrado")
 
     db_servico.descricao = servico.descricao
     db_servico.valor_mao_obra = servico.valor_mao_obra
     # Se tiver tempo estimado no schema, atualize aqui também
-    
-    db.commit()
-    db.refresh(db_servico)
+
+    await versoes.incrementar(db, versoes.SERVICO)
+    await referencias.notificar(db, "servico", id)
+    await db.commit()
+    await db.refresh(db_servico)
     return db_servico
 
 @router.delete("/servicos/{id}")
-def remover_servico(id: int, db: Session = Depends(get_db)):
-    db_servico = db.query(models.Servico).filter(models.Servico.id == id).first()
+async def remover_servico(id: int, db: AsyncSession = Depends(get_db)):
+    db_servico = await db.scalar(select(models.Servico).where(models.Servico.id == id))
     if not db_servico:
         raise HTTPException(404, "Serviço não encontrado")
     
     try:
-        db.delete(db_servico)
-        db.commit()
+        await db.delete(db_servico)
+        await versoes.incrementar(db, versoes.SERVICO)
+        await referencias.notificar(db, "servico", id)
+        await db.commit()
         return {"message": "Serviço removido com sucesso"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(400, "Não é possível excluir: Serviço utilizado em Ordens de Serviço.")
\ No newline at end of file
@@ -1,9 +1,9 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
-from .. import models, schemas, security
+from .. import models, schemas, security, totais, paginacao, resumo, exportacao, respostas, status_os, fila, busca
 from ..database import get_db
 
 router = APIRouter(
@@ -13,77 +13,189 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.PagamentoResponse)
-def registrar_pagamento(pagamento: schemas.PagamentoCreate, db: Session = Depends(get_db)):
-    os = db.query(models.OrdemServico).filter(models.OrdemServico.id == pagamento.ordem_servico_id).first()
+async def registrar_pagamento(pagamento: schemas.PagamentoCreate, db: AsyncSession = Depends(get_db)):
+    os = await db.scalar(select(models.OrdemServico).where(models.OrdemServico.id == pagamento.ordem_servico_id))
     if not os: raise HTTPException(404, "OS não encontrada")
 
     try:
         novo_pagamento = models.Pagamento(**pagamento.model_dump())
         db.add(novo_pagamento)
-        db.flush()
+        await db.flush()
 
-        total_pecas = sum(i.quantidade * float(i.valor_unitario) for i in os.itens_pecas)
-        total_servicos = sum(i.quantidade * float(i.valor_unitario) for i in os.itens_servicos)
-        total_pago = sum(float(p.valor) for p in os.pagamentos) + float(novo_pagamento.valor)
-        
-        total_geral = total_pecas + total_servicos
+        # Totais mantidos na própria OS: não precisa recarregar itens e pagamentos
+        novos_totais = await totais.aplicar_delta(db, os.id, pago=pagamento.valor)
+        await resumo.somar_pagamento(db, novo_pagamento.id)
 
-        if total_pago >= (total_geral - 0.01):
-            if os.status != "FINALIZADO":
-                os.status = "FINALIZADO"
-                os.data_fechamento = date.today()
+        # o fechamento vai para a fila e só existe se este commit acontecer
+        if totais.os_quitada(novos_totais.saldo_devedor) and os.status in status_os.ABERTOS:
+            fila.enfileirar(db, "fechar_os_quitada", os_id=os.id)
         
-        db.commit()
-        db.refresh(novo_pagamento)
+        await db.commit()
+        await db.refresh(novo_pagamento)
         return novo_pagamento
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
+@fila.tarefa("fechar_os_quitada")
+async def fechar_os_quitada(db: AsyncSession, os_id: int):
+    # quitada fecha a partir de qualquer estado aberto; cancelada continua cancelada.
+    # Confere de novo: um estorno ou item novo pode ter chegado antes do worker
+    os = await db.scalar(
+        select(models.OrdemServico).where(models.OrdemServico.id == os_id).with_for_update()
+    )
+    if os and os.status in status_os.ABERTOS and totais.os_quitada(os.saldo_devedor):
+        status_os.fechar(os)
+        await db.flush()
+
+def _filtrar_pagamentos(stmt, data_inicio, data_fim, forma_pagamento, ordem_servico_id):
+    if data_inicio:
+        stmt = stmt.where(models.Pagamento.data_pagamento >= data_inicio)
+    if data_fim:
+        stmt = stmt.where(models.Pagamento.data_pagamento <= data_fim)
+    if forma_pagamento:
+        stmt = stmt.where(models.Pagamento.forma_pagamento == forma_pagamento)
+    if ordem_servico_id:
+        stmt = stmt.where(models.Pagamento.ordem_servico_id == ordem_servico_id)
+    return stmt
+
 @router.get("/", response_model=List[schemas.PagamentoResponse])
-def listar_pagamentos(db: Session = Depends(get_db)):
-    return db.query(models.Pagamento).order_by(models.Pagamento.data_pagamento.desc()).all()
+async def listar_pagamentos(
+    response: Response,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    forma_pagamento: Optional[str] = None,
+    ordem_servico_id: Optional[int] = None,
+    ordenar: str = "-data_pagamento",
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    colunas = respostas.colunas(schemas.PagamentoResponse, models.Pagamento)
+    stmt = _filtrar_pagamentos(select(*colunas), data_inicio, data_fim, forma_pagamento, ordem_servico_id)
+
+    ordenacao = paginacao.resolver_ordenacao(ordenar, {
+        "id": models.Pagamento.id,
+        "data_pagamento": models.Pagamento.data_pagamento,
+        "valor": models.Pagamento.valor,
+    }, models.Pagamento.id)
+    itens = await paginacao.listar_pagina(db, stmt, response, ordenacao, skip, limit, linhas=True)
+    return respostas.resposta(itens, response)
+
+@router.get("/exportar")
+async def exportar_pagamentos(
+    formato: exportacao.Formato = "csv",
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    forma_pagamento: Optional[str] = None,
+    ordem_servico_id: Optional[int] = None,
+):
+    P = models.Pagamento
+    stmt = _filtrar_pagamentos(
+        select(P.id, P.ordem_servico_id, P.data_pagamento, P.valor, P.forma_pagamento, P.parcela, P.observacao),
+        data_inicio, data_fim, forma_pagamento, ordem_servico_id,
+    ).order_by(P.data_pagamento, P.id)
+    return exportacao.resposta(stmt, formato, exportacao.nome_arquivo("pagamentos", data_inicio, data_fim))
 
 @router.get("/resumo", response_model=schemas.ResumoFinanceiro)
-def obter_resumo(db: Session = Depends(get_db)):
-    valor_receitas = db.query(func.sum(models.Pagamento.valor)).scalar()
-    receitas = float(valor_receitas) if valor_receitas else 0.0
-    
-    valor_despesas = db.query(func.sum(models.Despesa.valor)).scalar()
-    despesas = float(valor_despesas) if valor_despesas else 0.0
-    
-    saldo = receitas - despesas
-
-    return {
-        "total_receitas": receitas,
-        "total_despesas": despesas,
-        "saldo": saldo
-    }
+async def obter_resumo(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    # Lê resumo_diario (linhas por dia), não as tabelas de lançamentos
+    return await resumo.consultar(db, data_inicio, data_fim)
 
 # --- ROTAS DE DESPESAS (SAÍDAS) ---
 @router.post("/despesas/", response_model=schemas.DespesaResponse)
-def registrar_despesa(despesa: schemas.DespesaCreate, db: Session = Depends(get_db)):
+async def registrar_despesa(despesa: schemas.DespesaCreate, db: AsyncSession = Depends(get_db)):
     nova_despesa = models.Despesa(**despesa.model_dump())
     if despesa.status == "PAGO":
         nova_despesa.data_pagamento = date.today()
         
     db.add(nova_despesa)
-    db.commit()
-    db.refresh(nova_despesa)
+    await db.flush()
+    await resumo.somar_despesa(db, nova_despesa.id)
+    await db.commit()
+    await db.refresh(nova_despesa)
     return nova_despesa
 
+def _filtrar_despesas(stmt, data_inicio, data_fim, categoria, status, q):
+    if data_inicio:
+        stmt = stmt.where(models.Despesa.data_vencimento >= data_inicio)
+    if data_fim:
+        stmt = stmt.where(models.Despesa.data_vencimento <= data_fim)
+    if categoria:
+        stmt = stmt.where(models.Despesa.categoria == categoria)
+    if status:
+        stmt = stmt.where(models.Despesa.status == status)
+    if q:
+        stmt = stmt.where(models.Despesa.descricao.ilike(f"%{busca.escapar_like(q)}%", escape="\\"))
+    return stmt
+
 @router.get("/despesas/", response_model=List[schemas.DespesaResponse])
-def listar_despesas(db: Session = Depends(get_db)):
-    return db.query(models.Despesa).order_by(models.Despesa.data_vencimento.desc()).all()
+async def listar_despesas(
+    response: Response,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    categoria: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    ordenar: str = "-data_vencimento",
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    colunas = respostas.colunas(schemas.DespesaResponse, models.Despesa)
+    stmt = _filtrar_despesas(select(*colunas), data_inicio, data_fim, categoria, status, q)
+
+    ordenacao = paginacao.resolver_ordenacao(ordenar, {
+        "id": models.Despesa.id,
+        "data_vencimento": models.Despesa.data_vencimento,
+        "data_pagamento": models.Despesa.data_pagamento,
+        "valor": models.Despesa.valor,
+    }, models.Despesa.id)
+    itens = await paginacao.listar_pagina(db, stmt, response, ordenacao, skip, limit, linhas=True)
+    return respostas.resposta(itens, response)
+
+@router.get("/despesas/exportar")
+async def exportar_despesas(
+    formato: exportacao.Formato = "csv",
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    categoria: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+):
+    D = models.Despesa
+    stmt = _filtrar_despesas(
+        select(D.id, D.descricao, D.categoria, D.valor, D.data_vencimento, D.data_pagamento, D.status),
+        data_inicio, data_fim, categoria, status, q,
+    ).order_by(D.data_vencimento, D.id)
+    return exportacao.resposta(stmt, formato, exportacao.nome_arquivo("despesas", data_inicio, data_fim))
 
 @router.delete("/despesas/{id}")
-def remover_despesa(id: int, db: Session = Depends(get_db), current_user: models.Usuario = Depends(security.require_role(["ADMIN"]))):
-    despesa = db.query(models.Despesa).filter(models.Despesa.id == id).first()
+async def remover_despesa(id: int, db: AsyncSession = Depends(get_db), current_user: security.Principal = Depends(security.require_role(["ADMIN"]))):
+    despesa = await db.scalar(select(models.Despesa).where(models.Despesa.id == id))
     if not despesa: raise HTTPException(404, "Despesa não encontrada")
 
-    print(f"Auditoria: Usuário {current_user.username} (ID: {current_user.id}) está removendo a despesa {id}")
+    fila.enfileirar(
+        db, "auditar_remocao_despesa",
+        usuario=current_user.username, usuario_id=current_user.id,
+        despesa_id=despesa.id, descricao=despesa.descricao, valor=float(despesa.valor),
+    )
+    await resumo.somar_despesa(db, despesa.id, sinal=-1)
+    await db.delete(despesa)
+    await db.commit()
+    return {"message": "Removido"}
 
-    db.delete(despesa)
-    db.commit()
-    return {"message": "Removido"}
\ No newline at end of file
+@fila.tarefa("auditar_remocao_despesa")
+async def auditar_remocao_despesa(db: AsyncSession, usuario: str, usuario_id: int, despesa_id: int, descricao: str, valor: float):
+    # só registra remoções que de fato fizeram commit; a linha entra no mesmo
+    # commit que tira a tarefa da fila, então não duplica
+    db.add(models.Auditoria(
+        acao="REMOVER_DESPESA", usuario_id=usuario_id, usuario=usuario,
+        dados={"despesa_id": despesa_id, "descricao": descricao, "valor": valor},
+    ))
+    await db.flush()
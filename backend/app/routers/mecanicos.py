@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from .. import models, schemas, security
+from .. import models, schemas, security, versoes
 from ..database import get_db
 
 router = APIRouter(
@@ -10,17 +11,19 @@ router = APIRouter(
     dependencies=[Depends(security.get_current_user)])
 
 @router.post("/", response_model=schemas.MecanicoResponse)
-def criar_mecanico(mecanico: schemas.MecanicoCreate, db: Session = Depends(get_db)):
+async def criar_mecanico(mecanico: schemas.MecanicoCreate, db: AsyncSession = Depends(get_db)):
     try:
         db_mecanico = models.Mecanico(**mecanico.model_dump())
         db.add(db_mecanico)
-        db.commit()
-        db.refresh(db_mecanico)
+        await versoes.incrementar(db, versoes.MECANICO)
+        await db.commit()
+        await db.refresh(db_mecanico)
         return db_mecanico
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=List[schemas.MecanicoResponse])
-def listar_mecanicos(db: Session = Depends(get_db)):
-    return db.query(models.Mecanico).all()
\ No newline at end of file
+@router.get("/", response_model=List[schemas.MecanicoResponse],
+            dependencies=[Depends(versoes.condicional(versoes.MECANICO))])
+async def listar_mecanicos(db: AsyncSession = Depends(get_db)):
+    return (await db.scalars(select(models.Mecanico))).all()
\ No newline at end of file
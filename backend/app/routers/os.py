@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import date
-from .. import models, schemas, security
+from decimal import Decimal
+from .. import models, schemas, security, consultas, totais, paginacao, movimentos, exportacao, referencias, rastreio, respostas, status_os
 from ..database import get_db
 
 router = APIRouter(
@@ -12,12 +15,12 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.OSResponse)
-def abrir_os(os_data: schemas.OSCreate, db: Session = Depends(get_db)):
-    veiculo = db.query(models.Veiculo).filter(models.Veiculo.id == os_data.veiculo_id).first()
+async def abrir_os(os_data: schemas.OSCreate, db: AsyncSession = Depends(get_db)):
+    veiculo = await db.scalar(select(models.Veiculo).where(models.Veiculo.id == os_data.veiculo_id))
     if not veiculo:
         raise HTTPException(status_code=404, detail="Veículo não encontrado")
 
-    mecanico = db.query(models.Mecanico).filter(models.Mecanico.id == os_data.mecanico_id).first()
+    mecanico = await referencias.mecanico(db, os_data.mecanico_id)
     if not mecanico:
         raise HTTPException(status_code=404, detail="Mecânico não encontrado")
 
@@ -25,32 +28,131 @@ def abrir_os(os_data: schemas.OSCreate, db: Session = Depends(get_db)):
         nova_os = models.OrdemServico(
             **os_data.model_dump(),
             cliente_id=veiculo.cliente_id,
-            status="ORCAMENTO"
+            status=status_os.ORCAMENTO
         )
         
         db.add(nova_os)
-        db.commit()
-        db.refresh(nova_os)
+        await db.commit()
+        await db.refresh(nova_os)
         nova_os.numero_os = nova_os.id 
         
         return nova_os
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao abrir OS: {str(e)}")
 
+def _filtrar_os(stmt, status, cliente_id, veiculo_id, mecanico_id, data_inicio, data_fim):
+    OS = models.OrdemServico
+    if status:
+        stmt = stmt.where(OS.status == status_os.normalizar(status))
+    if cliente_id:
+        stmt = stmt.where(OS.cliente_id == cliente_id)
+    if veiculo_id:
+        stmt = stmt.where(OS.veiculo_id == veiculo_id)
+    if mecanico_id:
+        stmt = stmt.where(OS.mecanico_id == mecanico_id)
+    if data_inicio:
+        stmt = stmt.where(OS.data_abertura >= data_inicio)
+    if data_fim:
+        stmt = stmt.where(OS.data_abertura <= data_fim)
+    return stmt
+
 @router.get("/", response_model=List[schemas.OSResponse])
-def listar_os(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    lista_os = db.query(models.OrdemServico).offset(skip).limit(limit).all()
-    
-    for os in lista_os:
-        os.numero_os = os.id
-        
-    return lista_os
+@rastreio.orcamento(3)
+async def listar_os(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    cliente_id: Optional[int] = None,
+    veiculo_id: Optional[int] = None,
+    mecanico_id: Optional[int] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    OS = models.OrdemServico
+    colunas = respostas.colunas(schemas.OSResponse, OS, numero_os=OS.id)
+    stmt = _filtrar_os(select(*colunas), status, cliente_id, veiculo_id, mecanico_id, data_inicio, data_fim)
+
+    # Mais recentes primeiro; o cursor aponta para (data_abertura, id) da última linha
+    lista_os = await paginacao.paginar(
+        db, stmt, response, [OS.data_abertura, OS.id],
+        cursor=cursor, skip=skip, limit=limit, descendente=True, ordem="data_abertura", linhas=True,
+    )
+    return respostas.resposta(lista_os, response)
+
+@router.get("/quadro", response_model=schemas.OSQuadro)
+@rastreio.orcamento(2)
+async def quadro_os(
+    limite: int = Query(50, ge=1, le=500),
+    mecanico_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """OS em aberto agrupadas por status, numa consulta só.
+
+    O filtro status IN ABERTOS é o predicado dos índices parciais
+    (ix_ordem_servico_quadro, ix_ordem_servico_aberta_mecanico): o custo
+    acompanha as OS em aberto, não o histórico. Cada coluna traz as `limite`
+    OS mais antigas (a fila) e a contagem total do status."""
+    OS = models.OrdemServico
+    abertas = select(
+        OS.id, OS.status, OS.data_abertura, OS.defeito_reclamado, OS.veiculo_id, OS.mecanico_id, OS.saldo_devedor,
+        func.row_number().over(partition_by=OS.status, order_by=(OS.data_abertura, OS.id)).label("posicao"),
+        func.count().over(partition_by=OS.status).label("quantidade"),
+    ).where(OS.status.in_(status_os.ABERTOS))
+    if mecanico_id:
+        abertas = abertas.where(OS.mecanico_id == mecanico_id)
+    abertas = abertas.subquery()
+
+    linhas = (await db.execute(
+        select(abertas, models.Veiculo.placa, models.Veiculo.modelo, models.Mecanico.nome.label("mecanico"))
+        .join(models.Veiculo, models.Veiculo.id == abertas.c.veiculo_id)
+        .join(models.Mecanico, models.Mecanico.id == abertas.c.mecanico_id)
+        .where(abertas.c.posicao <= limite)
+        .order_by(abertas.c.status, abertas.c.posicao)
+    )).mappings().all()
+
+    colunas = {
+        status: {"status": status, "quantidade": 0, "transicoes": list(status_os.TRANSICOES[status]), "os": []}
+        for status in status_os.ABERTOS
+    }
+    for linha in linhas:
+        coluna = colunas[linha["status"]]
+        coluna["quantidade"] = linha["quantidade"]
+        coluna["os"].append({**linha, "numero_os": linha["id"]})
+    return {"total": sum(c["quantidade"] for c in colunas.values()), "colunas": list(colunas.values())}
+
+@router.get("/exportar")
+async def exportar_os(
+    formato: exportacao.Formato = "csv",
+    status: Optional[str] = None,
+    cliente_id: Optional[int] = None,
+    veiculo_id: Optional[int] = None,
+    mecanico_id: Optional[int] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+):
+    OS = models.OrdemServico
+    stmt = _filtrar_os(
+        select(
+            OS.id, OS.data_abertura, OS.data_fechamento, OS.status,
+            OS.cliente_id, models.Cliente.nome.label("cliente"), models.Veiculo.placa,
+            OS.mecanico_id, OS.km_atual, OS.defeito_reclamado,
+            OS.total_pecas, OS.total_servicos, OS.total_pago, OS.saldo_devedor,
+        )
+        .join(models.Cliente, models.Cliente.id == OS.cliente_id)
+        .join(models.Veiculo, models.Veiculo.id == OS.veiculo_id),
+        status, cliente_id, veiculo_id, mecanico_id, data_inicio, data_fim,
+    ).order_by(OS.data_abertura, OS.id)
+    return exportacao.resposta(stmt, formato, exportacao.nome_arquivo("ordens_servico", data_inicio, data_fim))
 
 @router.post("/{os_id}/adicionar-peca")
-def adicionar_peca_os(os_id: int, payload: schemas.OSPecaAdd, db: Session = Depends(get_db)):
-    os_obj = db.query(models.OrdemServico).filter(models.OrdemServico.id == os_id).first()
+@rastreio.orcamento(8)
+async def adicionar_peca_os(os_id: int, payload: schemas.OSPecaAdd, db: AsyncSession = Depends(get_db)):
+    os_obj = await db.scalar(select(models.OrdemServico).where(models.OrdemServico.id == os_id))
     if not os_obj: raise HTTPException(404, "OS não encontrada")
 
     try:
@@ -60,13 +162,14 @@ def adicionar_peca_os(os_id: int, payload: schemas.OSPecaAdd, db: Session = Depe
         )
 
         if payload.peca_id:
-            peca = db.query(models.Peca).filter(models.Peca.id == payload.peca_id).with_for_update().first()
+            peca = await referencias.peca(db, payload.peca_id)
             if not peca: raise HTTPException(404, "Peça não encontrada")
-            
-            if peca.estoque_atual < payload.quantidade:
-                raise HTTPException(400, f"Estoque insuficiente. Disponível: {peca.estoque_atual}")
-            
-            peca.estoque_atual -= payload.quantidade
+
+            disponivel = (await movimentos.travar_pecas(db, [peca.id]))[peca.id]
+            if disponivel < payload.quantidade:
+                raise HTTPException(400, f"Estoque insuficiente. Disponível: {disponivel}")
+
+            await movimentos.registrar(db, [movimentos.movimento(peca.id, movimentos.VENDA, -payload.quantidade, os_id)])
             
             novo_item.peca_id = peca.id
             novo_item.valor_unitario = peca.valor_venda
@@ -79,35 +182,26 @@ def adicionar_peca_os(os_id: int, payload: schemas.OSPecaAdd, db: Session = Depe
             novo_item.valor_unitario = payload.valor_unitario
         
         db.add(novo_item)
-        db.commit()
+        await totais.aplicar_delta(db, os_id, pecas=payload.quantidade * totais.valor_decimal(novo_item.valor_unitario))
+        await db.commit()
         
         return {"message": "Item adicionado e estoque atualizado"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
-@router.delete("/debug/resetar-itens-os")
-def resetar_itens(db: Session = Depends(get_db)):
-    try:
-        num_rows = db.query(models.OSPeca).delete()
-        db.commit()
-        return {"status": "sucesso", "itens_removidos": num_rows}
-    except Exception as e:
-        db.rollback()
-        return {"erro": str(e)}
-
 @router.post("/{os_id}/adicionar-servico/")
-def adicionar_servico_na_os(os_id: int, item: schemas.OSServicoAdd, db: Session = Depends(get_db)):
-    os = db.query(models.OrdemServico).filter(models.OrdemServico.id == os_id).first()
+async def adicionar_servico_na_os(os_id: int, item: schemas.OSServicoAdd, db: AsyncSession = Depends(get_db)):
+    os = await db.scalar(select(models.OrdemServico).where(models.OrdemServico.id == os_id))
     if not os:
         raise HTTPException(status_code=404, detail="OS não encontrada")
     
-    servico = db.query(models.Servico).filter(models.Servico.id == item.servico_id).first()
+    servico = await referencias.servico(db, item.servico_id)
     if not servico:
         raise HTTPException(status_code=404, detail="Serviço não encontrado")
         
@@ -121,119 +215,185 @@ def adicionar_servico_na_os(os_id: int, item: schemas.OSServicoAdd, db: Session
     )
     
     db.add(novo_item_servico)
-    db.commit()
+    await totais.aplicar_delta(db, os_id, servicos=item.quantidade * totais.valor_decimal(valor_final))
+    await db.commit()
     
     return {"status": "Serviço adicionado", "servico": servico.descricao}
 
+async def _servicos_ja_na_os(db: AsyncSession, os_id: int, servico_ids) -> List[int]:
+    return sorted((await db.scalars(select(models.OSServico.servico_id).where(
+        models.OSServico.ordem_servico_id == os_id, models.OSServico.servico_id.in_(servico_ids)
+    ))).all())
+
+@router.post("/{os_id}/itens", response_model=schemas.OSDetalhada)
+@rastreio.orcamento(16)
+async def adicionar_itens_os(os_id: int, payload: schemas.OSItensLote, db: AsyncSession = Depends(get_db)):
+    """Adiciona várias peças e serviços à OS numa transação só.
+
+    As peças são travadas em ordem de id (ver movimentos.travar_pecas): lotes
+    concorrentes sempre travam na mesma ordem, então não entram em deadlock
+    entre si. Ou entra o lote todo ou nada."""
+    if not payload.pecas and not payload.servicos:
+        raise HTTPException(400, "Informe ao menos uma peça ou serviço")
+
+    qtd_pecas = {}
+    for item in payload.pecas:
+        if item.quantidade <= 0:
+            raise HTTPException(400, f"Quantidade inválida para a peça {item.peca_id}")
+        if item.peca_id in qtd_pecas:
+            raise HTTPException(400, f"Peça {item.peca_id} repetida no lote")
+        qtd_pecas[item.peca_id] = item.quantidade
+
+    itens_servicos = {}
+    for item in payload.servicos:
+        if item.quantidade <= 0:
+            raise HTTPException(400, f"Quantidade inválida para o serviço {item.servico_id}")
+        if item.servico_id in itens_servicos:
+            raise HTTPException(400, f"Serviço {item.servico_id} repetido no lote")
+        itens_servicos[item.servico_id] = item
+
+    if not await db.scalar(select(models.OrdemServico.id).where(models.OrdemServico.id == os_id)):
+        raise HTTPException(404, "OS não encontrada")
+
+    precos = {}
+    if qtd_pecas:
+        disponivel = await movimentos.travar_pecas(db, qtd_pecas)
+        faltando = sorted(set(qtd_pecas) - set(disponivel))
+        if faltando:
+            raise HTTPException(404, f"Peças não encontradas: {faltando}")
+
+        sem_estoque = [
+            {"peca_id": peca_id, "solicitado": qtd, "disponivel": disponivel[peca_id]}
+            for peca_id, qtd in qtd_pecas.items()
+            if disponivel[peca_id] < qtd
+        ]
+        if sem_estoque:
+            raise HTTPException(400, {"message": "Estoque insuficiente", "itens": sem_estoque})
+
+        ja_na_os = (await db.scalars(select(models.OSPeca.peca_id).where(
+            models.OSPeca.ordem_servico_id == os_id, models.OSPeca.peca_id.in_(qtd_pecas)
+        ))).all()
+        if ja_na_os:
+            raise HTTPException(409, f"Peças já lançadas nesta OS: {sorted(ja_na_os)}")
+
+        precos = {p.id: p.valor_venda for p in (await referencias.buscar_varios(db, "peca", qtd_pecas)).values()}
+
+    servicos = {}
+    if itens_servicos:
+        servicos = await referencias.buscar_varios(db, "servico", itens_servicos)
+        faltando = sorted(set(itens_servicos) - set(servicos))
+        if faltando:
+            raise HTTPException(404, f"Serviços não encontrados: {faltando}")
+
+        ja_na_os = await _servicos_ja_na_os(db, os_id, itens_servicos)
+        if ja_na_os:
+            raise HTTPException(409, f"Serviços já lançados nesta OS: {ja_na_os}")
+
+    try:
+        linhas_pecas, vendas, total_pecas = [], [], Decimal(0)
+        for peca_id, quantidade in qtd_pecas.items():
+            linhas_pecas.append({"ordem_servico_id": os_id, "peca_id": peca_id,
+                                 "quantidade": quantidade, "valor_unitario": precos[peca_id]})
+            vendas.append(movimentos.movimento(peca_id, movimentos.VENDA, -quantidade, os_id))
+            total_pecas += quantidade * totais.valor_decimal(precos[peca_id])
+
+        linhas_servicos, total_servicos = [], Decimal(0)
+        for servico_id, item in itens_servicos.items():
+            valor = item.valor if item.valor is not None else servicos[servico_id].valor_mao_obra
+            linhas_servicos.append({"ordem_servico_id": os_id, "servico_id": servico_id,
+                                    "quantidade": item.quantidade, "valor_unitario": valor})
+            total_servicos += item.quantidade * totais.valor_decimal(valor)
+
+        # INSERT em lote (executemany) para cada tabela de itens
+        if linhas_pecas:
+            await db.execute(insert(models.OSPeca), linhas_pecas)
+            await movimentos.registrar(db, vendas)
+        if linhas_servicos:
+            try:
+                await db.execute(insert(models.OSServico), linhas_servicos)
+            except IntegrityError:
+                # serviços não são travados: outro lote pode ter lançado o mesmo
+                # serviço depois da conferência acima (a PK da linha barra)
+                await db.rollback()
+                ja_na_os = await _servicos_ja_na_os(db, os_id, itens_servicos)
+                if ja_na_os:
+                    raise HTTPException(409, f"Serviços já lançados nesta OS: {ja_na_os}")
+                raise
+        await totais.aplicar_delta(db, os_id, pecas=total_pecas, servicos=total_servicos)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    return await consultas.carregar_os_detalhada(db, os_id)
+
 # Mudar Status
 @router.patch("/{os_id}/status", response_model=schemas.OSResponse)
-def atualizar_status_os(os_id: int, status_data: schemas.OSStatusUpdate, db: Session = Depends(get_db)):
-    os = db.query(models.OrdemServico).filter(models.OrdemServico.id == os_id).first()
+async def atualizar_status_os(os_id: int, status_data: schemas.OSStatusUpdate, db: AsyncSession = Depends(get_db)):
+    # FOR UPDATE: duas mudanças simultâneas (ou um pagamento que quita) não validam sobre o mesmo estado
+    os = await db.scalar(select(models.OrdemServico).where(models.OrdemServico.id == os_id).with_for_update())
     if not os:
         raise HTTPException(status_code=404, detail="OS não encontrada")
-    
-    os.status = status_data.status
 
-    if status_data.status == "FINALIZADO":
-        os.data_fechamento = date.today()
-        
-    db.commit()
-    db.refresh(os)
+    novo = status_data.status
+    if novo != os.status:
+        if not status_os.permitida(os.status, novo):
+            destinos = ", ".join(status_os.TRANSICOES.get(os.status, ())) or "nenhum (status final)"
+            raise HTTPException(409, f"Transição inválida: {os.status} -> {novo}. Permitidas: {destinos}")
+        if novo in status_os.FINAIS:
+            status_os.fechar(os, novo)
+        else:
+            os.status = novo
+
+    await db.commit()
+    await db.refresh(os)
     
     os.numero_os = os.id
     return os
 
 @router.get("/{os_id}/detalhes", response_model=schemas.OSDetalhada)
-def ver_detalhes_os(os_id: int, db: Session = Depends(get_db)):
-    os = db.query(models.OrdemServico).filter(models.OrdemServico.id == os_id).first()
-    if not os:
+@rastreio.orcamento(5)
+async def ver_detalhes_os(os_id: int, db: AsyncSession = Depends(get_db)):
+    detalhes = await consultas.carregar_os_detalhada(db, os_id)
+    if not detalhes:
         raise HTTPException(status_code=404, detail="OS não encontrada")
-    
-    lista_pecas = []
-    total_pecas = 0.0
-    for item in os.itens_pecas:
-        subtotal = item.quantidade * float(item.valor_unitario)
-        total_pecas += subtotal
-        lista_pecas.append({
-            "peca_id": item.peca_id,
-            "quantidade": item.quantidade,
-            "valor_unitario": item.valor_unitario,
-            "nome_peca": item.peca.nome,
-            "subtotal": subtotal
-        })
-
-    lista_servicos = []
-    total_servicos = 0.0
-    for item in os.itens_servicos:
-        subtotal = item.quantidade * float(item.valor_unitario)
-        total_servicos += subtotal
-        lista_servicos.append({
-            "servico_id": item.servico_id,
-            "quantidade": item.quantidade,
-            "valor_unitario": item.valor_unitario,
-            "descricao_servico": item.servico.descricao,
-            "subtotal": subtotal
-        })
-
-    total_pago = 0.0
-    lista_pagamentos = []
-    for pag in os.pagamentos:
-        total_pago += float(pag.valor)
-        lista_pagamentos.append(pag)
-
-    total_geral = total_pecas + total_servicos
-    saldo_devedor = total_geral - total_pago
-
-    return {
-        "id": os.id,
-        "km_atual": os.km_atual,
-        "defeito_reclamado": os.defeito_reclamado,
-        "data_abertura": os.data_abertura,
-        "status": os.status,
-        "veiculo_id": os.veiculo_id,
-        "mecanico_id": os.mecanico_id,
-        
-        "pecas": lista_pecas,
-        "servicos": lista_servicos,
-        "pagamentos": lista_pagamentos, # Lista nova
-        
-        "total_pecas": total_pecas,
-        "total_servicos": total_servicos,
-        "total_geral": total_geral,
-        "total_pago": total_pago,       # Campo calculado
-        "saldo_devedor": saldo_devedor  # Campo calculado
-    }
+    return detalhes
 
 @router.delete("/{os_id}/pecas/{peca_id}")
-def remover_peca_os(os_id: int, peca_id: int, db: Session = Depends(get_db)):
-    item_os = db.query(models.OSPeca).filter(
-        models.OSPeca.ordem_servico_id == os_id,
-        models.OSPeca.peca_id == peca_id
-    ).first()
-    
-    if not item_os:
+async def remover_peca_os(os_id: int, peca_id: int, db: AsyncSession = Depends(get_db)):
+    # DELETE ... RETURNING: com dois DELETEs da mesma linha (clique duplo), o
+    # segundo espera o primeiro e não recebe nada, então o estorno sai uma vez só
+    P = models.OSPeca
+    removido = (await db.execute(
+        delete(P)
+        .where(P.ordem_servico_id == os_id, P.peca_id == peca_id)
+        .returning(P.quantidade, P.valor_unitario)
+    )).first()
+
+    if not removido:
         raise HTTPException(status_code=404, detail="Item não encontrado nesta OS")
 
-    peca_estoque = db.query(models.Peca).filter(models.Peca.id == peca_id).first()
-    if peca_estoque:
-        peca_estoque.estoque_atual += item_os.quantidade
+    # Estorno é um movimento a mais: não precisa travar a peça
+    await movimentos.registrar(db, [movimentos.movimento(peca_id, movimentos.DEVOLUCAO, removido.quantidade, os_id)])
 
-    db.delete(item_os)
-    db.commit()
+    await totais.aplicar_delta(db, os_id, pecas=-removido.quantidade * totais.valor_decimal(removido.valor_unitario))
+    await db.commit()
     
     return {"message": "Peça removida e estoque estornado"}
 
 @router.delete("/{os_id}/servicos/{servico_id}")
-def remover_servico_os(os_id: int, servico_id: int, db: Session = Depends(get_db)):
-    item_os = db.query(models.OSServico).filter(
-        models.OSServico.ordem_servico_id == os_id,
-        models.OSServico.servico_id == servico_id
-    ).first()
-    
-    if not item_os:
+async def remover_servico_os(os_id: int, servico_id: int, db: AsyncSession = Depends(get_db)):
+    S = models.OSServico
+    removido = (await db.execute(
+        delete(S)
+        .where(S.ordem_servico_id == os_id, S.servico_id == servico_id)
+        .returning(S.quantidade, S.valor_unitario)
+    )).first()
+
+    if not removido:
         raise HTTPException(status_code=404, detail="Serviço não encontrado nesta OS")
     
-    db.delete(item_os)
-    db.commit()
+    await totais.aplicar_delta(db, os_id, servicos=-removido.quantidade * totais.valor_decimal(removido.valor_unitario))
+    await db.commit()
     
     return {"message": "Serviço removido"}
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas, security
+from itertools import chain
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager
+from typing import List, Optional
+from .. import models, schemas, security, paginacao, busca, rastreio, respostas, status_os
+from ..cache import CacheTTL
+from ..config import settings
 from ..database import get_db
+from ..normalizacao import placa_normalizada
 
 router = APIRouter(
     prefix="/veiculos", 
@@ -10,47 +16,139 @@ router = APIRouter(
     dependencies=[Depends(security.get_current_user)]
 )
 
+# Placas consultadas no balcão: resposta pronta por placa canônica
+cache_placas = CacheTTL(ttl=settings.placa_cache_ttl, max_itens=settings.placa_cache_max)
+
+# Escrita nestes modelos muda veículo, dono ou OS em aberto de alguma resposta
+_MODELOS = (models.Veiculo, models.Cliente, models.OrdemServico)
+
+@event.listens_for(Session, "after_flush")
+def _marcar_alteracao(sessao, contexto):
+    if any(isinstance(obj, _MODELOS) for obj in chain(sessao.new, sessao.dirty, sessao.deleted)):
+        sessao.info["placas_alterado"] = True
+
+# UPDATE/DELETE/INSERT em massa (ex.: totais.aplicar_delta) não passam pelo flush
+@event.listens_for(Session, "do_orm_execute")
+def _marcar_escrita_em_massa(estado):
+    if (estado.is_update or estado.is_delete or estado.is_insert) and estado.bind_mapper is not None \
+            and issubclass(estado.bind_mapper.class_, _MODELOS):
+        estado.session.info["placas_alterado"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(sessao):
+    if sessao.info.pop("placas_alterado", False):
+        cache_placas.limpar()
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_marca(sessao):
+    sessao.info.pop("placas_alterado", None)
+
+async def _placa_em_uso(db: AsyncSession, placa: str, exceto_id: Optional[int] = None) -> bool:
+    stmt = select(models.Veiculo.id).where(models.Veiculo.placa_normalizada == placa_normalizada(placa))
+    if exceto_id is not None:
+        stmt = stmt.where(models.Veiculo.id != exceto_id)
+    return await db.scalar(stmt) is not None
+
 @router.post("/", response_model=schemas.VeiculoResponse)
-def criar_veiculo(veiculo: schemas.VeiculoCreate, db: Session = Depends(get_db)):
-    if db.query(models.Veiculo).filter(models.Veiculo.placa == veiculo.placa).first():
+async def criar_veiculo(veiculo: schemas.VeiculoCreate, db: AsyncSession = Depends(get_db)):
+    # 'ABC-1234', 'abc1234' e 'ABC1C34' são a mesma placa
+    if await _placa_em_uso(db, veiculo.placa):
         raise HTTPException(status_code=400, detail="Placa já cadastrada")
     
-    if not db.query(models.Cliente).filter(models.Cliente.id == veiculo.cliente_id).first():
+    if not await db.scalar(select(models.Cliente).where(models.Cliente.id == veiculo.cliente_id)):
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
 
     try:
         db_veiculo = models.Veiculo(**veiculo.model_dump())
         db.add(db_veiculo)
-        db.commit()
-        db.refresh(db_veiculo)
+        await db.commit()
+        await db.refresh(db_veiculo)
         return db_veiculo
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=List[schemas.VeiculoResponse])
-def listar_veiculos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Veiculo).offset(skip).limit(limit).all()
+@rastreio.orcamento(3)
+async def listar_veiculos(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    cliente_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    stmt = select(*respostas.colunas(schemas.VeiculoResponse, models.Veiculo))
+    if cliente_id:
+        stmt = stmt.where(models.Veiculo.cliente_id == cliente_id)
+
+    itens = await paginacao.paginar(
+        db, stmt, response, [models.Veiculo.id],
+        cursor=cursor, skip=skip, limit=limit, linhas=True,
+    )
+    return respostas.resposta(itens, response)
+
+@router.get("/busca", response_model=List[schemas.VeiculoResponse])
+@rastreio.orcamento(2)
+async def buscar_veiculos(
+    q: str = Query(..., min_length=1, max_length=100),
+    limite: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    # placa (com ou sem hífen) ou nome/CPF/CNPJ/telefone do dono; ordem = relevância
+    return await busca.buscar_veiculos(db, q, limite)
+
+@router.get("/placa/{placa}", response_model=schemas.VeiculoPlacaResponse)
+@rastreio.orcamento(2)
+async def buscar_por_placa(placa: str, db: AsyncSession = Depends(get_db)):
+    # aceita a placa com ou sem hífen, em qualquer caixa, no padrão antigo ou Mercosul
+    chave = placa_normalizada(placa)
+    dados = cache_placas.get(chave)
+    if dados is not None:
+        return dados
+
+    # Veículo, dono e OS em aberto numa consulta só (uma linha por OS em aberto)
+    OS = models.OrdemServico
+    stmt = (
+        select(models.Veiculo)
+        .join(models.Veiculo.cliente)
+        .outerjoin(OS, and_(OS.veiculo_id == models.Veiculo.id, OS.status.in_(status_os.ABERTOS)))
+        .options(contains_eager(models.Veiculo.cliente), contains_eager(models.Veiculo.ordens_servico))
+        .where(models.Veiculo.placa_normalizada == chave)
+        .order_by(OS.id)
+        .execution_options(populate_existing=True)
+    )
+    veiculo = (await db.scalars(stmt)).unique().first()
+    if not veiculo:
+        raise HTTPException(status_code=404, detail="Veículo não encontrado")
+
+    for os in veiculo.ordens_servico:
+        os.numero_os = os.id
+    dados = schemas.VeiculoPlacaResponse.model_validate(veiculo).model_dump()
+    cache_placas.set(chave, dados)
+    return dados
 
 @router.delete("/{veiculo_id}")
-def deletar_veiculo(veiculo_id: int, db: Session = Depends(get_db)):
-    veiculo = db.query(models.Veiculo).filter(models.Veiculo.id == veiculo_id).first()
+async def deletar_veiculo(veiculo_id: int, db: AsyncSession = Depends(get_db)):
+    veiculo = await db.scalar(select(models.Veiculo).where(models.Veiculo.id == veiculo_id))
     if not veiculo:
         raise HTTPException(status_code=404, detail="Veículo não encontrado")
     
     try:
-        db.delete(veiculo)
-        db.commit()
+        await db.delete(veiculo)
+        await db.commit()
         return {"message": "Veículo removido com sucesso"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Não é possível excluir veículo com OS vinculada.")
 
 @router.put("/{veiculo_id}")
-def atualizar_veiculo(veiculo_id: int, dados: schemas.VeiculoCreate, db: Session = Depends(get_db)):
-    veiculo = db.query(models.Veiculo).filter(models.Veiculo.id == veiculo_id).first()
+async def atualizar_veiculo(veiculo_id: int, dados: schemas.VeiculoCreate, db: AsyncSession = Depends(get_db)):
+    veiculo = await db.scalar(select(models.Veiculo).where(models.Veiculo.id == veiculo_id))
     if not veiculo:
         raise HTTPException(status_code=404, detail="Veículo não encontrado")
+    if await _placa_em_uso(db, dados.placa, exceto_id=veiculo_id):
+        raise HTTPException(status_code=400, detail="Placa já cadastrada")
     
     veiculo.marca = dados.marca
     veiculo.modelo = dados.modelo
@@ -59,6 +157,6 @@ def atualizar_veiculo(veiculo_id: int, dados: schemas.VeiculoCreate, db: Session
     veiculo.cor = dados.cor
     veiculo.cliente_id = dados.cliente_id
     
-    db.commit()
-    db.refresh(veiculo)
+    await db.commit()
+    await db.refresh(veiculo)
     return veiculo
\ No newline at end of file
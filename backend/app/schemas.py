@@ -1,7 +1,8 @@
-from pydantic import BaseModel
-from typing import List, Optional
-from datetime import date
+from pydantic import AliasChoices, BaseModel, Field, field_validator
+from typing import Dict, List, Literal, Optional, Union
+from datetime import date, datetime
 from typing import Optional
+from . import status_os
 
 #Cliente
 class ClienteBase(BaseModel):
@@ -72,9 +73,20 @@ class OSResponse(OSBase):
     cliente_id: int
     mecanico_id: int
 
+    total_pecas: float = 0.0
+    total_servicos: float = 0.0
+    total_pago: float = 0.0
+    saldo_devedor: float = 0.0
+
     class Config:
         from_attributes = True
 
+# Consulta por placa no balcão: veículo, dono e OS em aberto
+class VeiculoPlacaResponse(VeiculoResponse):
+    placa_normalizada: str
+    cliente: ClienteResponse
+    os_abertas: List[OSResponse] = Field(default_factory=list, validation_alias=AliasChoices("ordens_servico", "os_abertas"))
+
 # Peças
 class PecaBase(BaseModel):
     codigo: str
@@ -85,11 +97,49 @@ class PecaBase(BaseModel):
 class PecaCreate(PecaBase):
     pass
 
+class PecaUpdate(BaseModel):
+    codigo: str
+    nome: str
+    valor_venda: float
+    # Quantidade nova e a que o formulário mostrou; sem estoque_atual o estoque
+    # não muda (entradas e baixas: POST /pecas/{id}/movimentos)
+    estoque_atual: Optional[int] = None
+    estoque_anterior: Optional[int] = None
+
 class PecaResponse(PecaBase):
     id: int
+    # disponível (snapshot + movimentos pendentes), não só o snapshot
+    estoque_atual: int = Field(validation_alias=AliasChoices("estoque_disponivel", "estoque_atual"))
+    class Config:
+        from_attributes = True
+
+class MovimentoEstoqueCreate(BaseModel):
+    tipo: Literal["ENTRADA", "AJUSTE"]
+    quantidade: int
+    observacao: Optional[str] = None
+
+class MovimentoEstoqueResponse(BaseModel):
+    id: int
+    peca_id: int
+    tipo: str
+    quantidade: int
+    ordem_servico_id: Optional[int] = None
+    observacao: Optional[str] = None
+    criado_em: Optional[datetime] = None
     class Config:
         from_attributes = True
 
+class ErroImportacao(BaseModel):
+    linha: Union[int, str] # número da linha, ou faixa "inicio-fim" quando o lote inteiro falhou
+    erro: str
+
+class ResultadoImportacao(BaseModel):
+    linhas: int
+    inseridos: int
+    atualizados: int
+    erros: List[ErroImportacao]
+    erros_omitidos: int
+
 # Serviços
 class ServicoBase(BaseModel):
     descricao: str
@@ -116,6 +166,14 @@ class OSServicoAdd(BaseModel):
     quantidade: int = 1
     valor: Optional[float] = None
 
+class OSPecaLote(BaseModel):
+    peca_id: int
+    quantidade: int = 1
+
+class OSItensLote(BaseModel):
+    pecas: List[OSPecaLote] = []
+    servicos: List[OSServicoAdd] = []
+
 class OSPecaDetail(BaseModel):
     peca_id: Optional[int] = None 
     quantidade: int
@@ -150,7 +208,36 @@ class PagamentoResponse(PagamentoBase):
 
 # --- Schema para Atualizar Status da OS ---
 class OSStatusUpdate(BaseModel):
-    status: str # Ex: APROVADO, EM_ANDAMENTO, FINALIZADO, CANCELADO
+    status: status_os.Status
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def _legado(cls, valor):
+        # aceita minúsculas e o nome antigo (EXECUCAO)
+        return status_os.normalizar(valor) if isinstance(valor, str) else valor
+
+# --- Quadro de OS abertas ---
+class OSQuadroItem(BaseModel):
+    id: int
+    numero_os: int
+    data_abertura: date
+    defeito_reclamado: str
+    veiculo_id: int
+    placa: str
+    modelo: str
+    mecanico_id: int
+    mecanico: str
+    saldo_devedor: float
+
+class OSQuadroColuna(BaseModel):
+    status: str
+    quantidade: int # todas as OS no status, mesmo além do limite
+    transicoes: List[str]
+    os: List[OSQuadroItem]
+
+class OSQuadro(BaseModel):
+    total: int
+    colunas: List[OSQuadroColuna]
 
 # OS Completa
 class OSDetalhada(OSBase):
@@ -196,6 +283,27 @@ class ResumoFinanceiro(BaseModel):
     total_receitas: float
     total_despesas: float
     saldo: float
+    receitas_por_forma: Dict[str, float] = {}
+    despesas_por_categoria: Dict[str, float] = {}
+
+class ReceitaDia(BaseModel):
+    dia: date
+    valor: float
+
+class DashboardResponse(BaseModel):
+    data_inicio: date
+    data_fim: date
+    os_abertas: int
+    os_abertas_por_status: Dict[str, int]
+    veiculos_na_oficina: int
+    os_abertas_periodo: int
+    os_fechadas_periodo: int
+    clientes_ativos: int # clientes com OS aberta no período
+    total_clientes: int
+    faturamento_total: float
+    faturamento_periodo: float
+    despesas_periodo: float
+    receita_por_dia: List[ReceitaDia]
 
 # --- SEGURANÇA (USUÁRIOS & TOKEN) ---
 class Token(BaseModel):
@@ -1,20 +1,29 @@
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from .cache import CacheTTL
+from .config import settings
+from .hashing import contexto
 from .database import get_db
-from . import models, schemas
-import os
+from . import models, schemas, referencias
 
-# Configurações (Idealmente mover para .env)
-SECRET_KEY = os.getenv("SECRET_KEY", "secretkey123")
+SECRET_KEY = settings.secret_key
+
+if not SECRET_KEY:
+    # sem chave padrão: tokens assinados com um valor público seriam forjáveis
+    raise ValueError("A variável SECRET_KEY não foi encontrada no arquivo .env")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Versões síncronas (scripts/CLI). As rotas usam app.hashing, fora do event loop.
+pwd_context = contexto(settings.bcrypt_rounds)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 # Funções Utilitárias
@@ -30,11 +39,59 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti identifica o token (chave do cache de principais)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# --- Cache de principais ---
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Usuário autenticado da requisição. Tem os mesmos campos de models.Usuario
+    usados pelas rotas (id, username, role, is_active), mas é imutável e pode
+    ficar no cache sem sessão de banco."""
+    id: int
+    username: str
+    role: str
+    is_active: bool
+
+# (username, jti) -> Principal
+cache_principais = CacheTTL(ttl=settings.principal_cache_ttl, max_itens=settings.principal_cache_max)
+
+def invalidar_principal(username: str):
+    """Remove do cache todos os tokens do usuário (desativação, troca de papel, novo cadastro)."""
+    cache_principais.invalidar_se(lambda chave: chave[0] == username)
+
+# Os outros workers limpam ao receber "principal:<username>" no canal de referências
+referencias.assinar("principal", invalidar_principal, cache_principais.limpar)
+
+def _usernames_afetados(target) -> set:
+    usernames = {target.username}
+    historico = inspect(target).attrs.username.history
+    usernames.update(u for u in historico.deleted or () if u)
+    return usernames
+
+@event.listens_for(models.Usuario, "after_update")
+@event.listens_for(models.Usuario, "after_delete")
+def _usuario_alterado(mapper, connection, target):
+    # Invalida já no flush e guarda o username para invalidar de novo no
+    # commit, caso outra requisição tenha recolocado o valor antigo no meio tempo.
+    usernames = _usernames_afetados(target)
+    for username in usernames:
+        invalidar_principal(username)
+        # entregue só no commit, a todos os workers (este inclusive)
+        connection.execute(select(func.pg_notify(referencias.CANAL, f"principal:{username}")))
+    sessao = object_session(target)
+    if sessao is not None:
+        sessao.info.setdefault("principais_alterados", set()).update(usernames)
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(sessao):
+    for username in sessao.info.pop("principais_alterados", ()):
+        invalidar_principal(username)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas",
@@ -49,14 +106,23 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         token_data = schemas.TokenData(username=username, role=role)
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(models.Usuario).filter(models.Usuario.username == token_data.username).first()
-    if user is None:
+
+    # Tokens antigos (sem jti) usam o próprio token como chave
+    chave = (token_data.username, payload.get("jti") or token)
+    principal = cache_principais.get(chave)
+    if principal is not None:
+        return principal
+
+    user = await db.scalar(select(models.Usuario).where(models.Usuario.username == token_data.username))
+    if user is None or not user.is_active:
         raise credentials_exception
-    return user
+
+    principal = Principal(id=user.id, username=user.username, role=user.role, is_active=user.is_active)
+    cache_principais.set(chave, principal)
+    return principal
 
 def require_role(allowed_roles: list[str]):
-    def role_checker(user: models.Usuario = Depends(get_current_user)):
+    async def role_checker(user: Principal = Depends(get_current_user)):
         if user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,51 @@
+"""Ciclo de vida da OS.
+
+    ORCAMENTO -> APROVADO -> EM_ANDAMENTO -> FINALIZADO
+    (APROVADO pode voltar a ORCAMENTO, EM_ANDAMENTO a APROVADO)
+    qualquer estado aberto -> CANCELADO
+
+FINALIZADO e CANCELADO são finais. A quitação no pagamento fecha a OS a
+partir de qualquer estado aberto (tarefa fechar_os_quitada, via app/fila.py).
+EXECUCAO é o nome antigo de EM_ANDAMENTO (migração 7b2d4e9f1a36): ainda é
+aceito na entrada e convertido.
+"""
+from datetime import date
+from typing import Literal
+
+ORCAMENTO = "ORCAMENTO"
+APROVADO = "APROVADO"
+EM_ANDAMENTO = "EM_ANDAMENTO"
+FINALIZADO = "FINALIZADO"
+CANCELADO = "CANCELADO"
+
+Status = Literal["ORCAMENTO", "APROVADO", "EM_ANDAMENTO", "FINALIZADO", "CANCELADO"]
+
+# Ordem das colunas do quadro
+ABERTOS = (ORCAMENTO, APROVADO, EM_ANDAMENTO)
+FINAIS = (FINALIZADO, CANCELADO)
+TODOS = ABERTOS + FINAIS
+
+TRANSICOES = {
+    ORCAMENTO: (APROVADO, CANCELADO),
+    APROVADO: (EM_ANDAMENTO, ORCAMENTO, CANCELADO),
+    EM_ANDAMENTO: (FINALIZADO, APROVADO, CANCELADO),
+    FINALIZADO: (),
+    CANCELADO: (),
+}
+
+LEGADO = {"EXECUCAO": EM_ANDAMENTO}
+
+# Predicado dos índices parciais: o planner só usa o índice quando o WHERE da
+# consulta implica este texto, então as consultas filtram com status IN ABERTOS
+SQL_ABERTA = "status IN (" + ", ".join(f"'{s}'" for s in ABERTOS) + ")"
+
+def normalizar(status: str) -> str:
+    status = status.strip().upper()
+    return LEGADO.get(status, status)
+
+def permitida(atual: str, novo: str) -> bool:
+    return novo in TRANSICOES.get(normalizar(atual), ())
+
+def fechar(os, status: str = FINALIZADO):
+    os.status = status
+    os.data_fechamento = date.today()
@@ -0,0 +1,109 @@
+from decimal import Decimal
+from typing import List, Optional
+from sqlalchemy import select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+from .consultas import total_pecas_sql, total_servicos_sql, total_pago_sql
+
+# Tolerância usada para considerar a OS quitada
+TOLERANCIA_QUITACAO = Decimal("0.01")
+
+def valor_decimal(valor) -> Decimal:
+    # float -> str -> Decimal evita levar o erro binário do float para o Numeric
+    if isinstance(valor, Decimal):
+        return valor
+    return Decimal(str(valor))
+
+async def aplicar_delta(db: AsyncSession, os_id: int, pecas=0, servicos=0, pago=0):
+    """Soma os deltas aos totais persistidos da OS num único UPDATE ... RETURNING.
+
+    O UPDATE trava a linha da OS até o commit, então chamadas concorrentes na
+    mesma OS são serializadas pelo banco. Retorna a linha com os novos totais
+    (ou None se a OS não existir)."""
+    pecas = valor_decimal(pecas)
+    servicos = valor_decimal(servicos)
+    pago = valor_decimal(pago)
+    OS = models.OrdemServico
+
+    stmt = (
+        update(OS)
+        .where(OS.id == os_id)
+        .values(
+            total_pecas=OS.total_pecas + pecas,
+            total_servicos=OS.total_servicos + servicos,
+            total_pago=OS.total_pago + pago,
+            saldo_devedor=OS.saldo_devedor + pecas + servicos - pago,
+        )
+        .returning(OS.total_pecas, OS.total_servicos, OS.total_pago, OS.saldo_devedor)
+        .execution_options(synchronize_session="fetch")
+    )
+    return (await db.execute(stmt)).first()
+
+def os_quitada(saldo_devedor) -> bool:
+    return valor_decimal(saldo_devedor) <= TOLERANCIA_QUITACAO
+
+# --- Reparo / verificação em lote ---
+
+def _valores_recalculados():
+    pecas = total_pecas_sql()
+    servicos = total_servicos_sql()
+    pago = total_pago_sql()
+    return {
+        "total_pecas": pecas,
+        "total_servicos": servicos,
+        "total_pago": pago,
+        "saldo_devedor": pecas + servicos - pago,
+    }
+
+async def recalcular_totais(db: AsyncSession, os_ids: Optional[List[int]] = None, lote: int = 5000) -> int:
+    """Recalcula os totais a partir das linhas de itens e pagamentos.
+
+    Percorre a tabela em faixas de id com um commit por lote, para não segurar
+    locks em milhares de OS de uma vez. Retorna quantas OS foram atualizadas."""
+    OS = models.OrdemServico
+    atualizadas = 0
+
+    if os_ids is not None:
+        for i in range(0, len(os_ids), lote):
+            parte = os_ids[i:i + lote]
+            res = await db.execute(
+                update(OS).where(OS.id.in_(parte)).values(**_valores_recalculados())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            atualizadas += res.rowcount
+        return atualizadas
+
+    ultimo_id = 0
+    while True:
+        limite = (await db.execute(
+            select(OS.id).where(OS.id > ultimo_id).order_by(OS.id).offset(lote - 1).limit(1)
+        )).scalar()
+        filtro = OS.id > ultimo_id
+        if limite is not None:
+            filtro = filtro & (OS.id <= limite)
+
+        res = await db.execute(
+            update(OS).where(filtro).values(**_valores_recalculados())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        atualizadas += res.rowcount
+
+        if limite is None:
+            return atualizadas
+        ultimo_id = limite
+
+async def verificar_totais(db: AsyncSession, limite: int = 100) -> List[dict]:
+    """Lista as OS cujos totais persistidos divergem do recalculado."""
+    OS = models.OrdemServico
+    calc = _valores_recalculados()
+    colunas = {nome: getattr(OS, nome) for nome in calc}
+
+    linhas = (await db.execute(
+        select(OS.id, *colunas.values(), *(expr.label(f"{nome}_calculado") for nome, expr in calc.items()))
+        .where(or_(*(colunas[nome] != expr for nome, expr in calc.items())))
+        .order_by(OS.id)
+        .limit(limite)
+    )).mappings().all()
+    return [dict(l) for l in linhas]
@@ -0,0 +1,58 @@
+"""Versão por tabela do catálogo e GET condicional (ETag / If-None-Match).
+
+As rotas que gravam em peça, serviço ou mecânico chamam incrementar() na
+mesma transação. As listagens usam a dependência condicional(): se o ETag
+enviado pelo cliente ainda vale, respondem 304 sem rodar a consulta da
+listagem nem serializar nada.
+"""
+import hashlib
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+from .database import get_db
+
+PECA = "peca"
+SERVICO = "servico"
+MECANICO = "mecanico"
+
+V = models.VersaoTabela
+M = models.MovimentoEstoque
+
+# O disponível das peças muda por movimento de estoque, que não incrementa a
+# versão (seria uma linha quente a cada venda). Entram no ETag o último id e a
+# quantidade de pendentes: a contagem pega também um movimento que faça commit
+# fora da ordem dos ids.
+_EXTRAS = {
+    PECA: [
+        select(func.coalesce(func.max(M.id), 0)).scalar_subquery(),
+        select(func.count()).select_from(M).where(~M.compactado).scalar_subquery(),
+    ],
+}
+
+async def incrementar(db: AsyncSession, tabela: str):
+    stmt = insert(V).values(tabela=tabela, versao=1)
+    stmt = stmt.on_conflict_do_update(index_elements=[V.tabela], set_={"versao": V.versao + 1})
+    await db.execute(stmt)
+
+async def etag(db: AsyncSession, tabela: str, request: Request) -> str:
+    versao = select(func.coalesce(select(V.versao).where(V.tabela == tabela).scalar_subquery(), 0))
+    valores = (await db.execute(versao.add_columns(*_EXTRAS.get(tabela, [])))).one()
+    # A mesma versão gera representações diferentes por filtro/ordem/página
+    consulta = hashlib.sha1(str(sorted(request.query_params.multi_items())).encode()).hexdigest()[:12]
+    return '"' + "-".join([tabela, *map(str, valores), consulta]) + '"'
+
+def _confere(if_none_match: str, atual: str) -> bool:
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidatos or atual in candidatos
+
+def condicional(tabela: str):
+    async def verificar(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+        atual = await etag(db, tabela, request)
+        if _confere(request.headers.get("if-none-match", ""), atual):
+            raise HTTPException(status_code=304, headers={"ETag": atual, "Cache-Control": "no-cache"})
+        response.headers["ETag"] = atual
+        # no-cache: o navegador guarda, mas revalida com If-None-Match a cada uso
+        response.headers["Cache-Control"] = "no-cache"
+    return verificar
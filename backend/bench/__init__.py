@@ -0,0 +1 @@
+"""Ferramentas de medição de desempenho da API (não fazem parte do app)."""
@@ -0,0 +1,251 @@
+"""Carga realista contra a API de verdade, com linha de base em JSON.
+
+Usuários virtuais concorrentes repetem fluxos sorteados por peso até o fim
+do tempo:
+- atendimento: busca pela placa, abre OS, lança peças e serviços, confere
+  os detalhes e paga o saldo (a OS fecha sozinha);
+- listagens: OS, busca de clientes e catálogo de peças;
+- gestão: dashboard e resumo financeiro.
+
+Por padrão a app roda no próprio processo (httpx.ASGITransport, com o
+lifespan da app); --url mede um servidor já no ar (ex.: uvicorn com vários
+workers). Ids e placas são sorteados do banco apontado por DATABASE_URL,
+que deve ser o mesmo da app, populado com bench.gerador.
+
+O resultado por rota (template, não URL) traz n, erros, req/s e
+p50/p95/p99; --comparar mostra a variação contra uma execução anterior.
+
+Uso (a partir da pasta backend):
+    python -m bench.cenarios --usuarios 50 --duracao 60 --saida base.json
+    python -m bench.cenarios --usuarios 50 --duracao 60 --saida novo.json --comparar base.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+import asyncpg
+import httpx
+from app.database import dsn_asyncpg
+
+USUARIO = "bench"
+SENHA = "bench-cenarios"
+METRICAS = ("req_s", "p50_ms", "p95_ms", "p99_ms")
+
+class Amostra:
+    """Ids reais para montar as requisições."""
+
+    async def carregar(self, tamanho: int):
+        conn = await asyncpg.connect(dsn_asyncpg())
+        try:
+            # ORDER BY random() varre a tabela, mas roda uma vez só, antes da medição
+            self.veiculos = await conn.fetch("SELECT id, placa FROM veiculo ORDER BY random() LIMIT $1", tamanho)
+            self.mecanicos = [r["id"] for r in await conn.fetch("SELECT id FROM mecanico")]
+            self.pecas = [r["id"] for r in await conn.fetch("SELECT id FROM peca ORDER BY random() LIMIT $1", tamanho)]
+            self.servicos = [r["id"] for r in await conn.fetch("SELECT id FROM servico ORDER BY random() LIMIT $1", tamanho)]
+            self.nomes = [r["nome"] for r in await conn.fetch(
+                "SELECT split_part(nome, ' ', 1) AS nome FROM cliente ORDER BY random() LIMIT $1", tamanho
+            )]
+        finally:
+            await conn.close()
+        if not (self.veiculos and self.mecanicos and self.pecas and self.servicos):
+            raise SystemExit("Banco sem dados: rode antes python -m bench.gerador")
+
+class Coleta:
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+
+    async def chamar(self, cliente: httpx.AsyncClient, rota: str, metodo: str, url: str, **kwargs):
+        """rota é o template usado no relatório; url é o caminho concreto."""
+        inicio = time.perf_counter()
+        try:
+            resposta = await cliente.request(metodo, url, **kwargs)
+        except httpx.HTTPError:
+            self.erros[rota] += 1
+            return None
+        self.latencias[rota].append(time.perf_counter() - inicio)
+        if resposta.is_error:
+            self.erros[rota] += 1
+            return None
+        return resposta
+
+    def relatorio(self, duracao: float) -> dict:
+        rotas = {}
+        for rota in sorted(set(self.latencias) | set(self.erros)):
+            latencias = sorted(self.latencias[rota])
+            linha = {"n": len(latencias), "erros": self.erros[rota], "req_s": round(len(latencias) / duracao, 1)}
+            if len(latencias) >= 2:
+                q = statistics.quantiles(latencias, n=100)
+                linha.update(p50_ms=round(q[49] * 1000, 2), p95_ms=round(q[94] * 1000, 2), p99_ms=round(q[98] * 1000, 2))
+            rotas[rota] = linha
+        return rotas
+
+async def atendimento(c: httpx.AsyncClient, coleta: Coleta, amostra: Amostra, rnd: random.Random):
+    veiculo = rnd.choice(amostra.veiculos)
+    await coleta.chamar(c, "GET /veiculos/placa/{placa}", "GET", f"/veiculos/placa/{veiculo['placa']}")
+
+    r = await coleta.chamar(c, "POST /os/", "POST", "/os/", json={
+        "veiculo_id": veiculo["id"], "mecanico_id": rnd.choice(amostra.mecanicos),
+        "km_atual": rnd.randrange(5_000, 250_000), "defeito_reclamado": "Revisão (bench)",
+    })
+    if r is None:
+        return
+    os_id = r.json()["id"]
+
+    itens = {
+        "pecas": [{"peca_id": p, "quantidade": rnd.choice((1, 1, 2))}
+                  for p in rnd.sample(amostra.pecas, min(len(amostra.pecas), rnd.randrange(1, 6)))],
+        "servicos": [{"servico_id": s} for s in rnd.sample(amostra.servicos, min(len(amostra.servicos), rnd.randrange(1, 3)))],
+    }
+    if await coleta.chamar(c, "POST /os/{os_id}/itens", "POST", f"/os/{os_id}/itens", json=itens) is None:
+        return
+
+    r = await coleta.chamar(c, "GET /os/{os_id}/detalhes", "GET", f"/os/{os_id}/detalhes")
+    if r is None:
+        return
+    saldo = r.json()["saldo_devedor"]
+    if saldo > 0:
+        await coleta.chamar(c, "POST /pagamentos/", "POST", "/pagamentos/", json={
+            "ordem_servico_id": os_id, "valor": saldo, "forma_pagamento": rnd.choice(("PIX", "DINHEIRO", "CARTAO_CREDITO")),
+        })
+
+async def listagens(c: httpx.AsyncClient, coleta: Coleta, amostra: Amostra, rnd: random.Random):
+    await coleta.chamar(c, "GET /os/", "GET", "/os/", params={"limit": 50})
+    if amostra.nomes:
+        await coleta.chamar(c, "GET /clientes/busca", "GET", "/clientes/busca",
+                            params={"q": rnd.choice(amostra.nomes), "limite": 20})
+    await coleta.chamar(c, "GET /pecas/", "GET", "/pecas/", params={"limit": 50})
+
+async def gestao(c: httpx.AsyncClient, coleta: Coleta, amostra: Amostra, rnd: random.Random):
+    await coleta.chamar(c, "GET /dashboard/", "GET", "/dashboard/")
+    await coleta.chamar(c, "GET /pagamentos/resumo", "GET", "/pagamentos/resumo")
+
+FLUXOS = {"atendimento": atendimento, "listagens": listagens, "gestao": gestao}
+
+def pesos(texto: str) -> dict:
+    """'atendimento=3,listagens=6,gestao=1' -> {fluxo: peso}"""
+    resultado = {}
+    for parte in texto.split(","):
+        nome, _, peso = parte.partition("=")
+        if nome.strip() not in FLUXOS:
+            raise argparse.ArgumentTypeError(f"Fluxo desconhecido: {nome} (use {', '.join(FLUXOS)})")
+        resultado[nome.strip()] = float(peso or 1)
+    return resultado
+
+async def autenticar(c: httpx.AsyncClient) -> str:
+    # 400 = usuário já existe, segue para o login
+    await c.post("/auth/registrar", json={"username": USUARIO, "password": SENHA, "role": "ADMIN"})
+    r = await c.post("/auth/token", data={"username": USUARIO, "password": SENHA})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+@contextlib.asynccontextmanager
+async def cliente_http(args):
+    limites = httpx.Limits(max_connections=args.usuarios, max_keepalive_connections=args.usuarios)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limites, timeout=60) as c:
+            yield c
+        return
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        # exceção na app vira 500 e conta como erro, como num servidor de verdade
+        transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=60) as c:
+            yield c
+
+async def executar(args) -> dict:
+    amostra = Amostra()
+    await amostra.carregar(args.amostra)
+    fluxos = args.fluxos
+    nomes, pesos_ = list(fluxos), list(fluxos.values())
+    execucoes = defaultdict(int)
+
+    async with cliente_http(args) as c:
+        c.headers["Authorization"] = f"Bearer {await autenticar(c)}"
+
+        async def usuario(indice: int, coleta: Coleta, ate: float):
+            rnd = random.Random(args.semente * 1000 + indice)
+            while time.perf_counter() < ate:
+                nome = rnd.choices(nomes, pesos_)[0]
+                await FLUXOS[nome](c, coleta, amostra, rnd)
+                execucoes[nome] += 1
+
+        if args.aquecimento > 0:
+            ate = time.perf_counter() + args.aquecimento
+            await asyncio.gather(*(usuario(i, Coleta(), ate) for i in range(args.usuarios)))
+            execucoes.clear()
+
+        coleta = Coleta()
+        inicio = time.perf_counter()
+        await asyncio.gather(*(usuario(i, coleta, inicio + args.duracao) for i in range(args.usuarios)))
+        duracao = time.perf_counter() - inicio
+
+    return {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": versao(),
+            "python": platform.python_version(),
+            "alvo": args.url or "asgi",
+            "usuarios": args.usuarios,
+            "duracao_s": round(duracao, 1),
+            "fluxos": fluxos,
+            "execucoes": dict(execucoes),
+        },
+        "rotas": coleta.relatorio(duracao),
+    }
+
+def versao() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def imprimir(resultado: dict, base: dict = None):
+    print(f"{'rota':<32} {'n':>7} {'erros':>6} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for rota, r in resultado["rotas"].items():
+        linha = f"{rota:<32} {r['n']:>7} {r['erros']:>6} {r['req_s']:>8}"
+        linha += "".join(f" {r.get(m, '-'):>9}" for m in METRICAS[1:])
+        print(linha)
+        anterior = (base or {}).get("rotas", {}).get(rota)
+        if anterior:
+            print(f"{'  vs base':<32} {'':>7} {'':>6} " + " ".join(f"{variacao(anterior.get(m), r.get(m)):>9}"
+                                                                   for m in METRICAS))
+
+def variacao(antes, depois) -> str:
+    if not antes or depois is None:
+        return "-"
+    return f"{(depois - antes) / antes * 100:+.1f}%"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.cenarios")
+    parser.add_argument("--usuarios", type=int, default=20, help="Usuários virtuais concorrentes")
+    parser.add_argument("--duracao", type=float, default=30, help="Segundos de medição")
+    parser.add_argument("--aquecimento", type=float, default=5, help="Segundos de aquecimento (não medidos)")
+    parser.add_argument("--fluxos", type=pesos, default=pesos("atendimento=3,listagens=6,gestao=1"),
+                        help="Pesos dos fluxos, ex.: atendimento=3,listagens=6,gestao=1")
+    parser.add_argument("--url", help="Servidor já no ar (padrão: app no próprio processo)")
+    parser.add_argument("--amostra", type=int, default=2000, help="Ids sorteados do banco por tabela")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Grava o resultado em JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    resultado = asyncio.run(executar(args))
+    base = None
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)
+    imprimir(resultado, base)
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Verificação de planos (EXPLAIN) das consultas quentes das rotas.
+
+Executa as funções reais dos routers contra um banco populado, captura cada
+SELECT emitido (com os parâmetros) e roda EXPLAIN (FORMAT JSON) nele. Falha
+(exit 1) se algum plano tiver Seq Scan estimado acima de --limite-linhas.
+
+Uso (a partir da pasta backend, num banco descartável já migrado):
+    alembic upgrade head
+    python -m bench.explain --semear 200000
+    python -m bench.explain                # só verifica
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date, timedelta
+from fastapi import Response
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import engine
+from app.routers import os as rotas_os, clientes, veiculos, estoque, financeiro, dashboard
+
+SEMENTE_SQL = [
+    """INSERT INTO mecanico (nome, especialidade)
+       SELECT 'Mecânico ' || g, 'Geral' FROM generate_series(1, 20) g""",
+    """INSERT INTO cliente (nome, telefone, email, cpf_cnpj, endereco, telefone_digitos, cpf_cnpj_digitos)
+       SELECT 'Cliente ' || g, t, NULL, d, 'Rua ' || g, t, d
+       FROM (SELECT g, '119' || lpad(g::text, 8, '0') AS t, lpad(g::text, 11, '0') AS d
+             FROM generate_series(1, :clientes) g) s""",
+    """INSERT INTO veiculo (placa, placa_normalizada, modelo, marca, ano, cor, cliente_id)
+       SELECT 'P' || lpad(g::text, 7, '0'), 'P' || lpad(g::text, 7, '0'), 'Modelo', 'Marca', 2000 + g % 25, 'Prata',
+              1 + g % :clientes
+       FROM generate_series(1, :veiculos) g""",
+    """INSERT INTO peca (codigo, nome, valor_venda, estoque_atual)
+       SELECT 'PC' || lpad(g::text, 6, '0'), 'Peça ' || g, 10 + g % 500, 1000 FROM generate_series(1, 2000) g""",
+    """INSERT INTO servico (descricao, valor_mao_obra, tempo_estimado_minutos)
+       SELECT 'Serviço ' || g, 50 + g % 300, 30 + g % 240 FROM generate_series(1, 300) g""",
+    """INSERT INTO ordem_servico (data_abertura, data_fechamento, status, km_atual, defeito_reclamado,
+                                 cliente_id, veiculo_id, mecanico_id)
+       SELECT d, CASE WHEN g % 50 = 0 THEN NULL ELSE d + 3 END,
+              CASE WHEN g % 50 = 0 THEN (ARRAY['ORCAMENTO', 'APROVADO', 'EM_ANDAMENTO'])[1 + g / 50 % 3]
+                   ELSE 'FINALIZADO' END,
+              g % 200000, 'Revisão', 1 + (g % :veiculos) % :clientes, 1 + g % :veiculos, 1 + g % 20
+       FROM (SELECT g, current_date - (g % 1800) AS d FROM generate_series(1, :os) g) s""",
+    """INSERT INTO os_peca (ordem_servico_id, peca_id, quantidade, valor_unitario)
+       SELECT o.id, 1 + (o.id + k) % 2000, 1 + k, 10 + k FROM ordem_servico o, generate_series(0, 1) k""",
+    """INSERT INTO os_servico (ordem_servico_id, servico_id, quantidade, valor_unitario)
+       SELECT o.id, 1 + o.id % 300, 1, 80 FROM ordem_servico o""",
+    """INSERT INTO pagamento (ordem_servico_id, data_pagamento, valor, forma_pagamento, parcela)
+       SELECT o.id, o.data_abertura + 3, 100, (ARRAY['PIX', 'DINHEIRO', 'CREDITO'])[1 + o.id % 3], 1
+       FROM ordem_servico o WHERE o.status = 'FINALIZADO'""",
+    """INSERT INTO despesa (descricao, valor, data_vencimento, data_pagamento, categoria, status)
+       SELECT 'Despesa ' || g, 100 + g % 900, current_date - (g % 1800), NULL,
+              (ARRAY['GERAL', 'ALUGUEL', 'FORNECEDOR'])[1 + g % 3],
+              CASE WHEN g % 40 = 0 THEN 'PENDENTE' ELSE 'PAGO' END
+       FROM generate_series(1, :despesas) g""",
+]
+
+async def semear(quantidade_os: int):
+    async with engine.begin() as conn:
+        if await conn.scalar(text("SELECT EXISTS (SELECT 1 FROM ordem_servico)")):
+            sys.exit("Banco já possui OS; use um banco descartável para semear.")
+        params = {
+            "os": quantidade_os,
+            "clientes": max(quantidade_os // 4, 1),
+            "veiculos": max(quantidade_os // 3, 1),
+            "despesas": max(quantidade_os // 10, 1),
+        }
+        for sql in SEMENTE_SQL:
+            await conn.execute(text(sql), params)
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
+    print(f"Banco semeado com {quantidade_os} OS")
+
+async def cenarios(db: AsyncSession):
+    """Chamadas às rotas quentes, com os mesmos parâmetros que o front usa."""
+    hoje = date.today()
+    os_id = await db.scalar(text("SELECT max(id) FROM ordem_servico"))
+    cliente_id = await db.scalar(text("SELECT max(cliente_id) FROM veiculo"))
+
+    def os_lista(**kw):
+        args = dict(skip=0, limit=100, cursor=None, status=None, cliente_id=None, veiculo_id=None,
+                    mecanico_id=None, data_inicio=None, data_fim=None)
+        args.update(kw)
+        return rotas_os.listar_os(Response(), db=db, **args)
+
+    yield "listar_os", lambda: os_lista()
+
+    async def os_segunda_pagina():
+        r = Response()
+        await rotas_os.listar_os(r, skip=0, limit=100, cursor=None, status=None, cliente_id=None, veiculo_id=None,
+                                 mecanico_id=None, data_inicio=None, data_fim=None, db=db)
+        await os_lista(cursor=r.headers.get("X-Next-Cursor"))
+    yield "listar_os (cursor)", os_segunda_pagina
+    yield "listar_os (status)", lambda: os_lista(status="ORCAMENTO")
+    yield "listar_os (cliente)", lambda: os_lista(cliente_id=cliente_id)
+    yield "quadro_os", lambda: rotas_os.quadro_os(limite=50, mecanico_id=None, db=db)
+    yield "quadro_os (mecanico)", lambda: rotas_os.quadro_os(limite=50, mecanico_id=1, db=db)
+    yield "ver_detalhes_os", lambda: rotas_os.ver_detalhes_os(os_id, db=db)
+
+    yield "listar_clientes (nome)", lambda: clientes.listar_clientes(
+        Response(), skip=0, limit=100, cursor=None, ordem="nome", nome="cliente 12", db=db)
+    yield "buscar_clientes (nome)", lambda: clientes.buscar_clientes(q="cliente 1234", limite=20, db=db)
+    yield "buscar_clientes (curto)", lambda: clientes.buscar_clientes(q="cl", limite=20, db=db)
+    yield "buscar_clientes (cpf)", lambda: clientes.buscar_clientes(q="000.123.4", limite=20, db=db)
+    yield "buscar_veiculos (placa)", lambda: veiculos.buscar_veiculos(q="p00012", limite=20, db=db)
+    # placa diferente a cada execução: a rota responderia do cache
+    yield "buscar_por_placa", lambda: veiculos.buscar_por_placa(f"p{cliente_id:07d}", db=db)
+    yield "listar_veiculos_do_cliente", lambda: clientes.listar_veiculos_do_cliente(cliente_id, db=db)
+    yield "listar_veiculos (cliente)", lambda: veiculos.listar_veiculos(
+        Response(), skip=0, limit=100, cursor=None, cliente_id=cliente_id, db=db)
+
+    yield "listar_pecas", lambda: estoque.listar_pecas(
+        Response(), q=None, ordenar="nome", skip=0, limit=100, db=db)
+    peca_id = await db.scalar(text("SELECT max(id) FROM peca"))
+    yield "listar_movimentos", lambda: estoque.listar_movimentos(
+        peca_id, Response(), cursor=None, skip=0, limit=100, db=db)
+    yield "listar_pagamentos (periodo)", lambda: financeiro.listar_pagamentos(
+        Response(), data_inicio=hoje - timedelta(days=7), data_fim=hoje, forma_pagamento=None,
+        ordem_servico_id=None, ordenar="-data_pagamento", skip=0, limit=100, db=db)
+    yield "listar_pagamentos (os)", lambda: financeiro.listar_pagamentos(
+        Response(), data_inicio=None, data_fim=None, forma_pagamento=None,
+        ordem_servico_id=os_id, ordenar="-data_pagamento", skip=0, limit=100, db=db)
+    yield "listar_despesas (periodo)", lambda: financeiro.listar_despesas(
+        Response(), data_inicio=hoje - timedelta(days=30), data_fim=hoje, categoria=None, status=None,
+        q=None, ordenar="-data_vencimento", skip=0, limit=100, db=db)
+    yield "listar_despesas (pendentes)", lambda: financeiro.listar_despesas(
+        Response(), data_inicio=None, data_fim=hoje, categoria=None, status="PENDENTE",
+        q=None, ordenar="-data_vencimento", skip=0, limit=100, db=db)
+    yield "obter_resumo (mes)", lambda: financeiro.obter_resumo(
+        data_inicio=hoje.replace(day=1), data_fim=hoje, db=db)
+    # direto no cálculo: a rota responderia do cache
+    yield "dashboard", lambda: dashboard._calcular(db, hoje.replace(day=1), hoje)
+
+def seq_scans(plano: dict, limite: int):
+    """Percorre a árvore do plano devolvendo os Seq Scan acima do limite."""
+    if plano.get("Node Type") == "Seq Scan" and plano.get("Plan Rows", 0) > limite:
+        yield plano["Relation Name"], plano["Plan Rows"]
+    for filho in plano.get("Plans", []):
+        yield from seq_scans(filho, limite)
+
+async def verificar(limite: int, verboso: bool) -> int:
+    capturadas = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            capturadas.append((statement, parameters))
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capturar)
+    falhas = 0
+    try:
+        async with AsyncSession(engine) as db:
+            async for nome, chamada in cenarios(db):
+                capturadas.clear()
+                await chamada()
+                consultas = list(capturadas)
+                capturadas.clear()
+
+                event.remove(sync_engine, "before_cursor_execute", capturar)
+                try:
+                    for sql, params in consultas:
+                        conn = await db.connection()
+                        plano = (await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql, params)).scalar()
+                        if isinstance(plano, str):
+                            plano = json.loads(plano)
+                        raiz = plano[0]["Plan"]
+                        ruins = list(seq_scans(raiz, limite))
+                        status = "FALHA" if ruins else "ok"
+                        print(f"[{status}] {nome}: custo {raiz['Total Cost']:.0f}"
+                              + "".join(f" | Seq Scan em {t} (~{n} linhas)" for t, n in ruins))
+                        if verboso or ruins:
+                            print("    " + " ".join(sql.split()))
+                        falhas += bool(ruins)
+                finally:
+                    event.listen(sync_engine, "before_cursor_execute", capturar)
+                await db.rollback()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capturar)
+
+    print(f"{falhas} consulta(s) com Seq Scan acima de {limite} linhas")
+    return 1 if falhas else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.explain")
+    parser.add_argument("--semear", type=int, metavar="N_OS", help="Popula um banco vazio com N ordens de serviço")
+    parser.add_argument("--limite-linhas", type=int, default=1000,
+                        help="Seq Scan estimado acima disso reprova a consulta")
+    parser.add_argument("-v", "--verboso", action="store_true", help="Mostra o SQL de todas as consultas")
+    args = parser.parse_args(argv)
+
+    async def executar():
+        if args.semear:
+            await semear(args.semear)
+        return await verificar(args.limite_linhas, args.verboso)
+    return asyncio.run(executar())
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""Gerador de uma oficina sintética, carregada por COPY num Postgres local.
+
+Gera mecânicos, clientes, veículos, catálogo (peças e serviços), OS com
+itens, pagamentos, despesas e o livro de movimentos de estoque, coerentes
+entre si: totais das OS batem com itens e pagamentos, estoque com os
+movimentos, e resumo_diario é reconstruído no fim. Os ids são atribuídos
+aqui (e as sequences ajustadas depois), então o banco precisa estar vazio.
+
+A escala é dada pelo número de OS; o resto é proporcional. Com as médias
+padrão cada OS tem ~3 peças e ~1 serviço, então --os 1000000 dá cerca de
+3 milhões de linhas em os_peca (e outras tantas em movimento_estoque). As
+OS são geradas em blocos e cada bloco vai para o banco antes do próximo: a
+memória não cresce com a escala.
+
+Uso (a partir da pasta backend, num banco descartável já migrado):
+    alembic upgrade head
+    python -m bench.gerador --os 200000
+    python -m bench.gerador --os 1000000 --pecas-por-os 4 --semente 7
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List
+import asyncpg
+from app import resumo
+from app.database import SessionLocal, dsn_asyncpg
+
+NOMES = ("Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+         "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Paulo", "Rafaela", "Sérgio", "Tatiane", "Vinícius")
+SOBRENOMES = ("Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+              "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Barbosa")
+EMPRESAS = ("Transportes", "Logística", "Distribuidora", "Comércio", "Entregas")
+MARCAS = {
+    "Volkswagen": ("Gol", "Polo", "T-Cross", "Saveiro"), "Fiat": ("Uno", "Argo", "Strada", "Toro"),
+    "Chevrolet": ("Onix", "Prisma", "S10", "Tracker"), "Ford": ("Ka", "Ranger", "EcoSport"),
+    "Toyota": ("Corolla", "Hilux", "Etios"), "Honda": ("Civic", "Fit", "HR-V"), "Hyundai": ("HB20", "Creta"),
+}
+CORES = ("Prata", "Branco", "Preto", "Cinza", "Vermelho", "Azul")
+PECAS = ("Filtro de óleo", "Filtro de ar", "Pastilha de freio", "Disco de freio", "Vela de ignição", "Correia dentada",
+         "Amortecedor", "Bateria", "Lâmpada", "Óleo 5W30 (L)", "Junta do cabeçote", "Bomba d'água", "Embreagem")
+SERVICOS = ("Troca de óleo", "Alinhamento", "Balanceamento", "Revisão", "Troca de pastilhas", "Diagnóstico",
+            "Troca de correia", "Limpeza de bicos", "Suspensão", "Elétrica", "Ar-condicionado", "Embreagem")
+DEFEITOS = ("Barulho na suspensão", "Revisão periódica", "Freio fraco", "Luz da injeção acesa", "Motor falhando",
+            "Troca de óleo", "Ar não gela", "Vazamento de óleo", "Não dá partida", "Pneu desgastando torto")
+ESPECIALIDADES = ("Geral", "Elétrica", "Suspensão", "Motor", "Ar-condicionado", "Injeção")
+FORMAS = ("PIX", "DINHEIRO", "CARTAO_CREDITO", "CARTAO_DEBITO")
+CATEGORIAS = ("GERAL", "ALUGUEL", "FORNECEDOR", "SALARIOS", "IMPOSTOS", "ENERGIA")
+
+ESTOQUE_INICIAL = 1_000_000  # por peça: as vendas geradas e as do cenario.py nunca esgotam
+_ESPACO_CPF = 10 ** 11
+_LETRAS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+def centavos(valor: int) -> Decimal:
+    return Decimal(valor).scaleb(-2)
+
+def documento(i: int) -> tuple:
+    """CPF (ou CNPJ a cada 10) único por i: multiplicação por primo é bijeção módulo 10^11."""
+    if i % 10 == 0:
+        d = f"{(i * 104729) % 10 ** 14:014d}"
+        return f"{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}", d
+    d = f"{(i * 7919) % _ESPACO_CPF:011d}"
+    return f"{d[:3]}.{d[3:6]}.{d[6:9]}-{d[9:]}", d
+
+def placa(i: int) -> tuple:
+    """Placa Mercosul única por i (LLLNLNN) e a forma cadastrada: metade das
+    que têm equivalente no padrão antigo vem como 'ABC-1234'."""
+    n = (i * 7907) % (26 ** 3 * 10 * 26 * 100)
+    n, numeros = divmod(n, 100)
+    n, letra = divmod(n, 26)
+    n, digito = divmod(n, 10)
+    a, n = n % 26, n // 26
+    b, c = n % 26, n // 26
+    canonica = f"{_LETRAS[c]}{_LETRAS[b]}{_LETRAS[a]}{digito}{_LETRAS[letra]}{numeros:02d}"
+    if letra < 10 and i % 2 == 0:
+        return f"{canonica[:3]}-{digito}{letra}{numeros:02d}", canonica
+    return canonica, canonica
+
+class Gerador:
+    def __init__(self, args):
+        self.args = args
+        self.rnd = random.Random(args.semente)
+        self.hoje = date.today()
+        n = args.os
+        self.mecanicos = max(5, min(200, n // 5000))
+        self.clientes = max(1, n // 4)
+        self.veiculos = max(1, n // 3)
+        self.n_pecas = args.pecas
+        self.n_servicos = args.servicos
+        self.despesas = max(1, n // 10)
+        self.precos_pecas: List[int] = []
+        self.precos_servicos: List[int] = []
+        self.proximo_pagamento = 1
+        self.proximo_movimento = 1
+        self.contagem = {}
+
+    async def copiar(self, conn, tabela: str, colunas, linhas):
+        await conn.copy_records_to_table(tabela, records=linhas, columns=list(colunas))
+        self.contagem[tabela] = self.contagem.get(tabela, 0) + (len(linhas) if isinstance(linhas, list) else 0)
+
+    def nome_pessoa(self) -> str:
+        r = self.rnd
+        return f"{r.choice(NOMES)} {r.choice(SOBRENOMES)} {r.choice(SOBRENOMES)}"
+
+    async def cadastros(self, conn):
+        r = self.rnd
+        await self.copiar(conn, "mecanico", ("id", "nome", "especialidade"), [
+            (i, self.nome_pessoa(), r.choice(ESPECIALIDADES)) for i in range(1, self.mecanicos + 1)
+        ])
+
+        clientes = []
+        for i in range(1, self.clientes + 1):
+            doc, doc_digitos = documento(i)
+            nome = (f"{r.choice(SOBRENOMES)} {r.choice(EMPRESAS)} Ltda" if i % 10 == 0 else self.nome_pessoa())
+            fone_digitos = f"11{9 if r.random() < 0.8 else 3}{r.randrange(10 ** 7, 10 ** 8)}"
+            fone = f"({fone_digitos[:2]}) {fone_digitos[2:-4]}-{fone_digitos[-4:]}"
+            email = f"cliente{i}@exemplo.com.br" if r.random() < 0.6 else None
+            clientes.append((i, nome, fone, email, doc, f"Rua {r.choice(SOBRENOMES)}, {r.randrange(1, 3000)}",
+                             doc_digitos, fone_digitos))
+            if len(clientes) >= self.args.bloco:
+                await self._copiar_clientes(conn, clientes)
+        await self._copiar_clientes(conn, clientes)
+
+        veiculos = []
+        marcas = list(MARCAS)
+        for i in range(1, self.veiculos + 1):
+            cadastrada, canonica = placa(i)
+            marca = r.choice(marcas)
+            veiculos.append((i, cadastrada, canonica, r.choice(MARCAS[marca]), marca, r.randrange(2000, 2026),
+                             r.choice(CORES), self.dono(i)))
+            if len(veiculos) >= self.args.bloco:
+                await self.copiar(conn, "veiculo", ("id", "placa", "placa_normalizada", "modelo", "marca", "ano", "cor",
+                                                    "cliente_id"), veiculos)
+                veiculos = []
+        await self.copiar(conn, "veiculo", ("id", "placa", "placa_normalizada", "modelo", "marca", "ano", "cor",
+                                            "cliente_id"), veiculos)
+
+        pecas, movimentos = [], []
+        for i in range(1, self.n_pecas + 1):
+            preco = r.randrange(500, 80000)
+            self.precos_pecas.append(preco)
+            pecas.append((i, f"PC{i:07d}", f"{r.choice(PECAS)} {r.choice(marcas)} #{i}", centavos(preco), ESTOQUE_INICIAL))
+            movimentos.append(self.movimento(i, "ENTRADA", ESTOQUE_INICIAL, None, "Estoque inicial (gerador)"))
+        await self.copiar(conn, "peca", ("id", "codigo", "nome", "valor_venda", "estoque_atual"), pecas)
+        await self.copiar_movimentos(conn, movimentos)
+
+        servicos = []
+        for i in range(1, self.n_servicos + 1):
+            preco = r.randrange(3000, 90000)
+            self.precos_servicos.append(preco)
+            servicos.append((i, f"{r.choice(SERVICOS)} #{i}", centavos(preco), r.randrange(15, 480, 15)))
+        await self.copiar(conn, "servico", ("id", "descricao", "valor_mao_obra", "tempo_estimado_minutos"), servicos)
+
+    async def _copiar_clientes(self, conn, clientes: list):
+        await self.copiar(conn, "cliente", ("id", "nome", "telefone", "email", "cpf_cnpj", "endereco",
+                                            "cpf_cnpj_digitos", "telefone_digitos"), clientes)
+        clientes.clear()
+
+    def dono(self, veiculo_id: int) -> int:
+        return (veiculo_id - 1) % self.clientes + 1
+
+    def movimento(self, peca_id, tipo, quantidade, os_id, observacao, criado_em=None) -> tuple:
+        linha = (self.proximo_movimento, peca_id, tipo, quantidade, os_id, observacao,
+                 criado_em or datetime.now(), True)
+        self.proximo_movimento += 1
+        return linha
+
+    async def copiar_movimentos(self, conn, movimentos: list):
+        await self.copiar(conn, "movimento_estoque", ("id", "peca_id", "tipo", "quantidade", "ordem_servico_id",
+                                                      "observacao", "criado_em", "compactado"), movimentos)
+
+    def status_os(self, idade_dias: int) -> str:
+        # histórico quase todo fechado; as recentes se espalham pelo quadro
+        x = self.rnd.random()
+        if idade_dias > 30:
+            return "FINALIZADO" if x < 0.97 else ("CANCELADO" if x < 0.995 else "ORCAMENTO")
+        if idade_dias > 7:
+            return "FINALIZADO" if x < 0.75 else ("CANCELADO" if x < 0.8 else ("EM_ANDAMENTO" if x < 0.9 else "APROVADO"))
+        return "FINALIZADO" if x < 0.3 else ("EM_ANDAMENTO" if x < 0.55 else ("APROVADO" if x < 0.7 else "ORCAMENTO"))
+
+    async def ordens(self, conn):
+        r, args = self.rnd, self.args
+        dias = args.dias
+        inicio = self.hoje - timedelta(days=dias)
+        os_linhas, pecas_linhas, servicos_linhas, pagamentos, movimentos = [], [], [], [], []
+
+        async def descarregar():
+            await self.copiar(conn, "ordem_servico", (
+                "id", "data_abertura", "data_fechamento", "status", "km_atual", "defeito_reclamado", "cliente_id",
+                "veiculo_id", "mecanico_id", "total_pecas", "total_servicos", "total_pago", "saldo_devedor"), os_linhas)
+            await self.copiar(conn, "os_peca", ("ordem_servico_id", "peca_id", "quantidade", "valor_unitario"),
+                              pecas_linhas)
+            await self.copiar(conn, "os_servico", ("ordem_servico_id", "servico_id", "quantidade", "valor_unitario"),
+                              servicos_linhas)
+            await self.copiar(conn, "pagamento", ("id", "ordem_servico_id", "data_pagamento", "valor",
+                                                  "forma_pagamento", "parcela", "observacao"), pagamentos)
+            await self.copiar_movimentos(conn, movimentos)
+            for lista in (os_linhas, pecas_linhas, servicos_linhas, pagamentos, movimentos):
+                lista.clear()
+
+        for os_id in range(1, args.os + 1):
+            abertura = inicio + timedelta(days=(os_id - 1) * dias // args.os)
+            idade = (self.hoje - abertura).days
+            status = self.status_os(idade)
+            fechado = status in ("FINALIZADO", "CANCELADO")
+            fechamento = min(abertura + timedelta(days=r.randrange(0, 6)), self.hoje) if fechado else None
+            veiculo_id = r.randrange(1, self.veiculos + 1)
+            criado_em = datetime.combine(abertura, datetime.min.time()) + timedelta(hours=r.randrange(8, 18))
+
+            total_pecas = 0
+            for peca_id in r.sample(range(1, self.n_pecas + 1), min(self.n_pecas, r.randrange(0, 2 * args.pecas_por_os + 1))):
+                quantidade = r.choice((1, 1, 1, 2, 4))
+                preco = self.precos_pecas[peca_id - 1]
+                pecas_linhas.append((os_id, peca_id, quantidade, centavos(preco)))
+                movimentos.append(self.movimento(peca_id, "VENDA", -quantidade, os_id, f"OS {os_id}", criado_em))
+                total_pecas += quantidade * preco
+
+            total_servicos = 0
+            n_servicos = r.randrange(1, 2 * args.servicos_por_os) if args.servicos_por_os >= 1 else 0
+            for servico_id in r.sample(range(1, self.n_servicos + 1), min(self.n_servicos, n_servicos)):
+                preco = self.precos_servicos[servico_id - 1]
+                servicos_linhas.append((os_id, servico_id, 1, centavos(preco)))
+                total_servicos += preco
+
+            total = total_pecas + total_servicos
+            pago = 0
+            if status == "FINALIZADO" and total:
+                parcelas = 1 if r.random() < 0.8 else 2
+                for parcela in range(1, parcelas + 1):
+                    valor = total - pago if parcela == parcelas else total // parcelas
+                    pagamentos.append((self.proximo_pagamento, os_id, fechamento, centavos(valor), r.choice(FORMAS),
+                                       parcela, None))
+                    self.proximo_pagamento += 1
+                    pago += valor
+            elif status in ("APROVADO", "EM_ANDAMENTO") and total and r.random() < 0.3:
+                pago = total // 2
+                pagamentos.append((self.proximo_pagamento, os_id, abertura, centavos(pago), "PIX", 1, "Sinal"))
+                self.proximo_pagamento += 1
+
+            os_linhas.append((os_id, abertura, fechamento, status, r.randrange(5_000, 250_000), r.choice(DEFEITOS),
+                              self.dono(veiculo_id), veiculo_id, r.randrange(1, self.mecanicos + 1),
+                              centavos(total_pecas), centavos(total_servicos), centavos(pago), centavos(total - pago)))
+            if len(os_linhas) >= args.bloco:
+                await descarregar()
+                print(f"  {os_id}/{args.os} OS", end="\r", flush=True)
+        await descarregar()
+        print()
+
+    async def despesas_(self, conn):
+        r = self.rnd
+        linhas = []
+        for i in range(1, self.despesas + 1):
+            vencimento = self.hoje - timedelta(days=r.randrange(-30, self.args.dias))
+            pendente = vencimento > self.hoje - timedelta(days=10) and r.random() < 0.5
+            linhas.append((i, f"{r.choice(CATEGORIAS).title()} {i}", centavos(r.randrange(5000, 500000)), vencimento,
+                           None if pendente else vencimento, r.choice(CATEGORIAS), "PENDENTE" if pendente else "PAGO"))
+            if len(linhas) >= self.args.bloco:
+                await self.copiar(conn, "despesa", ("id", "descricao", "valor", "data_vencimento", "data_pagamento",
+                                                    "categoria", "status"), linhas)
+                linhas = []
+        await self.copiar(conn, "despesa", ("id", "descricao", "valor", "data_vencimento", "data_pagamento",
+                                            "categoria", "status"), linhas)
+
+async def gerar(args) -> dict:
+    g = Gerador(args)
+    inicio = time.perf_counter()
+    conn = await asyncpg.connect(dsn_asyncpg())
+    try:
+        if await conn.fetchval("SELECT EXISTS (SELECT 1 FROM ordem_servico) OR EXISTS (SELECT 1 FROM cliente)"):
+            sys.exit("Banco já possui dados; use um banco descartável (vazio e migrado).")
+        async with conn.transaction():
+            print(f"Cadastros: {g.clientes} clientes, {g.veiculos} veículos, {g.n_pecas} peças")
+            await g.cadastros(conn)
+            print(f"Ordens de serviço: {args.os}")
+            await g.ordens(conn)
+            print(f"Despesas: {g.despesas}")
+            await g.despesas_(conn)
+
+            # estoque = entrada inicial + vendas geradas (tudo já compactado)
+            await conn.execute("""
+                UPDATE peca p SET estoque_atual = m.saldo
+                FROM (SELECT peca_id, sum(quantidade) AS saldo FROM movimento_estoque GROUP BY peca_id) m
+                WHERE p.id = m.peca_id
+            """)
+            for tabela in ("mecanico", "cliente", "veiculo", "peca", "servico", "ordem_servico", "pagamento",
+                           "despesa", "movimento_estoque"):
+                await conn.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), (SELECT coalesce(max(id), 1) FROM {tabela}))"
+                )
+    finally:
+        await conn.close()
+
+    async with SessionLocal() as db:
+        dias = await resumo.reconstruir(db)
+    print(f"resumo_diario: {dias} linha(s)")
+
+    conn = await asyncpg.connect(dsn_asyncpg())
+    try:
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+
+    duracao = time.perf_counter() - inicio
+    print(f"Concluído em {duracao:.1f}s: " + ", ".join(f"{t}={n}" for t, n in g.contagem.items()))
+    return g.contagem
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.gerador")
+    parser.add_argument("--os", type=int, default=100_000, help="Ordens de serviço (o resto é proporcional)")
+    parser.add_argument("--pecas-por-os", type=int, default=3, help="Média de peças por OS")
+    parser.add_argument("--servicos-por-os", type=int, default=1, help="Média de serviços por OS (aprox.)")
+    parser.add_argument("--pecas", type=int, default=5000, help="Tamanho do catálogo de peças")
+    parser.add_argument("--servicos", type=int, default=300, help="Tamanho do catálogo de serviços")
+    parser.add_argument("--dias", type=int, default=1825, help="Período coberto pelo histórico")
+    parser.add_argument("--bloco", type=int, default=20_000, help="Linhas de OS por COPY")
+    parser.add_argument("--semente", type=int, default=42)
+    asyncio.run(gerar(parser.parse_args(argv)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Listagens grandes: caminho ORM + response_model x tuplas + orjson (app/respostas.py).
+
+Para cada tabela, duas rotas com a mesma consulta e o mesmo JSON:
+- orm: select(Model), entidades no identity map, validação no response_model
+  e dump_json do pydantic (o caminho que as listagens usavam);
+- tuplas: select das colunas do schema, dicts e orjson.
+
+As rotas são chamadas em processo via ASGI. Além de latência e vazão, mede o
+tempo de CPU do processo por requisição, que é o que o caminho rápido corta.
+
+Uso (a partir da pasta backend, com o banco populado por bench.gerador):
+    python -m bench.serializacao --linhas 500 5000 --requisicoes 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+import httpx
+from fastapi import FastAPI, Response
+from sqlalchemy import select
+from app import models, respostas, schemas
+from app.database import SessionLocal, engine
+
+# tabela -> (modelo, schema, campos trocados, coluna de ordenação)
+TABELAS = {
+    "clientes": (models.Cliente, schemas.ClienteResponse, {}, models.Cliente.id),
+    "os": (models.OrdemServico, schemas.OSResponse, {"numero_os": models.OrdemServico.id}, models.OrdemServico.id),
+    "pecas": (models.Peca, schemas.PecaResponse, {"estoque_atual": models.Peca.estoque_disponivel}, models.Peca.id),
+}
+
+def montar_app() -> FastAPI:
+    app = FastAPI()
+
+    def rota_orm(modelo, schema, ordem):
+        async def listar(limit: int):
+            async with SessionLocal() as db:
+                itens = (await db.scalars(select(modelo).order_by(ordem).limit(limit))).all()
+                if modelo is models.OrdemServico:
+                    for os in itens:
+                        os.numero_os = os.id
+                return itens
+        return listar
+
+    def rota_tuplas(modelo, schema, origem, ordem):
+        async def listar(response: Response, limit: int):
+            stmt = select(*respostas.colunas(schema, modelo, **origem)).order_by(ordem).limit(limit)
+            async with SessionLocal() as db:
+                resultado = await db.execute(stmt)
+                return respostas.resposta(respostas.dicts(resultado.keys(), resultado), response)
+        return listar
+
+    for nome, (modelo, schema, origem, ordem) in TABELAS.items():
+        app.get(f"/orm/{nome}", response_model=List[schema])(rota_orm(modelo, schema, ordem))
+        app.get(f"/tuplas/{nome}", response_model=List[schema])(rota_tuplas(modelo, schema, origem, ordem))
+    return app
+
+async def rodada(cliente: httpx.AsyncClient, rota: str, linhas: int, total: int, concorrencia: int) -> dict:
+    latencias = []
+    fila = iter(range(total))
+    tamanho = 0
+
+    async def trabalhador():
+        nonlocal tamanho
+        for _ in fila:
+            inicio = time.perf_counter()
+            r = await cliente.get(rota, params={"limit": linhas})
+            r.raise_for_status()
+            latencias.append(time.perf_counter() - inicio)
+            tamanho = len(r.content)
+
+    cpu = time.process_time()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+    cpu = time.process_time() - cpu
+
+    q = statistics.quantiles(sorted(latencias), n=100)
+    return {
+        "rota": rota,
+        "linhas": linhas,
+        "concorrencia": concorrencia,
+        "bytes": tamanho,
+        "req_s": round(total / duracao, 1),
+        "cpu_ms_req": round(cpu / total * 1000, 2),
+        "p50_ms": round(q[49] * 1000, 2),
+        "p95_ms": round(q[94] * 1000, 2),
+        "p99_ms": round(q[98] * 1000, 2),
+    }
+
+async def conferir(cliente: httpx.AsyncClient, nome: str, linhas: int):
+    orm = (await cliente.get(f"/orm/{nome}", params={"limit": linhas})).json()
+    tuplas = (await cliente.get(f"/tuplas/{nome}", params={"limit": linhas})).json()
+    if orm != tuplas:
+        raise SystemExit(f"{nome}: os dois caminhos geraram JSON diferente")
+
+async def executar(args) -> list:
+    app = montar_app()
+    resultados = []
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=120) as cliente:
+        for nome in args.tabelas:
+            await conferir(cliente, nome, max(args.linhas))
+            for linhas in args.linhas:
+                for caminho in ("orm", "tuplas"):
+                    rota = f"/{caminho}/{nome}"
+                    await rodada(cliente, rota, linhas, min(args.requisicoes, 20), 2)  # aquecimento
+                    for concorrencia in args.concorrencia:
+                        r = await rodada(cliente, rota, linhas, args.requisicoes, concorrencia)
+                        resultados.append(r)
+                        print(f"{rota:>15} {linhas:>6} linhas c={concorrencia:<3} {r['req_s']:>8} req/s  "
+                              f"cpu {r['cpu_ms_req']}ms/req  p50 {r['p50_ms']}ms  p95 {r['p95_ms']}ms  "
+                              f"p99 {r['p99_ms']}ms  {r['bytes'] // 1024}KiB")
+    await engine.dispose()
+    return resultados
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.serializacao")
+    parser.add_argument("--tabelas", nargs="+", choices=list(TABELAS), default=list(TABELAS))
+    parser.add_argument("--linhas", type=int, nargs="+", default=[100, 500, 5000], help="Linhas por resposta")
+    parser.add_argument("--requisicoes", type=int, default=200, help="Requisições por rodada")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--saida", help="Grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    resultados = asyncio.run(executar(args))
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+if __name__ == "__main__":
+    main()
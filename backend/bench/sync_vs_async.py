@@ -0,0 +1,105 @@
+"""Comparação de vazão: rota síncrona (threadpool + psycopg2) x assíncrona (asyncpg).
+
+As duas rotas fazem o mesmo trabalho da listagem de OS (primeira página
+ordenada por data_abertura, id) com pools do mesmo tamanho, e são chamadas
+em processo via ASGI com níveis crescentes de concorrência.
+
+Uso (a partir da pasta backend, com o banco populado, ex.: bench.explain --semear):
+    python -m bench.sync_vs_async --requisicoes 2000 --concorrencia 1 10 50 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from app import models
+from app.database import DATABASE_URL, url_com_driver
+
+def consulta(limit: int):
+    OS = models.OrdemServico
+    return select(OS.id, OS.status, OS.data_abertura).order_by(OS.data_abertura.desc(), OS.id.desc()).limit(limit)
+
+def montar_app(pool: int, limit: int) -> FastAPI:
+    sync_engine = create_engine(url_com_driver(DATABASE_URL, "psycopg2"), pool_size=pool, max_overflow=0)
+    async_engine = create_async_engine(url_com_driver(DATABASE_URL, "asyncpg"), pool_size=pool, max_overflow=0)
+    app = FastAPI()
+
+    @app.get("/sync")
+    def rota_sync():
+        with Session(sync_engine) as db:
+            return [dict(r) for r in db.execute(consulta(limit)).mappings()]
+
+    @app.get("/async")
+    async def rota_async():
+        async with AsyncSession(async_engine) as db:
+            return [dict(r) for r in (await db.execute(consulta(limit))).mappings()]
+
+    app.state.engines = (sync_engine, async_engine)
+    return app
+
+async def rodada(cliente: httpx.AsyncClient, rota: str, total: int, concorrencia: int) -> dict:
+    latencias = []
+    fila = iter(range(total))
+
+    async def trabalhador():
+        for _ in fila:
+            inicio = time.perf_counter()
+            r = await cliente.get(rota)
+            r.raise_for_status()
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    q = statistics.quantiles(latencias, n=100)
+    return {
+        "rota": rota,
+        "concorrencia": concorrencia,
+        "req_s": round(total / duracao, 1),
+        "p50_ms": round(q[49] * 1000, 2),
+        "p95_ms": round(q[94] * 1000, 2),
+        "p99_ms": round(q[98] * 1000, 2),
+    }
+
+async def executar(args) -> list:
+    app = montar_app(args.pool, args.limit)
+    resultados = []
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        for rota in ("/sync", "/async"):
+            await rodada(cliente, rota, min(args.requisicoes, 100), 4)  # aquecimento
+        for concorrencia in args.concorrencia:
+            for rota in ("/sync", "/async"):
+                r = await rodada(cliente, rota, args.requisicoes, concorrencia)
+                resultados.append(r)
+                print(f"{r['rota']:>6} c={concorrencia:<4} {r['req_s']:>8} req/s  "
+                      f"p50 {r['p50_ms']}ms  p95 {r['p95_ms']}ms  p99 {r['p99_ms']}ms")
+
+    sync_engine, async_engine = app.state.engines
+    sync_engine.dispose()
+    await async_engine.dispose()
+    return resultados
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.sync_vs_async")
+    parser.add_argument("--requisicoes", type=int, default=2000, help="Requisições por rodada")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--pool", type=int, default=10, help="Conexões em cada pool")
+    parser.add_argument("--limit", type=int, default=50, help="Linhas por resposta")
+    parser.add_argument("--saida", help="Grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    resultados = asyncio.run(executar(args))
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+if __name__ == "__main__":
+    main()
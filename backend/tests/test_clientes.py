@@ -0,0 +1,25 @@
+import orjson
+from fastapi import Response
+from app import models
+from app.routers import clientes
+
+def test_prefixo_do_nome_trata_curingas_como_texto(rodar, sessoes):
+    async def cenario():
+        async with sessoes() as db:
+            db.add_all([
+                models.Cliente(nome=nome, telefone="11999990000", cpf_cnpj=f"curinga-{i}", endereco="Rua")
+                for i, nome in enumerate(["Auto 100% Peças", "Auto 1000 Peças", "Auto_Center", "AutoXCenter"])
+            ])
+            await db.commit()
+
+        async def nomes(prefixo):
+            async with sessoes() as db:
+                r = await clientes.listar_clientes(Response(), skip=0, limit=100, cursor=None, ordem="nome",
+                                                   nome=prefixo, db=db)
+            return [c["nome"] for c in orjson.loads(r.body)]
+
+        return await nomes("auto 100%"), await nomes("auto_")
+
+    porcento, sublinhado = rodar(cenario())
+    assert porcento == ["Auto 100% Peças"]
+    assert sublinhado == ["Auto_Center"]
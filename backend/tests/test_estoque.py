@@ -0,0 +1,93 @@
+import orjson
+from fastapi import HTTPException, Response
+from sqlalchemy import func, select
+from app import models, movimentos, schemas
+from app.routers import estoque
+
+def test_peca_com_movimentos_nao_e_removida(rodar, sessoes):
+    async def cenario():
+        async with sessoes() as db:
+            peca = models.Peca(codigo="MOV-1", nome="Filtro", valor_venda=10, estoque_atual=0)
+            db.add(peca)
+            await db.flush()
+            await movimentos.registrar(db, [movimentos.movimento(peca.id, movimentos.ENTRADA, 5)])
+            await db.commit()
+            peca_id = peca.id
+        erro = None
+        async with sessoes() as db:
+            try:
+                await estoque.remover_peca(peca_id, db=db)
+            except HTTPException as e:
+                erro = e.status_code
+        async with sessoes() as db:
+            restantes = await db.scalar(select(func.count()).select_from(models.MovimentoEstoque)
+                                        .where(models.MovimentoEstoque.peca_id == peca_id))
+        return erro, restantes
+
+    # o histórico de estoque não some com a peça
+    assert rodar(cenario()) == (400, 1)
+
+def test_peca_sem_movimentos_e_removida(rodar, sessoes):
+    async def cenario():
+        async with sessoes() as db:
+            peca = models.Peca(codigo="MOV-2", nome="Vela", valor_venda=10, estoque_atual=0)
+            db.add(peca)
+            await db.commit()
+            peca_id = peca.id
+        async with sessoes() as db:
+            await estoque.remover_peca(peca_id, db=db)
+        async with sessoes() as db:
+            return await db.get(models.Peca, peca_id)
+
+    assert rodar(cenario()) is None
+
+def _editar(rodar, sessoes, peca_id, **campos):
+    async def editar():
+        async with sessoes() as db:
+            try:
+                dados = {"codigo": "MOV-3", "nome": "Pastilha", "valor_venda": 10, **campos}
+                return (await estoque.atualizar_peca(peca_id, schemas.PecaUpdate(**dados), db=db)).estoque_disponivel
+            except HTTPException as e:
+                return e.status_code
+    return rodar(editar())
+
+def test_edicao_nao_desfaz_venda_feita_com_o_formulario_aberto(rodar, sessoes):
+    async def criar():
+        async with sessoes() as db:
+            peca = models.Peca(codigo="MOV-3", nome="Pastilha", valor_venda=10, estoque_atual=10)
+            db.add(peca)
+            await db.flush()
+            # vendida depois de o formulário abrir mostrando 10
+            await movimentos.registrar(db, [movimentos.movimento(peca.id, movimentos.VENDA, -2)])
+            await db.commit()
+            return peca.id
+    peca_id = rodar(criar())
+
+    # só o preço mudou: a venda fica
+    assert _editar(rodar, sessoes, peca_id, valor_venda=12, estoque_atual=10, estoque_anterior=10) == 8
+    # quantidade digitada sobre um estoque que já mudou
+    assert _editar(rodar, sessoes, peca_id, estoque_atual=15, estoque_anterior=10) == 409
+    assert _editar(rodar, sessoes, peca_id, estoque_atual=15) == 400
+    assert _editar(rodar, sessoes, peca_id, estoque_atual=15, estoque_anterior=8) == 15
+
+def test_busca_do_catalogo_trata_curingas_como_texto(rodar, sessoes):
+    async def cenario():
+        async with sessoes() as db:
+            db.add_all([
+                models.Peca(codigo="C_1", nome="Óleo 100% sintético", valor_venda=10, estoque_atual=0),
+                models.Peca(codigo="CX1", nome="Óleo 1000 mineral", valor_venda=10, estoque_atual=0),
+                models.Servico(descricao="Troca 100% grátis", valor_mao_obra=10, tempo_estimado_minutos=30),
+                models.Servico(descricao="Troca 1000 km", valor_mao_obra=10, tempo_estimado_minutos=30),
+            ])
+            await db.commit()
+
+        async def listar(rota, campo, q):
+            async with sessoes() as db:
+                r = await rota(Response(), q=q, skip=0, limit=100, db=db)
+            return sorted(item[campo] for item in orjson.loads(r.body))
+
+        return (await listar(estoque.listar_pecas, "nome", "100%"),
+                await listar(estoque.listar_pecas, "codigo", "C_"),
+                await listar(estoque.listar_servicos, "descricao", "100%"))
+
+    assert rodar(cenario()) == (["Óleo 100% sintético"], ["C_1"], ["Troca 100% grátis"])
@@ -0,0 +1,104 @@
+import asyncio
+from sqlalchemy import func, select
+from app import fila, models
+from app.routers import financeiro  # noqa: F401 (registra as tarefas do financeiro)
+
+feitas = []
+
+@fila.tarefa("teste_ok")
+async def _ok(db, n):
+    feitas.append(n)
+
+@fila.tarefa("teste_erro")
+async def _erro(db):
+    raise ValueError("falhou de propósito")
+
+@fila.tarefa("teste_conexao_perdida")
+async def _conexao_perdida(db):
+    # como um timeout no meio de um comando: a transação não tem mais como ser desfeita
+    await (await db.connection()).invalidate()
+    raise ConnectionError("conexão perdida")
+
+@fila.tarefa("teste_lenta")
+async def _lenta(db):
+    await asyncio.sleep(10)
+
+async def _enfileirar(sessoes, tipo, **dados):
+    async with sessoes() as db:
+        tarefa = fila.enfileirar(db, tipo, tentativas=2, **dados)
+        await db.commit()
+        return tarefa.id
+
+async def _linha(sessoes, tarefa_id):
+    async with sessoes() as db:
+        return (await db.execute(
+            select(models.Tarefa.status, models.Tarefa.tentativas, models.Tarefa.erro,
+                   models.Tarefa.executar_em > func.now())
+            .where(models.Tarefa.id == tarefa_id)
+        )).first()
+
+def test_tarefa_concluida_e_apagada(rodar, sessoes):
+    async def cenario():
+        tarefa_id = await _enfileirar(sessoes, "teste_ok", n=1)
+        return await fila.executar_uma(sessoes), await _linha(sessoes, tarefa_id)
+
+    assert rodar(cenario()) == (True, None)
+    assert feitas == [1]
+
+def test_falha_grava_tentativa_e_adia(rodar, sessoes):
+    async def cenario():
+        tarefa_id = await _enfileirar(sessoes, "teste_erro")
+        await fila.executar_uma(sessoes)
+        # adiada: não volta na mesma hora
+        return await _linha(sessoes, tarefa_id), await fila.executar_uma(sessoes)
+
+    (status, tentativas, erro, adiada), de_novo = rodar(cenario())
+    assert (status, tentativas, adiada, de_novo) == (fila.PENDENTE, 1, True, False)
+    assert "falhou de propósito" in erro
+
+def test_timeout_nao_volta_para_a_fila_na_hora(rodar, sessoes, monkeypatch):
+    monkeypatch.setattr(fila.settings, "tarefas_timeout", 0.05)
+
+    async def cenario():
+        tarefa_id = await _enfileirar(sessoes, "teste_lenta")
+        await fila.executar_uma(sessoes)
+        return await _linha(sessoes, tarefa_id), await fila.executar_uma(sessoes)
+
+    (status, tentativas, erro, adiada), de_novo = rodar(cenario())
+    assert (status, tentativas, adiada, de_novo) == (fila.PENDENTE, 1, True, False)
+    assert "TimeoutError" in erro
+
+def test_ultima_tentativa_fica_como_falhou(rodar, sessoes):
+    async def cenario():
+        tarefa_id = await _enfileirar(sessoes, "teste_erro")
+        async with sessoes() as db:
+            tarefa = await db.get(models.Tarefa, tarefa_id)
+            tarefa.tentativas = 1
+            await db.commit()
+        await fila.executar_uma(sessoes)
+        return await _linha(sessoes, tarefa_id)
+
+    status, tentativas, _, _ = rodar(cenario())
+    assert (status, tentativas) == (fila.FALHOU, 2)
+
+def test_conexao_perdida_nao_volta_para_a_fila_na_hora(rodar, sessoes):
+    async def cenario():
+        tarefa_id = await _enfileirar(sessoes, "teste_conexao_perdida")
+        await fila.executar_uma(sessoes)
+        return await _linha(sessoes, tarefa_id), await fila.executar_uma(sessoes)
+
+    (status, tentativas, erro, adiada), de_novo = rodar(cenario())
+    assert (status, tentativas, adiada, de_novo) == (fila.PENDENTE, 1, True, False)
+    assert "conexão perdida" in erro
+
+def test_remocao_de_despesa_fica_na_auditoria(rodar, sessoes):
+    async def cenario():
+        await _enfileirar(sessoes, "auditar_remocao_despesa", usuario="admin", usuario_id=1,
+                          despesa_id=7, descricao="Conta de luz", valor=120.5)
+        await fila.executar_uma(sessoes)
+        async with sessoes() as db:
+            return (await db.execute(select(models.Auditoria.acao, models.Auditoria.usuario,
+                                            models.Auditoria.dados))).all()
+
+    assert rodar(cenario()) == [("REMOVER_DESPESA", "admin",
+                                 {"despesa_id": 7, "descricao": "Conta de luz", "valor": 120.5})]
@@ -0,0 +1,24 @@
+from datetime import date
+import orjson
+from fastapi import Response
+from app import models
+from app.routers import financeiro
+
+def test_busca_de_despesas_trata_curingas_como_texto(rodar, sessoes):
+    async def cenario():
+        async with sessoes() as db:
+            db.add_all([
+                models.Despesa(descricao=descricao, valor=10, data_vencimento=date(2026, 1, 1), categoria="FIXA")
+                for descricao in ["Desconto 10% fornecedor", "Desconto 100 reais", "Conta_luz", "Conta de luz"]
+            ])
+            await db.commit()
+
+        async def descricoes(q):
+            async with sessoes() as db:
+                r = await financeiro.listar_despesas(Response(), data_inicio=None, data_fim=None, categoria=None,
+                                                     status=None, q=q, skip=0, limit=100, db=db)
+            return [d["descricao"] for d in orjson.loads(r.body)]
+
+        return await descricoes("10%"), await descricoes("conta_")
+
+    assert rodar(cenario()) == (["Desconto 10% fornecedor"], ["Conta_luz"])
@@ -0,0 +1,32 @@
+from app import consultas, rastreio
+
+def _consultas_detalhe(rodar, sessoes, os_id):
+    async def carregar():
+        async with sessoes() as db:
+            with rastreio.rastrear("detalhe da OS") as r:
+                detalhes = await consultas.carregar_os_detalhada(db, os_id)
+        return detalhes, r.total
+    return rodar(carregar())
+
+def test_detalhe_em_numero_fixo_de_consultas(rodar, sessoes, nova_os):
+    pequena = nova_os(pecas=1)
+    grande = nova_os(pecas=15, servicos=15, pagamentos=3)
+
+    detalhes, total = _consultas_detalhe(rodar, sessoes, pequena)
+    assert len(detalhes["pecas"]) == 1
+    assert total == 4
+
+    detalhes, total = _consultas_detalhe(rodar, sessoes, grande)
+    assert len(detalhes["pecas"]) + len(detalhes["servicos"]) == 30
+    assert len(detalhes["pagamentos"]) == 3
+    assert total == 4
+
+def test_detalhe_totais(rodar, sessoes, nova_os):
+    detalhes, _ = _consultas_detalhe(rodar, sessoes, nova_os(pecas=2, servicos=1, pagamentos=1))
+    assert detalhes["total_geral"] == 70
+    assert detalhes["saldo_devedor"] == 65
+
+def test_detalhe_os_inexistente(rodar, sessoes):
+    detalhes, total = _consultas_detalhe(rodar, sessoes, 10**9)
+    assert detalhes is None
+    assert total == 1
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from app import models, movimentos, schemas
+from app.routers import os as rotas_os
+
+async def _estado(sessoes, os_id, peca_id):
+    async with sessoes() as db:
+        total = await db.scalar(select(models.OrdemServico.total_pecas).where(models.OrdemServico.id == os_id))
+        devolucoes = await db.scalar(select(func.count()).select_from(models.MovimentoEstoque).where(
+            models.MovimentoEstoque.peca_id == peca_id, models.MovimentoEstoque.tipo == movimentos.DEVOLUCAO))
+        return total, devolucoes
+
+async def _remover(sessoes, os_id, peca_id):
+    async with sessoes() as db:
+        try:
+            await rotas_os.remover_peca_os(os_id, peca_id, db=db)
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+def test_remocao_duplicada_de_peca_estorna_uma_vez(rodar, sessoes, nova_os):
+    os_id = nova_os(pecas=1)
+
+    async def cenario():
+        async with sessoes() as db:
+            peca_id = await db.scalar(select(models.OSPeca.peca_id).where(models.OSPeca.ordem_servico_id == os_id))
+        antes = await _estado(sessoes, os_id, peca_id)
+        # clique duplo: os dois DELETEs concorrentes na mesma linha
+        resultados = await asyncio.gather(_remover(sessoes, os_id, peca_id), _remover(sessoes, os_id, peca_id))
+        return antes, sorted(resultados), await _estado(sessoes, os_id, peca_id)
+
+    (total_antes, _), resultados, (total_depois, devolucoes) = rodar(cenario())
+    assert resultados == [200, 404]
+    assert total_antes - total_depois == 10
+    assert devolucoes == 1
+
+def test_remover_servico_inexistente(rodar, sessoes, nova_os):
+    os_id = nova_os(servicos=1)
+
+    async def remover():
+        async with sessoes() as db:
+            await rotas_os.remover_servico_os(os_id, 10**9, db=db)
+
+    with pytest.raises(HTTPException) as erro:
+        rodar(remover())
+    assert erro.value.status_code == 404
+
+def test_servico_lancado_por_lote_concorrente_vira_409(rodar, sessoes, nova_os, monkeypatch):
+    os_id = nova_os()
+    conferir = rotas_os._servicos_ja_na_os
+
+    async def cenario():
+        async with sessoes() as db:
+            servico = models.Servico(descricao="Alinhamento", valor_mao_obra=80, tempo_estimado_minutos=30)
+            db.add(servico)
+            await db.commit()
+            servico_id = servico.id
+
+        async def conferencia_atrasada(db, os_id_, ids):
+            # o outro lote grava entre a conferência e o INSERT deste
+            monkeypatch.setattr(rotas_os, "_servicos_ja_na_os", conferir)
+            async with sessoes() as outro:
+                outro.add(models.OSServico(ordem_servico_id=os_id_, servico_id=servico_id, quantidade=1, valor_unitario=80))
+                await outro.commit()
+            return []
+        monkeypatch.setattr(rotas_os, "_servicos_ja_na_os", conferencia_atrasada)
+
+        lote = schemas.OSItensLote(servicos=[{"servico_id": servico_id, "quantidade": 1}])
+        async with sessoes() as db:
+            try:
+                await rotas_os.adicionar_itens_os(os_id, lote, db=db)
+            except HTTPException as e:
+                return e.status_code, servico_id, e.detail
+
+    status, servico_id, detalhe = rodar(cenario())
+    assert status == 409
+    assert str(servico_id) in detalhe
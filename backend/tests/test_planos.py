@@ -0,0 +1,12 @@
+"""Planos das consultas quentes (bench/explain.py) como teste: um índice que
+some ou uma consulta que deixa de usá-lo reprova aqui, não só no script.
+Os planos com Seq Scan aparecem na saída capturada do pytest."""
+from bench import explain
+
+# Acima disso um Seq Scan é varredura de histórico, não de tabela pequena
+OS_SEMEADAS = 20000
+LIMITE_LINHAS = 1000
+
+def test_consultas_quentes_sem_seq_scan_grande(rodar):
+    rodar(explain.semear(OS_SEMEADAS))
+    assert rodar(explain.verificar(LIMITE_LINHAS, verboso=False)) == 0
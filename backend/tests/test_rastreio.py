@@ -0,0 +1,64 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select, text
+from app import models, rastreio
+from app.config import settings
+from app.database import SessionLocal
+
+async def _consultas(n: int, repetida: bool = False):
+    async with SessionLocal() as db:
+        for i in range(n):
+            # mesmo texto parametrizado (N+1) ou um comando diferente por vez
+            await db.execute(select(models.Peca.id).where(models.Peca.id == i) if repetida else text(f"SELECT {i}"))
+
+def test_orcamento_excedido_e_detectado(rodar, monkeypatch):
+    monkeypatch.setattr(settings, "consultas_modo", "log")
+    with rastreio.rastrear("teste", orcamento=1) as r:
+        rodar(_consultas(2))
+    assert r.total == 2
+    assert len(r.problemas) == 1 and "orçamento" in r.problemas[0]
+
+def test_modo_erro_interrompe_no_comando_excedente(rodar, monkeypatch):
+    monkeypatch.setattr(settings, "consultas_modo", "erro")
+    with pytest.raises(rastreio.ConsultasExcedidas):
+        with rastreio.rastrear("teste", orcamento=1):
+            rodar(_consultas(2))
+
+def test_select_repetido_e_apontado_como_n_mais_1(rodar, monkeypatch):
+    monkeypatch.setattr(settings, "consultas_modo", "log")
+    monkeypatch.setattr(settings, "consultas_repeticoes_max", 3)
+    with rastreio.rastrear("teste") as r:
+        rodar(_consultas(4, repetida=True))
+    assert len(r.problemas) == 1 and "N+1" in r.problemas[0]
+
+    with rastreio.rastrear("teste") as r:
+        rodar(_consultas(4))
+    assert r.problemas == []
+
+def test_middleware_aplica_orcamento_da_rota(rodar, monkeypatch):
+    monkeypatch.setattr(settings, "consultas_modo", "erro")
+    app = FastAPI()
+    app.add_middleware(rastreio.MiddlewareConsultas)
+
+    @app.get("/dentro")
+    @rastreio.orcamento(2)
+    async def dentro():
+        await _consultas(2)
+        return {}
+
+    @app.get("/fora")
+    @rastreio.orcamento(1)
+    async def fora():
+        await _consultas(2)
+        return {}
+
+    async def chamar(caminho):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+            return await cliente.get(caminho)
+
+    resposta = rodar(chamar("/dentro"))
+    assert resposta.status_code == 200
+    assert resposta.headers[rastreio.HEADER_CONSULTAS] == "2"
+    with pytest.raises(rastreio.ConsultasExcedidas):
+        rodar(chamar("/fora"))
@@ -0,0 +1,39 @@
+from sqlalchemy import event, select
+from app import models, referencias, security
+from app.database import engine
+
+def _principal(username):
+    return security.Principal(id=1, username=username, role="ADMIN", is_active=True)
+
+def test_aviso_do_canal_limpa_principais_do_usuario():
+    security.cache_principais.set(("fulano", "a"), _principal("fulano"))
+    security.cache_principais.set(("ciclano", "b"), _principal("ciclano"))
+
+    # o que um worker recebe quando outro altera o usuário
+    referencias._ao_notificar(None, 0, referencias.CANAL, "principal:fulano")
+
+    assert security.cache_principais.get(("fulano", "a")) is None
+    assert security.cache_principais.get(("ciclano", "b")) is not None
+
+def test_alterar_usuario_avisa_os_outros_workers(rodar, sessoes):
+    avisos = []
+
+    def capturar(conn, cursor, statement, parametros, contexto, executemany):
+        if "pg_notify" in statement:
+            avisos.append(parametros)
+
+    async def cenario():
+        async with sessoes() as db:
+            db.add(models.Usuario(username="rebaixado", password_hash="x", role="ADMIN"))
+            await db.commit()
+        event.listen(engine.sync_engine, "before_cursor_execute", capturar)
+        try:
+            async with sessoes() as db:
+                usuario = await db.scalar(select(models.Usuario).where(models.Usuario.username == "rebaixado"))
+                usuario.role = "ATENDENTE"
+                await db.commit()
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capturar)
+
+    rodar(cenario())
+    assert any("principal:rebaixado" in p for p in avisos)
@@ -0,0 +1,20 @@
+from app import totais
+from app.routers.veiculos import cache_placas
+
+def _cache_apos(rodar, sessoes, os_id, desfazer=False):
+    async def cenario():
+        cache_placas.set("ABC1D23", {"ordens": []})
+        async with sessoes() as db:
+            # UPDATE ... RETURNING direto na OS, sem objeto passando pelo flush
+            await totais.aplicar_delta(db, os_id, pecas=10)
+            if desfazer:
+                await db.rollback()
+            await db.commit()
+        return cache_placas.get("ABC1D23")
+    return rodar(cenario())
+
+def test_update_em_massa_na_os_limpa_cache_de_placas(rodar, sessoes, nova_os):
+    assert _cache_apos(rodar, sessoes, nova_os()) is None
+
+def test_rollback_mantem_cache_de_placas(rodar, sessoes, nova_os):
+    assert _cache_apos(rodar, sessoes, nova_os(), desfazer=True) == {"ordens": []}
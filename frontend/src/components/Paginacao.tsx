@@ -0,0 +1,35 @@
+import { Flex, Text, Button, HStack } from '@chakra-ui/react'
+import { ChevronLeftIcon, ChevronRightIcon } from '@chakra-ui/icons'
+
+interface PaginacaoProps {
+  pagina: number;      // começa em 0
+  porPagina: number;
+  mostrados: number;   // itens da página atual
+  total: number;       // X-Total-Count
+  limitado?: boolean;  // X-Total-Capped: há mais que `total`
+  onChange: (pagina: number) => void;
+}
+
+export default function Paginacao({ pagina, porPagina, mostrados, total, limitado, onChange }: PaginacaoProps) {
+  const inicio = pagina * porPagina
+  const temProxima = mostrados === porPagina && (limitado || inicio + mostrados < total)
+  if (pagina === 0 && !temProxima) return null
+
+  return (
+    <Flex justify="space-between" align="center" mt={4}>
+      <Text fontSize="sm" color="gray.500">
+        {mostrados
+          ? `${inicio + 1}–${inicio + mostrados} de ${limitado ? 'mais de ' : ''}${total}`
+          : 'Nenhum registro nesta página'}
+      </Text>
+      <HStack>
+        <Button size="sm" leftIcon={<ChevronLeftIcon />} isDisabled={pagina === 0} onClick={() => onChange(pagina - 1)}>
+          Anterior
+        </Button>
+        <Button size="sm" rightIcon={<ChevronRightIcon />} isDisabled={!temProxima} onClick={() => onChange(pagina + 1)}>
+          Próxima
+        </Button>
+      </HStack>
+    </Flex>
+  )
+}
@@ -11,6 +11,7 @@ import type { Cliente } from '../types'
 
 export default function Clientes() {
   const [clientes, setClientes] = useState<Cliente[]>([])
+  const [busca, setBusca] = useState('')
   
   // Estados do Formulário
   const [idEdicao, setIdEdicao] = useState<number | null>(null)
@@ -28,12 +29,20 @@ export default function Clientes() {
 
   const fetchClientes = async () => {
     try {
-        const { data } = await api.get<Cliente[]>('/clientes/')
+        // Com termo: busca no servidor (nome, CPF/CNPJ, telefone ou placa), já ordenada por relevância
+        const termo = busca.trim()
+        const { data } = termo
+          ? await api.get<Cliente[]>('/clientes/busca', { params: { q: termo, limite: 50 } })
+          : await api.get<Cliente[]>('/clientes/')
         setClientes(data)
     } catch (error) { console.error(error) }
   }
 
-  useEffect(() => { fetchClientes() }, [])
+  // espera o usuário parar de digitar antes de buscar
+  useEffect(() => {
+    const timer = setTimeout(fetchClientes, 300)
+    return () => clearTimeout(timer)
+  }, [busca])
 
   const abrirModalCriar = () => {
       setIdEdicao(null)
@@ -87,6 +96,11 @@ export default function Clientes() {
         <Flex mb={8} bg={cardBg} p={4} borderRadius="xl" shadow="sm" align="center" border="1px solid" borderColor={borderColor}>
           <Heading size="md" color={textColor}>Gestão de Clientes</Heading>
           <Spacer />
+          <Input
+            placeholder="Buscar por nome, CPF/CNPJ, telefone ou placa"
+            size="sm" maxW="sm" mr={4} borderRadius="md"
+            value={busca} onChange={(e) => setBusca(e.target.value)}
+          />
           <Button leftIcon={<AddIcon />} colorScheme="brand" size="sm" onClick={abrirModalCriar}>
             Novo Cliente
           </Button>
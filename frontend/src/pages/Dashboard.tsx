@@ -2,51 +2,29 @@ import { useEffect, useState } from 'react'
 import { Box, SimpleGrid, Stat, StatLabel, StatNumber, StatHelpText, Icon, Flex, useColorModeValue } from '@chakra-ui/react'
 import { FaMoneyBillWave, FaClipboardList, FaCar, FaUsers } from 'react-icons/fa'
 import api from '../services/api'
-import type { OSResumo, Cliente } from '../types'
+import type { Dashboard as DashboardDados } from '../types'
 import { useDisclosure, Button } from '@chakra-ui/react'
 import { AddIcon } from '@chakra-ui/icons'
 import NovaOSModal from '../components/NovaOSModal'
 
 export default function Dashboard() {
-  const [totalFaturamento, setTotalFaturamento] = useState(0)
-  const [osAbertas, setOsAbertas] = useState(0)
-  const [totalClientes, setTotalClientes] = useState(0)
+  const [dados, setDados] = useState<DashboardDados | null>(null)
   const { isOpen, onOpen, onClose } = useDisclosure()
 
   const bgCard = useColorModeValue('white', 'gray.800')
 
+  // Agregados calculados no servidor (GET /dashboard)
   const carregarDados = async () => {
     try {
-      const [resOS, resClientes] = await Promise.all([
-        api.get<OSResumo[]>('/os/'),
-        api.get<Cliente[]>('/clientes/')
-      ])
-
-      const listaOS = resOS.data
-      
-      const abertas = listaOS.filter(os => os.status !== 'FINALIZADO').length
-      setOsAbertas(abertas)
-      
-      setTotalClientes(resClientes.data.length)
-
+      const { data } = await api.get<DashboardDados>('/dashboard/')
+      setDados(data)
     } catch (error) {
       console.error("Erro ao carregar dashboard", error)
     }
   }
 
-  const carregarFinanceiro = async () => {
-      try {
-          const { data } = await api.get('/pagamentos/') // Precisamos garantir que essa rota exista
-          const total = data.reduce((acc: number, curr: any) => acc + Number(curr.valor), 0)
-          setTotalFaturamento(total)
-      } catch (error) {
-          console.log("Sem dados financeiros ainda")
-      }
-  }
-
   useEffect(() => {
     carregarDados()
-    carregarFinanceiro()
   }, [])
 
   const CardEstatistica = ({ label, valor, icon, help, color }: any) => (
@@ -72,26 +50,28 @@ export default function Dashboard() {
       <SimpleGrid columns={{ base: 1, md: 2, lg: 4 }} spacing={6}>
         <CardEstatistica 
             label="Faturamento Total" 
-            valor={`R$ ${totalFaturamento.toFixed(2)}`} 
+            valor={`R$ ${(dados?.faturamento_total ?? 0).toFixed(2)}`} 
             icon={FaMoneyBillWave} 
+            help={`R$ ${(dados?.faturamento_periodo ?? 0).toFixed(2)} este mês`}
             color="green.400" 
         />
         <CardEstatistica 
             label="OS em Aberto" 
-            valor={osAbertas} 
+            valor={dados?.os_abertas ?? 0} 
             icon={FaClipboardList} 
             help="Requer atenção"
             color="orange.400" 
         />
         <CardEstatistica 
             label="Clientes Ativos" 
-            valor={totalClientes} 
+            valor={dados?.clientes_ativos ?? 0} 
             icon={FaUsers} 
+            help={`${dados?.total_clientes ?? 0} cadastrados`}
             color="blue.400" 
         />
         <CardEstatistica 
             label="Veículos na Oficina" 
-            valor={osAbertas} // Geralmente 1 carro por OS aberta
+            valor={dados?.veiculos_na_oficina ?? 0}
             icon={FaCar} 
             color="purple.400" 
         />
@@ -4,12 +4,15 @@ import {
   useDisclosure, Modal, ModalOverlay, ModalContent, ModalHeader,
   ModalFooter, ModalBody, ModalCloseButton, FormControl, FormLabel, Input,
   useToast, Tabs, TabList, TabPanels, Tab, TabPanel, useColorModeValue,
-  IconButton, Badge, HStack
+  IconButton, Badge, HStack, Spacer
 } from '@chakra-ui/react'
 import { AddIcon, DeleteIcon, EditIcon } from '@chakra-ui/icons'
 import { FaBox, FaWrench } from 'react-icons/fa'
-import api from '../services/api'
+import api, { totalDaListagem } from '../services/api'
 import type { Peca } from '../types'
+import Paginacao from '../components/Paginacao'
+
+const POR_PAGINA = 50
 
 interface Servico {
     id: number;
@@ -21,6 +24,11 @@ interface Servico {
 export default function Estoque() {
   const [pecas, setPecas] = useState<Peca[]>([])
   const [servicos, setServicos] = useState<Servico[]>([])
+  const [busca, setBusca] = useState('')
+  const [paginaPecas, setPaginaPecas] = useState(0)
+  const [paginaServicos, setPaginaServicos] = useState(0)
+  const [totalPecas, setTotalPecas] = useState({ total: 0, limitado: false })
+  const [totalServicos, setTotalServicos] = useState({ total: 0, limitado: false })
   
   // States do Form Peça
   const [idEdicao, setIdEdicao] = useState<number | null>(null)
@@ -28,6 +36,7 @@ export default function Estoque() {
   const [codigoPeca, setCodigoPeca] = useState('')
   const [valorPeca, setValorPeca] = useState('')
   const [qtdPeca, setQtdPeca] = useState('')
+  const [qtdOriginal, setQtdOriginal] = useState(0) // estoque exibido ao abrir a edição
 
   // States do Form Serviço
   const [descServico, setDescServico] = useState('')
@@ -39,18 +48,31 @@ export default function Estoque() {
   const toast = useToast()
   const bgCard = useColorModeValue('white', 'gray.800')
 
+  // Uma página de cada aba; o termo filtra no servidor (nome/código da peça, descrição do serviço)
   const carregarDados = async () => {
     try {
+        const q = busca.trim() || undefined
         const [resPecas, resServicos] = await Promise.all([
-            api.get('/pecas/'),
-            api.get('/servicos/')
+            api.get<Peca[]>('/pecas/', { params: { q, skip: paginaPecas * POR_PAGINA, limit: POR_PAGINA } }),
+            api.get<Servico[]>('/servicos/', { params: { q, skip: paginaServicos * POR_PAGINA, limit: POR_PAGINA } })
         ])
         setPecas(resPecas.data)
+        setTotalPecas(totalDaListagem(resPecas))
         setServicos(resServicos.data)
+        setTotalServicos(totalDaListagem(resServicos))
     } catch (error) { console.error("Erro ao carregar estoque", error) }
   }
 
-  useEffect(() => { carregarDados() }, [])
+  // espera o usuário parar de digitar antes de buscar
+  useEffect(() => {
+    const timer = setTimeout(carregarDados, 300)
+    return () => clearTimeout(timer)
+  }, [busca, paginaPecas, paginaServicos])
+
+  const alterarBusca = (termo: string) => {
+      setBusca(termo)
+      setPaginaPecas(0); setPaginaServicos(0)
+  }
 
   // --- FUNÇÕES DE ABRIR MODAL ---
   const abrirModalNovaPeca = () => {
@@ -74,6 +96,7 @@ export default function Estoque() {
       setCodigoPeca(p.codigo || '')
       setValorPeca(p.valor_venda.toString())
       setQtdPeca(p.estoque_atual.toString())
+      setQtdOriginal(p.estoque_atual)
       onOpen()
   }
 
@@ -104,7 +127,8 @@ export default function Estoque() {
               }
 
               if (idEdicao) {
-                  await api.put(`/pecas/${idEdicao}`, payload)
+                  // o servidor recusa (409) se o estoque mudou desde que o formulário abriu
+                  await api.put(`/pecas/${idEdicao}`, { ...payload, estoque_anterior: qtdOriginal })
                   toast({ title: 'Peça atualizada!', status: 'success' })
               } else {
                   await api.post('/pecas/', payload)
@@ -133,6 +157,7 @@ export default function Estoque() {
       } catch (error: any) {
           const msg = error.response?.data?.detail || 'Erro ao salvar'
           toast({ title: 'Erro', description: msg, status: 'error' })
+          if (error.response?.status === 409) carregarDados()
       }
   }
 
@@ -164,6 +189,12 @@ export default function Estoque() {
                     <Tab><FaBox style={{marginRight: '8px'}}/> Peças</Tab>
                     <Tab><FaWrench style={{marginRight: '8px'}}/> Serviços</Tab>
                 </TabList>
+                <Spacer />
+                <Input
+                    placeholder={tabIndex === 0 ? 'Buscar por nome ou código' : 'Buscar por descrição'}
+                    maxW="xs" mr={4}
+                    value={busca} onChange={(e) => alterarBusca(e.target.value)}
+                />
                 <Button 
                     leftIcon={<AddIcon />} 
                     colorScheme="brand" 
@@ -193,6 +224,8 @@ export default function Estoque() {
                             ))}
                         </Tbody>
                     </Table>
+                    <Paginacao pagina={paginaPecas} porPagina={POR_PAGINA} mostrados={pecas.length}
+                        total={totalPecas.total} limitado={totalPecas.limitado} onChange={setPaginaPecas} />
                 </TabPanel>
 
                 {/* TAB SERVIÇOS */}
@@ -213,6 +246,8 @@ export default function Estoque() {
                             ))}
                         </Tbody>
                     </Table>
+                    <Paginacao pagina={paginaServicos} porPagina={POR_PAGINA} mostrados={servicos.length}
+                        total={totalServicos.total} limitado={totalServicos.limitado} onChange={setPaginaServicos} />
                 </TabPanel>
             </TabPanels>
         </Tabs>
@@ -8,13 +8,20 @@ import {
 } from '@chakra-ui/react'
 import { AddIcon, DeleteIcon, ArrowUpIcon, ArrowDownIcon } from '@chakra-ui/icons'
 import { FaMoneyBillWave, FaFileInvoiceDollar, FaWallet } from 'react-icons/fa'
-import api from '../services/api'
+import api, { totalDaListagem } from '../services/api'
 import type { Despesa } from '../types'
+import Paginacao from '../components/Paginacao'
+
+const POR_PAGINA = 50
 
 export default function Financeiro() {
   const [resumo, setResumo] = useState({ total_receitas: 0, total_despesas: 0, saldo: 0 })
   const [receitas, setReceitas] = useState<any[]>([])
   const [despesas, setDespesas] = useState<Despesa[]>([])
+  const [paginaReceitas, setPaginaReceitas] = useState(0)
+  const [paginaDespesas, setPaginaDespesas] = useState(0)
+  const [totalReceitas, setTotalReceitas] = useState({ total: 0, limitado: false })
+  const [totalDespesas, setTotalDespesas] = useState({ total: 0, limitado: false })
 
   const [desc, setDesc] = useState('')
   const [valor, setValor] = useState('')
@@ -30,20 +37,23 @@ export default function Financeiro() {
 
   const carregarDados = async () => {
     try {
+        // listagens paginadas no servidor (mais recentes primeiro); o resumo vem do rollup diário
         const [resResumo, resPag, resDesp] = await Promise.all([
             api.get('/pagamentos/resumo'),
-            api.get('/pagamentos'),
-            api.get('/pagamentos/despesas/')
+            api.get('/pagamentos/', { params: { skip: paginaReceitas * POR_PAGINA, limit: POR_PAGINA } }),
+            api.get<Despesa[]>('/pagamentos/despesas/', { params: { skip: paginaDespesas * POR_PAGINA, limit: POR_PAGINA } })
         ])
         setResumo(resResumo.data)
         setReceitas(resPag.data)
+        setTotalReceitas(totalDaListagem(resPag))
         setDespesas(resDesp.data)
+        setTotalDespesas(totalDaListagem(resDesp))
     } catch (error) {
         console.error("Erro ao carregar financeiro", error)
     }
   }
 
-  useEffect(() => { carregarDados() }, [])
+  useEffect(() => { carregarDados() }, [paginaReceitas, paginaDespesas])
 
   const handleSalvarDespesa = async () => {
       try {
@@ -142,6 +152,8 @@ export default function Financeiro() {
                             ))}
                         </Tbody>
                     </Table>
+                    <Paginacao pagina={paginaReceitas} porPagina={POR_PAGINA} mostrados={receitas.length}
+                        total={totalReceitas.total} limitado={totalReceitas.limitado} onChange={setPaginaReceitas} />
                 </TabPanel>
 
                 {/* TAB DESPESAS */}
@@ -162,6 +174,8 @@ export default function Financeiro() {
                             ))}
                         </Tbody>
                     </Table>
+                    <Paginacao pagina={paginaDespesas} porPagina={POR_PAGINA} mostrados={despesas.length}
+                        total={totalDespesas.total} limitado={totalDespesas.limitado} onChange={setPaginaDespesas} />
                 </TabPanel>
             </TabPanels>
         </Tabs>
@@ -7,9 +7,9 @@ import {
   Table, Thead, Tbody, Tr, Th, Td, TableContainer, Select, Icon, useDisclosure, Divider, IconButton
 } from '@chakra-ui/react'
 import { CheckCircleIcon, DeleteIcon } from '@chakra-ui/icons'
-import { FaTools, FaClock, FaWrench, FaBoxOpen, FaMoneyBillWave } from 'react-icons/fa'
+import { FaTools, FaClock, FaWrench, FaBoxOpen, FaMoneyBillWave, FaThumbsUp, FaBan } from 'react-icons/fa'
 import api from '../services/api'
-import type { OSResumo, OSDetalhada, Peca } from '../types'
+import type { OSResumo, OSDetalhada, OSQuadro, OSStatus, Peca } from '../types'
 import NovaOSModal from '../components/NovaOSModal'
 import { FaPlus } from 'react-icons/fa6'
 
@@ -21,15 +21,34 @@ interface Servico {
 
 const STATUS_CONFIG: any = {
   "ORCAMENTO": { label: 'Orçamento', colorName: 'yellow', icon: FaClock },
-  "EXECUCAO": { label: 'Execução', colorName: 'blue', icon: FaTools },
+  "APROVADO": { label: 'Aprovado', colorName: 'purple', icon: FaThumbsUp },
+  "EM_ANDAMENTO": { label: 'Em Andamento', colorName: 'blue', icon: FaTools },
   "FINALIZADO": { label: 'Finalizado', colorName: 'green', icon: CheckCircleIcon },
+  "CANCELADO": { label: 'Cancelado', colorName: 'red', icon: FaBan },
+}
+
+// Coluna de finalizadas: só as mais recentes, o histórico fica na listagem
+const FINALIZADAS_RECENTES = 20
+
+// Seletores de peça/serviço: busca no servidor, só as primeiras opções
+const OPCOES_SELETOR = 30
+
+interface CartaoOS {
+  id: number;
+  data_abertura: string;
+  defeito_reclamado: string;
+  placa?: string;
+  mecanico?: string;
 }
 
 export default function OrdensServico() {
    
-  const [listaKanban, setListaKanban] = useState<OSResumo[]>([])
+  const [quadro, setQuadro] = useState<OSQuadro | null>(null)
+  const [finalizadas, setFinalizadas] = useState<OSResumo[]>([])
   const [estoque, setEstoque] = useState<Peca[]>([])
   const [servicosDisponiveis, setServicosDisponiveis] = useState<Servico[]>([])
+  const [buscaPeca, setBuscaPeca] = useState('')
+  const [buscaServico, setBuscaServico] = useState('')
   const [osAtual, setOsAtual] = useState<OSDetalhada | null>(null)
   
   const [idPecaSelecionada, setIdPecaSelecionada] = useState<string>("") 
@@ -63,17 +82,38 @@ export default function OrdensServico() {
   // --- CARREGAMENTO ---
   const carregarDados = async () => {
     try {
-      const [resKanban, resEstoque, resServicos] = await Promise.all([
-        api.get<OSResumo[]>('/os/'),
-        api.get<Peca[]>('/pecas/'),
-        api.get<Servico[]>('/servicos/')
+      const [resQuadro, resFinalizadas] = await Promise.all([
+        api.get<OSQuadro>('/os/quadro'),
+        api.get<OSResumo[]>('/os/', { params: { status: 'FINALIZADO', limit: FINALIZADAS_RECENTES } })
       ])
-      setListaKanban(resKanban.data)
-      setEstoque(resEstoque.data)
-      setServicosDisponiveis(resServicos.data)
+      setQuadro(resQuadro.data)
+      setFinalizadas(resFinalizadas.data)
     } catch (error) { console.error("Erro ao carregar dados", error) }
   }
 
+  // Opções dos seletores do modal, filtradas no servidor pelo que foi digitado
+  useEffect(() => {
+    if (!isOpen) return
+    const timer = setTimeout(async () => {
+      try {
+        const { data } = await api.get<Peca[]>('/pecas/', { params: { q: buscaPeca.trim() || undefined, limit: OPCOES_SELETOR } })
+        setEstoque(data)
+      } catch (error) { console.error("Erro ao buscar peças", error) }
+    }, 300)
+    return () => clearTimeout(timer)
+  }, [buscaPeca, isOpen])
+
+  useEffect(() => {
+    if (!isOpen) return
+    const timer = setTimeout(async () => {
+      try {
+        const { data } = await api.get<Servico[]>('/servicos/', { params: { q: buscaServico.trim() || undefined, limit: OPCOES_SELETOR } })
+        setServicosDisponiveis(data)
+      } catch (error) { console.error("Erro ao buscar serviços", error) }
+    }, 300)
+    return () => clearTimeout(timer)
+  }, [buscaServico, isOpen])
+
   const carregarDetalhesOS = async (id: number) => {
     try {
       const { data } = await api.get<OSDetalhada>(`/os/${id}/detalhes`)
@@ -90,6 +130,7 @@ export default function OrdensServico() {
     setOsAtual(null)
     setIdPecaSelecionada(""); setQtdPeca(1);
     setIdServicoSelecionado(""); setPrecoServico(0);
+    setBuscaPeca(""); setBuscaServico("");
     onOpen()
     carregarDetalhesOS(id)
   }
@@ -156,11 +197,19 @@ export default function OrdensServico() {
              setOsAtual({ ...osAtual, status: novoStatus as any })
           }
           carregarDados()
-      } catch (error) {
-          toast({ title: 'Erro ao mudar status', status: 'error' })
+      } catch (error: any) {
+          toast({ title: 'Erro ao mudar status', description: error.response?.data?.detail, status: 'error' })
       }
   }
 
+  // Transições permitidas vêm do quadro; status finais não mudam
+  const transicoesDe = (status: string): OSStatus[] =>
+      quadro?.colunas.find(c => c.status === status)?.transicoes ?? []
+
+  const statusDaOS = (id: number): string | undefined =>
+      quadro?.colunas.find(c => c.os.some(os => os.id === id))?.status
+      ?? (finalizadas.some(os => os.id === id) ? 'FINALIZADO' : undefined)
+
   // --- DRAG AND DROP ---
   const onDragStart = (e: React.DragEvent, id: number) => {
       setDraggedOsId(id)
@@ -170,16 +219,23 @@ export default function OrdensServico() {
   const onDrop = async (e: React.DragEvent, novoStatus: string) => {
       e.preventDefault()
       if (draggedOsId) {
-          setListaKanban(prev => prev.map(os => os.id === draggedOsId ? { ...os, status: novoStatus } : os))
-          await handleMudarStatus(novoStatus, draggedOsId)
+          const atual = statusDaOS(draggedOsId)
           setDraggedOsId(null)
+          if (!atual || atual === novoStatus) return
+          if (!transicoesDe(atual).includes(novoStatus as OSStatus)) {
+              toast({ title: `Não é possível mover de ${STATUS_CONFIG[atual].label} para ${STATUS_CONFIG[novoStatus].label}`, status: 'warning' })
+              return
+          }
+          await handleMudarStatus(novoStatus, draggedOsId)
       }
   }
 
   // --- RENDER ---
   const KanbanColumn = ({ statusKey }: { statusKey: string }) => {
     const config = STATUS_CONFIG[statusKey]
-    const itens = listaKanban.filter(os => os.status === statusKey)
+    const coluna = quadro?.colunas.find(c => c.status === statusKey)
+    const itens: CartaoOS[] = coluna ? coluna.os : (statusKey === 'FINALIZADO' ? finalizadas : [])
+    const quantidade = coluna ? coluna.quantidade : itens.length
 
     return (
       <Flex 
@@ -196,7 +252,7 @@ export default function OrdensServico() {
                 {config.label}
             </Text>
             <Spacer />
-            <Badge borderRadius="full" px={2} colorScheme={config.colorName}>{itens.length}</Badge>
+            <Badge borderRadius="full" px={2} colorScheme={config.colorName}>{quantidade}</Badge>
         </Flex>
 
         <VStack spacing={3} align="stretch">
@@ -215,6 +271,12 @@ export default function OrdensServico() {
                         <Text fontSize="xs" color="gray.500">{new Date(os.data_abertura).toLocaleDateString()}</Text>
                     </Flex>
                     <Text fontWeight="bold" fontSize="sm" noOfLines={2}>{os.defeito_reclamado}</Text>
+                    {os.placa && (
+                        <Flex justify="space-between" mt={2}>
+                            <Badge colorScheme="gray" fontFamily="mono">{os.placa}</Badge>
+                            <Text fontSize="xs" color="gray.500" noOfLines={1}>{os.mecanico}</Text>
+                        </Flex>
+                    )}
                 </Box>
             ))}
         </VStack>
@@ -233,9 +295,10 @@ export default function OrdensServico() {
         </Button>
       </Flex>
 
-      <Grid templateColumns={{ base: "1fr", md: "repeat(3, 1fr)" }} gap={6}>
+      <Grid templateColumns={{ base: "1fr", md: "repeat(2, 1fr)", xl: "repeat(4, 1fr)" }} gap={6}>
         <KanbanColumn statusKey="ORCAMENTO" />
-        <KanbanColumn statusKey="EXECUCAO" />
+        <KanbanColumn statusKey="APROVADO" />
+        <KanbanColumn statusKey="EM_ANDAMENTO" />
         <KanbanColumn statusKey="FINALIZADO" />
       </Grid>
 
@@ -258,9 +321,9 @@ export default function OrdensServico() {
                         onChange={(e) => handleMudarStatus(e.target.value)}
                         variant="filled" borderRadius="md"
                     >
-                        <option value="ORCAMENTO">Orçamento</option>
-                        <option value="EXECUCAO">Em Execução</option>
-                        <option value="FINALIZADO">Finalizado</option>
+                        {[osAtual.status, ...transicoesDe(osAtual.status)].map(s => (
+                            <option key={s} value={s}>{STATUS_CONFIG[s].label}</option>
+                        ))}
                     </Select>
                 )}
             </Flex>
@@ -281,9 +344,11 @@ export default function OrdensServico() {
                     <Flex gap={2} mb={4} align="flex-end" bg={sectionBg} p={3} borderRadius="md">
                         <FormControl>
                             <FormLabel fontSize="xs">Selecionar do Estoque</FormLabel>
+                            <Input size="sm" mb={1} placeholder="Buscar por nome ou código" value={buscaPeca}
+                                onChange={e => { setBuscaPeca(e.target.value); setIdPecaSelecionada("") }} />
                             <Select placeholder="Escolha a peça..." size="sm" value={idPecaSelecionada} onChange={e => setIdPecaSelecionada(e.target.value)}>
                                 {estoque.map(p => (
-                                    <option key={p.id} value={p.id}>{p.nome} (Disp: {p.quantidade}) - R$ {p.valor_venda}</option>
+                                    <option key={p.id} value={p.id}>{p.nome} (Disp: {p.estoque_atual}) - R$ {p.valor_venda}</option>
                                 ))}
                             </Select>
                         </FormControl>
@@ -341,6 +406,8 @@ export default function OrdensServico() {
                     <Flex gap={2} mb={4} align="flex-end" bg={sectionBg} p={3} borderRadius="md">
                         <FormControl>
                             <FormLabel fontSize="xs">Tipo de Serviço</FormLabel>
+                            <Input size="sm" mb={1} placeholder="Buscar por descrição" value={buscaServico}
+                                onChange={e => { setBuscaServico(e.target.value); setIdServicoSelecionado("") }} />
                             <Select placeholder="Escolha o serviço..." size="sm" value={idServicoSelecionado} 
                                 onChange={e => {
                                     const id = e.target.value;
@@ -13,6 +13,7 @@ import type { Veiculo, Cliente } from '../types'
 export default function Veiculos() {
   const [veiculos, setVeiculos] = useState<Veiculo[]>([])
   const [clientes, setClientes] = useState<Cliente[]>([])
+  const [busca, setBusca] = useState('')
   
   const [idEdicao, setIdEdicao] = useState<number | null>(null)
   const [marca, setMarca] = useState('') 
@@ -33,8 +34,12 @@ export default function Veiculos() {
 
   const fetchData = async () => {
     try {
+        // Com termo: busca no servidor (placa ou dados do dono), já ordenada por relevância
+        const termo = busca.trim()
         const [resVeiculos, resClientes] = await Promise.all([
-          api.get<Veiculo[]>('/veiculos/'),
+          termo
+            ? api.get<Veiculo[]>('/veiculos/busca', { params: { q: termo, limite: 50 } })
+            : api.get<Veiculo[]>('/veiculos/'),
           api.get<Cliente[]>('/clientes/')
         ])
         setVeiculos(resVeiculos.data); 
@@ -42,7 +47,11 @@ export default function Veiculos() {
     } catch(e) { console.error(e) }
   }
 
-  useEffect(() => { fetchData() }, [])
+  // espera o usuário parar de digitar antes de buscar
+  useEffect(() => {
+    const timer = setTimeout(fetchData, 300)
+    return () => clearTimeout(timer)
+  }, [busca])
 
   // Limpa o form para criar um novo
   const abrirModalCriar = () => {
@@ -119,6 +128,11 @@ export default function Veiculos() {
             <Heading size="md" color={textColor}>Frota de Veículos</Heading>
         </HStack>
         <Spacer />
+        <Input
+          placeholder="Buscar por placa ou dono"
+          size="sm" maxW="xs" mr={4} borderRadius="md"
+          value={busca} onChange={(e) => setBusca(e.target.value)}
+        />
         <Button leftIcon={<AddIcon />} colorScheme="brand" size="sm" onClick={abrirModalCriar}>
           Novo Veículo
         </Button>
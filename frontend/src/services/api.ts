@@ -1,4 +1,4 @@
-import axios from 'axios';
+import axios, { type AxiosResponse } from 'axios';
 
 const api = axios.create({
   baseURL: import.meta.env.VITE_API_URL,
@@ -24,4 +24,11 @@ api.interceptors.response.use(
   }
 );
 
+// Total das listagens paginadas (X-Total-Count). Com X-Total-Capped o servidor
+// parou de contar no limite e o total é só um piso.
+export const totalDaListagem = (res: AxiosResponse) => ({
+  total: Number(res.headers['x-total-count'] ?? 0),
+  limitado: res.headers['x-total-capped'] === 'true',
+});
+
 export default api;
\ No newline at end of file
@@ -40,12 +40,14 @@ export interface ItemServicoDetalhe {
   subtotal: number;
 }
 
+export type OSStatus = 'ORCAMENTO' | 'APROVADO' | 'EM_ANDAMENTO' | 'FINALIZADO' | 'CANCELADO';
+
 export interface OSDetalhada {
   id: number;
   numero_os?: number;
   data_abertura: string;
   data_fechamento?: string; 
-  status: 'ORCAMENTO' | 'EXECUCAO' | 'FINALIZADO';
+  status: OSStatus;
   defeito_reclamado: string;
   km_atual: number;
   
@@ -71,6 +73,48 @@ export interface OSResumo {
   data_abertura: string;
 }
 
+// GET /os/quadro: só as OS em aberto, por status
+export interface OSQuadroItem {
+  id: number;
+  numero_os: number;
+  data_abertura: string;
+  defeito_reclamado: string;
+  veiculo_id: number;
+  placa: string;
+  modelo: string;
+  mecanico_id: number;
+  mecanico: string;
+  saldo_devedor: number;
+}
+
+export interface OSQuadroColuna {
+  status: OSStatus;
+  quantidade: number;
+  transicoes: OSStatus[];
+  os: OSQuadroItem[];
+}
+
+export interface OSQuadro {
+  total: number;
+  colunas: OSQuadroColuna[];
+}
+
+export interface Dashboard {
+  data_inicio: string;
+  data_fim: string;
+  os_abertas: number;
+  os_abertas_por_status: Record<string, number>;
+  veiculos_na_oficina: number;
+  os_abertas_periodo: number;
+  os_fechadas_periodo: number;
+  clientes_ativos: number;
+  total_clientes: number;
+  faturamento_total: number;
+  faturamento_periodo: number;
+  despesas_periodo: number;
+  receita_por_dia: { dia: string; valor: number }[];
+}
+
 export interface Despesa {
     id: number;
     descricao: string;